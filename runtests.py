@@ -4,10 +4,17 @@ import click
 import unittest
 import sys
 import os
+import json
+import logging
+import shutil
+import tempfile
+import traceback
 
 from ConfigParser import ConfigParser
 
-from django.test.runner import DiscoverRunner
+from django.test.runner import DiscoverRunner, ParallelTestSuite,\
+    RemoteTestRunner, RemoteTestResult
+import django.test.runner
 
 import chisubmit.backend.settings
 
@@ -15,6 +22,14 @@ import django
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "chisubmit.backend.settings")
 django.setup()
 
+from django.core.cache import caches
+
+# Some tests (e.g., the payload size and query budget tests) make requests 
+# that are slow by design, so we don't log slow requests while running the 
+# tests (test_metrics captures that log itself)
+logging.getLogger("chisubmit.backend.requests").handlers = [logging.NullHandler()]
+logging.getLogger("chisubmit.backend.requests").propagate = False
+
 from chisubmit.tests.integration.complete.test_complete1 import CLICompleteWorkflowExtensionsPerTeam
 from chisubmit.tests.integration.complete.test_complete2 import CLICompleteWorkflowExtensionsPerStudent
 from chisubmit.tests.integration.complete.test_complete3 import CLICompleteWorkflowCancelSubmission
@@ -25,6 +40,8 @@ from chisubmit.tests.integration.complete.test_complete6 import CLICompleteWorkf
 
 
 test_suites = {"api": "chisubmit.tests.unit.api",
+               "grading": "chisubmit.tests.unit.grading",
+               "client": "chisubmit.tests.unit.client",
                "clientlibs": "chisubmit.tests.integration.clientlibs",
                "cli": "chisubmit.tests.integration.cli",
          
@@ -36,7 +53,7 @@ test_suites = {"api": "chisubmit.tests.unit.api",
                "complete6": CLICompleteWorkflowMultipleInstructorsMultipleGraders}
 
          
-unit_tests = ["api"]
+unit_tests = ["api", "grading", "client"]
 
 integration_tests = ["clientlibs", "cli"]
 
@@ -44,13 +61,115 @@ complete_tests = ["complete1", "complete2", "complete3", "complete4", "complete5
  
 all_except_complete = unit_tests + integration_tests
 
-def run_complete_test(runner, name, test_config, git_server, git_staging):
+class ChisubmitTestResult(unittest.TextTestResult):
+    
+    def startTest(self, test):
+        # The server caches tokens and representations of objects, but 
+        # the database is restored (without invalidating the caches) 
+        # after every test
+        for cache in caches.all():
+            cache.clear()
+        super(ChisubmitTestResult, self).startTest(test)
+        
+class RemoteTestError(Exception):
+    pass
+
+class ChisubmitRemoteTestResult(RemoteTestResult):
+    """
+    Result of the tests run by a worker process (when running tests
+    in parallel). Clears the caches before each test, like 
+    ChisubmitTestResult, and sends errors and failures to the main
+    process with a formatted traceback (tracebacks can't be pickled
+    unless tblib is installed)
+    """
+    
+    def startTest(self, test):
+        for cache in caches.all():
+            cache.clear()
+        super(ChisubmitRemoteTestResult, self).startTest(test)
+        
+    def _format_err(self, err):
+        exctype, value, tb = err
+        return (RemoteTestError, RemoteTestError("".join(traceback.format_exception(exctype, value, tb))), None)
+        
+    def addError(self, test, err):
+        super(ChisubmitRemoteTestResult, self).addError(test, self._format_err(err))
+
+    def addFailure(self, test, err):
+        super(ChisubmitRemoteTestResult, self).addFailure(test, self._format_err(err))
+
+class ChisubmitRemoteTestRunner(RemoteTestRunner):
+    resultclass = ChisubmitRemoteTestResult
+
+# Directory where each worker process creates its own temporary directory
+# (set by ChisubmitParallelTestSuite before starting the workers)
+worker_tmp_root = None
+
+def init_worker(counter):
+    # Switches to the worker's copy of the test database
+    django.test.runner._init_worker(counter)
+    
+    # The CLI tests create their files (including the Git repositories of
+    # the Testing server) in temporary directories, so we put those
+    # inside a directory specific to this worker. Live servers listen
+    # on a port assigned by the OS, so each worker gets its own ports.
+    tempfile.tempdir = os.path.join(worker_tmp_root, "worker%i" % django.test.runner._worker_id)
+    os.mkdir(tempfile.tempdir)
+
+class ChisubmitParallelTestSuite(ParallelTestSuite):
+    """
+    Runs the test classes of a suite in several worker processes, each
+    with its own test database and temporary directory.
+    """
+    
+    init_worker = init_worker
+    runner_class = ChisubmitRemoteTestRunner
+    
+    def run(self, result):
+        global worker_tmp_root
+        
+        worker_tmp_root = tempfile.mkdtemp(prefix="chisubmit-tests-")
+        try:
+            return super(ChisubmitParallelTestSuite, self).run(result)
+        finally:
+            shutil.rmtree(worker_tmp_root, ignore_errors=True)
+            worker_tmp_root = None
+        
+class ChisubmitTestRunner(DiscoverRunner):
+    
+    parallel_test_suite = ChisubmitParallelTestSuite
+    
+    def get_resultclass(self):
+        return ChisubmitTestResult
+
+def run_benchmarks(runner, output, baseline):
+    from chisubmit.tests.benchmarks import run_benchmarks, compare_results, save_results
+    
+    # The benchmarks that need a database use the test database
+    runner.setup_test_environment()
+    old_config = runner.setup_databases()
+    try:
+        results = run_benchmarks()
+    finally:
+        runner.teardown_databases(old_config)
+        runner.teardown_test_environment()
+        
+    save_results(results, output)
+    print
+    print "Results written to %s" % output
+    
+    if baseline is not None:
+        print
+        compare_results(results, json.load(baseline))
+
+def run_complete_tests(runner, names, test_config, git_server, git_staging):
     suite = unittest.TestSuite()
-    test_class = test_suites[name]
-    for name in unittest.TestLoader().getTestCaseNames(test_class):
-        test = test_class(name)
-        configure_complete_test(test, test_config, git_server, git_staging)
-        suite.addTest(test)    
+    for name in names:
+        test_class = test_suites[name]
+        for test_name in unittest.TestLoader().getTestCaseNames(test_class):
+            test = test_class(test_name)
+            configure_complete_test(test, test_config, git_server, git_staging)
+            suite.addTest(test)    
     runner.run_tests([], extra_tests=suite)
 
 @click.command()
@@ -61,9 +180,13 @@ def run_complete_test(runner, name, test_config, git_server, git_staging):
 @click.option("--config", "-c", type=click.File())
 @click.option("--git-server", type=str)
 @click.option("--git-staging", type=str)
+@click.option("--benchmark-output", type=str, default="benchmarks.json")
+@click.option("--benchmark-baseline", type=click.File())
+@click.option("--parallel", "-p", type=int, default=1, help="Number of worker processes to run the tests in")
 @click.argument('tests', type=str, default="all")
 def runtests(failfast, quiet, verbose, buffer, 
              config, git_server, git_staging, 
+             benchmark_output, benchmark_baseline, parallel,
              tests):
     verbosity = 1
     if quiet:
@@ -79,7 +202,7 @@ def runtests(failfast, quiet, verbose, buffer,
     else:
         test_config = None
 
-    runner = DiscoverRunner(verbosity=verbosity, failfast=failfast)
+    runner = ChisubmitTestRunner(verbosity=verbosity, failfast=failfast, parallel=parallel)
         
     ran = False
     
@@ -93,12 +216,16 @@ def runtests(failfast, quiet, verbose, buffer,
         
     if tests in complete_tests:
         ran = True
-        run_complete_test(runner, tests, test_config, git_server, git_staging)
+        run_complete_tests(runner, [tests], test_config, git_server, git_staging)
                 
     if tests == "complete":
         ran = True
-        for test in complete_tests:
-            run_complete_test(runner, test, test_config, git_server, git_staging)
+        run_complete_tests(runner, complete_tests, test_config, git_server, git_staging)
+            
+    # Benchmarks are not tests, and are only run when explicitly requested
+    if tests == "benchmarks":
+        ran = True
+        run_benchmarks(runner, benchmark_output, benchmark_baseline)
         
         
     if not ran:
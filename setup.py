@@ -70,7 +70,8 @@ setup(name='chisubmit',
                                      "djangorestframework >= 3.3.3", 
                                      "jsonfield >= 1.0.3",
                                      "python-ldap >= 2.4.25" 
-                                     ] 
+                                     ],
+                         "msgpack" : ["msgpack >= 0.5.2"]
                         },
       setup_requires = [ "setuptools_git >= 1.0" ],
       include_package_data=True,
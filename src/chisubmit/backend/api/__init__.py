@@ -0,0 +1 @@
+default_app_config = 'chisubmit.backend.api.apps.ApiConfig'
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+class ApiConfig(AppConfig):
+    name = 'chisubmit.backend.api'
+    label = 'api'
+    
+    def ready(self):
+        # Connects the signal handlers that invalidate cached representations
+        import chisubmit.backend.api.cache
@@ -0,0 +1,72 @@
+#  Copyright (c) 2013-2014, The University of Chicago
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions are met:
+#
+#  - Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+#  - Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+#  - Neither the name of The University of Chicago nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+#  AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+#  IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+#  ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+#  LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+#  CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+#  SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+#  INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+#  CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+#  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+TOKEN_CACHE_KEY = "chisubmit:token:%s"
+
+def get_token_cache():
+    return caches[getattr(settings, "CHISUBMIT_TOKEN_CACHE", "default")]
+
+def get_token_cache_ttl():
+    return getattr(settings, "CHISUBMIT_TOKEN_CACHE_TTL", 60)
+
+def invalidate_token(key):
+    get_token_cache().delete(TOKEN_CACHE_KEY % key)
+    
+def invalidate_user_tokens(user):
+    keys = Token.objects.filter(user = user).values_list("key", flat=True)
+    get_token_cache().delete_many([TOKEN_CACHE_KEY % key for key in keys])
+
+
+class CachingTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication that caches the token (and its user) for a few 
+    seconds (CHISUBMIT_TOKEN_CACHE_TTL), so we don't have to query the 
+    database on every request. The cached token is invalidated when it
+    is reset, or when its user is modified or deleted.
+    """
+    
+    def authenticate_credentials(self, key):
+        cache = get_token_cache()
+        cache_key = TOKEN_CACHE_KEY % key
+        
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        # Invalid or inactive tokens raise AuthenticationFailed,
+        # and are not cached
+        user, token = super(CachingTokenAuthentication, self).authenticate_credentials(key)
+        cache.set(cache_key, (user, token), get_token_cache_ttl())
+        
+        return user, token
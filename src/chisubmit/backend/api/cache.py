@@ -0,0 +1,192 @@
+#  Copyright (c) 2013-2014, The University of Chicago
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions are met:
+#
+#  - Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+#  - Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+#  - Neither the name of The University of Chicago nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+#  AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+#  IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+#  ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+#  LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+#  CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+#  SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+#  INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+#  CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+#  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+
+# Read-through cache for the representations of a course's metadata 
+# (the course itself, its assignments, and their rubrics), which are
+# requested by nearly every CLI command but rarely change.
+#
+# All the cached representations of a course include the course's 
+# "generation" in their key. Saving or deleting the course, or any of
+# its assignments or rubric components, increments the generation, 
+# which invalidates all of them at once.
+
+import hashlib
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from chisubmit.backend.api.models import Course, Assignment, RubricComponent
+
+GENERATION_KEY = "chisubmit:course-gen:%s"
+REPRESENTATION_KEY = "chisubmit:repr:%s:%s:%s:%s"
+
+def get_representation_cache():
+    return caches[getattr(settings, "CHISUBMIT_REPRESENTATION_CACHE", "default")]
+
+# How long (in seconds) representations are cached if 
+# CHISUBMIT_REPRESENTATION_CACHE_TTL is None. An invalidation only 
+# reaches the process that made it if the cache is per-process 
+# (LocMemCache), so other processes could keep serving old representations
+# (e.g., an old deadline) until they expire. In that case, we only cache 
+# them for a few seconds.
+DEFAULT_TTL = 300
+DEFAULT_LOCMEM_TTL = 5
+
+def get_representation_cache_ttl():
+    ttl = getattr(settings, "CHISUBMIT_REPRESENTATION_CACHE_TTL", None)
+    if ttl is None:
+        if isinstance(get_representation_cache(), LocMemCache):
+            ttl = DEFAULT_LOCMEM_TTL
+        else:
+            ttl = DEFAULT_TTL
+    return ttl
+
+
+class CacheStats(object):
+    """
+    Hit/miss counters (per process)
+    """
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+        
+    def reset(self):
+        with self.lock:
+            self.hits = 0
+            self.misses = 0
+            self.invalidations = 0
+        
+    def hit(self):
+        with self.lock:
+            self.hits += 1
+
+    def miss(self):
+        with self.lock:
+            self.misses += 1
+            
+    def invalidation(self):
+        with self.lock:
+            self.invalidations += 1
+            
+    def as_dict(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return {"hits": self.hits,
+                    "misses": self.misses,
+                    "invalidations": self.invalidations,
+                    "hit_rate": float(self.hits) / total if total > 0 else None}
+
+stats = CacheStats()
+
+
+def get_course_generation(course_pk):
+    cache = get_representation_cache()
+    key = GENERATION_KEY % course_pk
+    generation = cache.get(key)
+    if generation is None:
+        # Never expire the generation; if it were evicted, we'd start from
+        # 1 again and could serve representations cached before the eviction
+        cache.add(key, 1, None)
+        generation = cache.get(key, 1)
+    return generation
+
+def _increment_generation(course_pk):
+    cache = get_representation_cache()
+    key = GENERATION_KEY % course_pk
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 2, None)
+
+def invalidate_course(course_pk):
+    # We also invalidate when the transaction commits, in case another 
+    # request cached the old representations before the commit.
+    _increment_generation(course_pk)
+    transaction.on_commit(lambda: _increment_generation(course_pk))
+    stats.invalidation()
+
+def get_request_variant(request, roles):
+    """
+    Everything about a request (other than the resource) that affects 
+    the representation returned by the API: the user's roles in the course,
+    the host the request was made to (which appears in absolute URLs), 
+    and the query parameters that change the representation.
+    """
+    variant = [",".join(sorted([r.name for r in roles])),
+               request.scheme,
+               request.get_host(),
+               request.query_params.get("urls", ""),
+               request.query_params.get("fields", ""),
+               ",".join(sorted(request.query_params.getlist("include")))]
+    return hashlib.sha1("|".join(variant).encode("utf-8")).hexdigest()
+
+def get_cached_representation(request, course_obj, roles, resource, build):
+    """
+    Returns the representation of a resource of a course (e.g., "course", 
+    "assignments", or "assignment:pa1") as seen by a user with the given roles,
+    from the cache if possible or calling build() (and caching its result) 
+    otherwise.
+    """
+    cache = get_representation_cache()
+    key = REPRESENTATION_KEY % (course_obj.pk, get_course_generation(course_obj.pk), 
+                                resource, get_request_variant(request, roles))
+    
+    data = cache.get(key)
+    if data is not None:
+        stats.hit()
+        return data
+    
+    stats.miss()
+    data = build()
+    cache.set(key, data, get_representation_cache_ttl())
+    return data
+
+
+@receiver([post_save, post_delete], sender=Course)
+def course_changed(sender, instance, **kwargs):
+    invalidate_course(instance.pk)
+
+@receiver([post_save, post_delete], sender=Assignment)
+def assignment_changed(sender, instance, **kwargs):
+    invalidate_course(instance.course_id)
+    
+@receiver([post_save, post_delete], sender=RubricComponent)
+def rubric_component_changed(sender, instance, **kwargs):
+    # If the rubric component is being deleted because its assignment
+    # was deleted, the assignment may no longer be in the database (but
+    # deleting it will also invalidate the course)
+    course_ids = Assignment.objects.filter(pk = instance.assignment_id).values_list("course_id", flat=True)
+    for course_id in course_ids:
+        invalidate_course(course_id)
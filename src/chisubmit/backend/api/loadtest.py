@@ -0,0 +1,188 @@
+import hashlib
+import math
+import random
+import threading
+import time
+
+from rest_framework.authtoken.models import Token
+from requests.exceptions import RequestException
+
+from chisubmit.backend.api.models import TeamMember
+from chisubmit.client.exceptions import ChisubmitRequestException
+from chisubmit.client.requester import Requester
+
+# The requests made by students in the hour before a deadline, and
+# their relative frequency: checking the deadline, looking up their
+# course and team (which most CLI commands do), and submitting.
+DEADLINE_HOUR_MIX = [("show-deadline", 5),
+                     ("course-detail", 3),
+                     ("team-detail", 3),
+                     ("submit", 1)]
+
+
+def get_load_users(course_obj):
+    """
+    Returns the API token and team of every student in a course (creating
+    the tokens if necessary)
+    """
+    users = []
+    for member in TeamMember.objects.filter(team__course = course_obj)\
+                                    .select_related("student__user", "team")\
+                                    .order_by("pk"):
+        token, _ = Token.objects.get_or_create(user = member.student.user)
+        users.append((token.key, member.team.team_id))
+    return users
+
+
+def get_percentile(sorted_values, p):
+    """
+    Nearest-rank percentile of a sorted list
+    """
+    if not sorted_values:
+        return None
+    rank = int(math.ceil(p / 100.0 * len(sorted_values)))
+    return sorted_values[min(max(rank, 1), len(sorted_values)) - 1]
+
+
+class LoadTestResults(object):
+
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+        self.elapsed = None
+        self.lock = threading.Lock()
+
+    def record(self, operation, latency, error):
+        with self.lock:
+            self.latencies.setdefault(operation, []).append(latency)
+            if error:
+                self.errors[operation] = self.errors.get(operation, 0) + 1
+
+    def get_stats(self, operation = None):
+        """
+        Returns the statistics for an operation (or for all of them,
+        if operation is None). Latencies are in seconds.
+        """
+        if operation is None:
+            latencies = sum(self.latencies.values(), [])
+            errors = sum(self.errors.values())
+        else:
+            latencies = self.latencies.get(operation, [])
+            errors = self.errors.get(operation, 0)
+        latencies = sorted(latencies)
+
+        return {"count": len(latencies),
+                "errors": errors,
+                "throughput": len(latencies) / self.elapsed if self.elapsed else 0.0,
+                "p50": get_percentile(latencies, 50),
+                "p95": get_percentile(latencies, 95),
+                "p99": get_percentile(latencies, 99),
+                "max": latencies[-1] if latencies else None}
+
+    def get_summary(self):
+        """
+        Returns the summary of the results, as a list of lines
+        """
+        rows = [(o, self.get_stats(o)) for o in sorted(self.latencies)]
+        rows.append(("TOTAL", self.get_stats()))
+
+        width = max([len(o) for o, _ in rows] + [len("Operation")])
+        lines = ["%-*s %7s %6s %8s %8s %8s %8s %8s" % (width, "Operation", "Count", "Errors", "Req/s",
+                                                        "p50 (ms)", "p95 (ms)", "p99 (ms)", "Max (ms)")]
+        for operation, stats in rows:
+            if stats["count"] == 0:
+                continue
+            lines.append("%-*s %7i %6i %8.1f %8.1f %8.1f %8.1f %8.1f" % (width, operation, stats["count"], stats["errors"],
+                                                                       stats["throughput"],
+                                                                       1000 * stats["p50"], 1000 * stats["p95"],
+                                                                       1000 * stats["p99"], 1000 * stats["max"]))
+        lines.append("")
+        lines.append("%i requests in %.1f seconds" % (rows[-1][1]["count"], self.elapsed))
+        return lines
+
+
+def run_load_test(base_url, course_id, assignment_id, users, workers = 10,
+                  duration = None, n_requests = None, mix = DEADLINE_HOUR_MIX, seed = 0):
+    """
+    Makes requests to the API from several concurrent workers, each of
+    them acting as randomly chosen students (users is a list of
+    (API token, team_id) tuples), with the given mix of operations,
+    until the given duration (in seconds) has elapsed or the given
+    number of requests has been made.
+
+    Submissions only succeed if the assignment's deadline has not
+    passed yet.
+    """
+    assert duration is not None or n_requests is not None
+
+    results = LoadTestResults()
+    base_url = base_url.rstrip("/")
+    total_weight = sum([w for _, w in mix])
+
+    remaining = [n_requests]
+    remaining_lock = threading.Lock()
+
+    def next_request():
+        if n_requests is None:
+            return True
+        with remaining_lock:
+            if remaining[0] <= 0:
+                return False
+            remaining[0] -= 1
+            return True
+
+    def choose_operation(rng):
+        x = rng.uniform(0, total_weight)
+        for operation, weight in mix:
+            x -= weight
+            if x <= 0:
+                return operation
+        return mix[-1][0]
+
+    def make_request(requester, operation, team_id, rng):
+        course_url = "/courses/%s" % course_id
+        if operation == "show-deadline":
+            requester.request("GET", course_url + "/assignments/%s" % assignment_id,
+                              params = {"fields": "name,deadline"})
+        elif operation == "course-detail":
+            requester.request("GET", course_url)
+        elif operation == "team-detail":
+            requester.request("GET", course_url + "/teams/%s" % team_id,
+                              params = {"include": "assignments"})
+        elif operation == "submit":
+            commit_sha = hashlib.sha1("%s-%s" % (team_id, rng.random())).hexdigest()
+            requester.request("POST", course_url + "/teams/%s/assignments/%s/submit" % (team_id, assignment_id),
+                              data = {"commit_sha": commit_sha})
+        else:
+            raise ValueError("Unknown operation: %s" % operation)
+
+    def worker(worker_seed):
+        rng = random.Random(worker_seed)
+        requesters = {}
+        while next_request():
+            if deadline is not None and time.time() >= deadline:
+                break
+            token, team_id = rng.choice(users)
+            requester = requesters.get(token)
+            if requester is None:
+                requester = requesters[token] = Requester(token, None, base_url)
+            operation = choose_operation(rng)
+
+            start = time.time()
+            error = False
+            try:
+                make_request(requester, operation, team_id, rng)
+            except (ChisubmitRequestException, RequestException):
+                error = True
+            results.record(operation, time.time() - start, error)
+
+    start = time.time()
+    deadline = start + duration if duration is not None else None
+    threads = [threading.Thread(target = worker, args = (seed * workers + i,)) for i in range(workers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    results.elapsed = time.time() - start
+
+    return results
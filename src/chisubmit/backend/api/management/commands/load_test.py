@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from chisubmit.backend.api.loadtest import get_load_users, run_load_test
+from chisubmit.backend.api.models import Course
+from chisubmit.common.utils import get_datetime_now_utc
+
+
+class Command(BaseCommand):
+    help = "Replays the requests made by students in the hour before a deadline " \
+           "against a running server (e.g., runserver), and reports their latency"
+
+    def add_arguments(self, parser):
+        parser.add_argument("course_id")
+        parser.add_argument("--url", default="http://localhost:8000/api/v1",
+                            help="Base URL of the API")
+        parser.add_argument("--assignment", default=None,
+                            help="Assignment to submit (default: the first one)")
+        parser.add_argument("--workers", type=int, default=10)
+        parser.add_argument("--duration", type=float, default=30,
+                            help="Duration of the test, in seconds")
+        parser.add_argument("--requests", type=int, default=None,
+                            help="Stop after making this many requests")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        try:
+            course_obj = Course.objects.get(course_id = options["course_id"])
+        except Course.DoesNotExist:
+            raise CommandError("Course %s does not exist" % options["course_id"])
+
+        assignments = course_obj.assignment_set.order_by("assignment_id")
+        if options["assignment"] is not None:
+            assignments = assignments.filter(assignment_id = options["assignment"])
+        assignment = assignments.first()
+        if assignment is None:
+            raise CommandError("No such assignment")
+        if assignment.deadline < get_datetime_now_utc():
+            self.stderr.write("WARNING: The deadline of %s has passed, so submissions will fail" % assignment.assignment_id)
+
+        users = get_load_users(course_obj)
+        if not users:
+            raise CommandError("Course %s has no students in teams" % course_obj.course_id)
+
+        duration = options["duration"] if options["requests"] is None else None
+        results = run_load_test(options["url"], course_obj.course_id, assignment.assignment_id, users,
+                                workers = options["workers"],
+                                duration = duration,
+                                n_requests = options["requests"],
+                                seed = options["seed"])
+
+        for line in results.get_summary():
+            self.stdout.write(line)
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from chisubmit.backend.api.models import Course
+from chisubmit.backend.api.seed import seed_course
+
+
+class Command(BaseCommand):
+    help = "Creates a large synthetic course, for load testing"
+
+    def add_arguments(self, parser):
+        parser.add_argument("course_id")
+        parser.add_argument("--teams", type=int, default=100)
+        parser.add_argument("--students-per-team", type=int, default=2)
+        parser.add_argument("--graders", type=int, default=10)
+        parser.add_argument("--assignments", type=int, default=2)
+        parser.add_argument("--rubric-components", type=int, default=3)
+        parser.add_argument("--open", action="store_true",
+                            help="Make the deadlines in the future, and don't create any submissions")
+        parser.add_argument("--ungraded", action="store_true",
+                            help="Don't create any grades")
+        parser.add_argument("--uniform", action="store_true",
+                            help="Submit everything a day before the deadline, with uniformly distributed grades")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        course_id = options["course_id"]
+        if Course.objects.filter(course_id = course_id).exists():
+            raise CommandError("Course %s already exists" % course_id)
+
+        course = seed_course(course_id, options["teams"],
+                             students_per_team = options["students_per_team"],
+                             n_graders = options["graders"],
+                             n_assignments = options["assignments"],
+                             n_rubric_components = options["rubric_components"],
+                             submitted = not options["open"],
+                             graded = not options["ungraded"],
+                             seed = options["seed"],
+                             realistic = not options["uniform"])
+
+        self.stdout.write("Created course %s: %i students, %i teams, %i graders, %i assignments" %
+                          (course.course_id, course.student_set.count(), course.team_set.count(),
+                           course.grader_set.count(), course.assignment_set.count()))
@@ -0,0 +1,173 @@
+#  Copyright (c) 2013-2014, The University of Chicago
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions are met:
+#
+#  - Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+#  - Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+#  - Neither the name of The University of Chicago nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+#  AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+#  IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+#  ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+#  LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+#  CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+#  SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+#  INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+#  CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+#  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+
+# Per-process request metrics, exposed in the Prometheus text format.
+# We only need histograms (and a few counters), so we don't depend on
+# the prometheus_client package.
+
+import bisect
+import threading
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Default histogram buckets
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERIES_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+def format_value(v):
+    if v == float("inf"):
+        return "+Inf"
+    elif isinstance(v, float):
+        return repr(v)
+    else:
+        return str(v)
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    return "{%s}" % ",".join(['%s="%s"' % (k, v.replace("\\", "\\\\").replace('"', '\\"'))
+                              for k, v in labels])
+
+
+class Histogram(object):
+    """
+    Histogram with one set of cumulative buckets per combination of
+    label values.
+    """
+    
+    def __init__(self, name, description, labels, buckets):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self.values = {}
+        self.lock = threading.Lock()
+        
+    def observe(self, value, *label_values):
+        with self.lock:
+            counts, total = self.values.get(label_values, (None, 0))
+            if counts is None:
+                counts = [0] * (len(self.buckets) + 1)
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.values[label_values] = (counts, total + value)
+            
+    def get(self, *label_values):
+        """
+        Returns the (number of observations, sum) for the given label values
+        """
+        with self.lock:
+            counts, total = self.values.get(label_values, ([0], 0))
+            return sum(counts), total
+            
+    def render(self):
+        lines = ["# HELP %s %s" % (self.name, self.description),
+                 "# TYPE %s histogram" % self.name]
+        with self.lock:
+            for label_values in sorted(self.values):
+                counts, total = self.values[label_values]
+                labels = zip(self.labels, label_values)
+                cumulative = 0
+                for le, count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    lines.append("%s_bucket%s %s" % (self.name, format_labels(labels + [("le", format_value(le))]), cumulative))
+                lines.append("%s_sum%s %s" % (self.name, format_labels(labels), format_value(total)))
+                lines.append("%s_count%s %s" % (self.name, format_labels(labels), cumulative))
+        return lines
+    
+    def reset(self):
+        with self.lock:
+            self.values = {}
+            
+            
+class Counter(object):
+    """
+    Counter whose value is read from a function when rendered
+    """
+    
+    def __init__(self, name, description, get_value):
+        self.name = name
+        self.description = description
+        self.get_value = get_value
+        
+    def render(self):
+        return ["# HELP %s %s" % (self.name, self.description),
+                "# TYPE %s counter" % self.name,
+                "%s %s" % (self.name, format_value(self.get_value()))]
+        
+    def reset(self):
+        pass
+
+
+class Registry(object):
+    
+    def __init__(self):
+        self.metrics = []
+        
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+        
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+    
+    def reset(self):
+        for metric in self.metrics:
+            metric.reset()
+    
+registry = Registry()
+
+REQUEST_LABELS = ("view", "method")
+
+request_duration = registry.register(Histogram("chisubmit_request_duration_seconds",
+                                               "Time to process a request",
+                                               REQUEST_LABELS, TIME_BUCKETS))
+request_queries = registry.register(Histogram("chisubmit_request_db_queries",
+                                              "Number of database queries made by a request",
+                                              REQUEST_LABELS, QUERIES_BUCKETS))
+request_db_duration = registry.register(Histogram("chisubmit_request_db_duration_seconds",
+                                                  "Time spent in database queries by a request",
+                                                  REQUEST_LABELS, TIME_BUCKETS))
+response_size = registry.register(Histogram("chisubmit_response_size_bytes",
+                                            "Size of the response body",
+                                            REQUEST_LABELS, BYTES_BUCKETS))
+
+def register_cache_counters():
+    from chisubmit.backend.api.cache import stats
+    for name, description in (("hits", "Representation cache hits"),
+                              ("misses", "Representation cache misses"),
+                              ("invalidations", "Representation cache invalidations")):
+        registry.register(Counter("chisubmit_representation_cache_%s_total" % name, description,
+                                  lambda name=name: getattr(stats, name)))
+
+register_cache_counters()
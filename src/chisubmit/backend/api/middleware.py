@@ -0,0 +1,118 @@
+#  Copyright (c) 2013-2014, The University of Chicago
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions are met:
+#
+#  - Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+#  - Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+#  - Neither the name of The University of Chicago nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+#  AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+#  IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+#  ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+#  LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+#  CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+#  SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+#  INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+#  CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+#  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+
+import logging
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.utils.deprecation import MiddlewareMixin
+from chisubmit.common.wire import SPARSE_FIELDS_HEADER
+from chisubmit.backend.api import metrics
+
+logger = logging.getLogger("chisubmit.backend.requests")
+
+UNRESOLVED_VIEW = "<unresolved>"
+
+
+class RequestMetricsMiddleware(MiddlewareMixin):
+    """
+    Records the time taken by each request, the number of database
+    queries it made (and the time spent in them), and the size of the
+    response, per view (URL name). Requests that take longer than
+    CHISUBMIT_SLOW_REQUEST_THRESHOLD seconds are logged, along with
+    their SQL queries.
+    
+    To see the queries, we turn on the connection's query log for the
+    duration of the request (unless it was already on).
+    """
+    
+    def process_request(self, request):
+        if not getattr(settings, "CHISUBMIT_METRICS", True):
+            return
+        
+        request._metrics_force_debug_cursor = connection.force_debug_cursor
+        connection.force_debug_cursor = True
+        request._metrics_first_query = len(connection.queries_log)
+        request._metrics_start = time.time()
+    
+    def process_response(self, request, response):
+        if not hasattr(request, "_metrics_start"):
+            return response
+        
+        duration = time.time() - request._metrics_start
+        queries = list(connection.queries_log)[request._metrics_first_query:]
+        db_duration = sum([float(q["time"]) for q in queries])
+        
+        # If we turned on the query log, we also clean up after ourselves
+        connection.force_debug_cursor = request._metrics_force_debug_cursor
+        if not connection.queries_logged:
+            for _ in queries:
+                connection.queries_log.pop()
+        
+        resolver_match = getattr(request, "resolver_match", None)
+        if resolver_match is not None and resolver_match.url_name:
+            view = resolver_match.url_name
+        else:
+            view = UNRESOLVED_VIEW
+        
+        metrics.request_duration.observe(duration, view, request.method)
+        metrics.request_queries.observe(len(queries), view, request.method)
+        metrics.request_db_duration.observe(db_duration, view, request.method)
+        if not response.streaming:
+            metrics.response_size.observe(len(response.content), view, request.method)
+        
+        threshold = getattr(settings, "CHISUBMIT_SLOW_REQUEST_THRESHOLD", None)
+        if threshold is not None and duration > threshold:
+            msg = "Slow request: %s %s (%s) took %.3fs, %i queries (%.3fs)" % (request.method, request.get_full_path(), 
+                                                                             view, duration, len(queries), db_duration)
+            logger.warning(msg)
+            
+            # The queries can be very long (e.g., with IN lists of hundreds
+            # of IDs), so they are only logged at the DEBUG level
+            if logger.isEnabledFor(logging.DEBUG):
+                msg = "Queries of %s %s:" % (request.method, request.get_full_path())
+                for q in queries:
+                    msg += "\n  [%ss] %s" % (q["time"], q["sql"])
+                logger.debug(msg)
+        
+        return response
+
+class SparseFieldsetsMiddleware(MiddlewareMixin):
+    """
+    Tells clients that the objects in a response only have some of their 
+    fields (because only those fields were requested with the "fields" query 
+    parameter), so they know to fetch the rest of the fields if needed.
+    """
+    
+    def process_response(self, request, response):
+        fields = request.GET.get("fields")
+        if fields and request.method == "GET" and response.status_code == 200:
+            response[SPARSE_FIELDS_HEADER] = fields
+        return response
@@ -0,0 +1,177 @@
+from datetime import timedelta
+import hashlib
+import random
+
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from chisubmit.backend.api.models import Course, Instructor, Grader, Student,\
+    Assignment, RubricComponent, Team, TeamMember, Registration, Submission,\
+    Grade
+from chisubmit.common.utils import get_datetime_now_utc
+
+
+# Parameters of the "realistic" courses
+SUBMIT_RATE = 0.9
+LATE_RATE = 0.1
+MAX_EXTENSIONS = 2
+SUBMISSION_MEAN_HOURS_BEFORE_DEADLINE = 6
+PARTIALLY_GRADED_RATE = 0.2
+GRADE_MEAN = 0.8
+GRADE_STDDEV = 0.15
+
+
+def _get_submitted_at(rng, deadline, extensions_used):
+    if extensions_used == 0:
+        # Most teams submit in the last few hours before the deadline
+        return deadline - timedelta(hours = rng.expovariate(1.0 / SUBMISSION_MEAN_HOURS_BEFORE_DEADLINE))
+    else:
+        return deadline + timedelta(days = extensions_used - rng.random())
+
+
+def _get_extensions_used(rng, team_pk, extensions_left):
+    if extensions_left[team_pk] > 0 and rng.random() < LATE_RATE:
+        extensions_used = rng.randint(1, extensions_left[team_pk])
+        extensions_left[team_pk] -= extensions_used
+        return extensions_used
+    else:
+        return 0
+
+
+def _get_points(rng, points):
+    # Normally distributed around GRADE_MEAN, rounded to half points
+    p = rng.gauss(GRADE_MEAN * float(points), GRADE_STDDEV * float(points))
+    return min(max(round(p * 2) / 2, 0), float(points))
+
+
+def _get_users(usernames):
+    existing = set(User.objects.filter(username__in = usernames).values_list("username", flat=True))
+    User.objects.bulk_create([User(username = u, first_name = u.capitalize(), last_name = "Doe",
+                                   email = "%s@example.org" % u)
+                              for u in usernames if u not in existing])
+    users = dict([(u.username, u) for u in User.objects.filter(username__in = usernames)])
+    return [users[u] for u in usernames]
+
+
+@transaction.atomic
+def seed_course(course_id, n_teams, students_per_team = 2, n_graders = 10,
+                n_assignments = 2, n_rubric_components = 3, submitted = True,
+                graded = True, seed = 0, realistic = False):
+    """
+    Creates a course with n_teams teams (of students_per_team students
+    each), n_graders graders, and n_assignments assignments, all of them
+    with a registration for every team. If submitted is true, every
+    registration gets a final submission (with a past deadline) and, if
+    graded is also true, a grade for every rubric component.
+
+    If realistic is true, the submissions and grades look more like
+    those of an actual course: some teams don't submit, most teams
+    submit in the last few hours before the deadline (and some use
+    extensions to submit after it), some submissions are only partially
+    graded, and grades are normally distributed around 80% of the points.
+    Otherwise, every submission is made a day before the deadline, and
+    grades are uniformly distributed.
+
+    Intended to create large courses for load and payload size tests, so
+    everything is created with bulk inserts. The same seed always produces
+    the same course.
+    """
+    rng = random.Random(seed)
+
+    course = Course.objects.create(course_id = course_id, name = "Seeded course %s" % course_id)
+    if realistic:
+        course.default_extensions = MAX_EXTENSIONS
+        course.save()
+
+    prefix = course_id.replace("-", "_")
+
+    instructor_user, = _get_users(["%s_instructor" % prefix])
+    Instructor.objects.create(course = course, user = instructor_user, git_username = instructor_user.username)
+
+    grader_users = _get_users(["%s_grader%i" % (prefix, i+1) for i in range(n_graders)])
+    Grader.objects.bulk_create([Grader(course = course, user = u, git_username = u.username,
+                                       git_staging_username = u.username)
+                                for u in grader_users])
+    graders = list(Grader.objects.filter(course = course).order_by("pk"))
+
+    n_students = n_teams * students_per_team
+    student_users = _get_users(["%s_student%i" % (prefix, i+1) for i in range(n_students)])
+    Student.objects.bulk_create([Student(course = course, user = u, git_username = u.username,
+                                         extensions = course.default_extensions)
+                                 for u in student_users])
+    students = list(Student.objects.filter(course = course).order_by("pk"))
+
+    Team.objects.bulk_create([Team(course = course, team_id = "team%i" % (i+1),
+                                   extensions = course.default_extensions)
+                              for i in range(n_teams)])
+    teams = list(Team.objects.filter(course = course).order_by("pk"))
+
+    TeamMember.objects.bulk_create([TeamMember(team = team, student = students[i * students_per_team + j], confirmed = True)
+                                    for i, team in enumerate(teams)
+                                    for j in range(students_per_team)])
+
+    # Extensions each team has left (for realistic submissions)
+    extensions_left = dict([(team.pk, MAX_EXTENSIONS) for team in teams])
+
+    now = get_datetime_now_utc()
+    if submitted:
+        deadline = now - timedelta(days=7)
+    else:
+        deadline = now + timedelta(days=7)
+
+    for a in range(n_assignments):
+        assignment = Assignment.objects.create(course = course,
+                                               assignment_id = "pa%i" % (a+1),
+                                               name = "Programming Assignment %i" % (a+1),
+                                               deadline = deadline,
+                                               min_students = students_per_team,
+                                               max_students = students_per_team)
+        RubricComponent.objects.bulk_create([RubricComponent(assignment = assignment, order = i+1,
+                                                             description = "Task %i" % (i+1),
+                                                             points = 100 / n_rubric_components)
+                                             for i in range(n_rubric_components)])
+        rubric_components = list(assignment.rubriccomponent_set.order_by("order"))
+
+        Registration.objects.bulk_create([Registration(team = team, assignment = assignment,
+                                                       grader = graders[i % len(graders)] if graders else None)
+                                          for i, team in enumerate(teams)])
+
+        if not submitted:
+            continue
+
+        registrations = list(Registration.objects.filter(assignment = assignment).order_by("pk"))
+        if realistic:
+            registrations = [r for r in registrations if rng.random() < SUBMIT_RATE]
+
+        Submission.objects.bulk_create([Submission(registration = r, extensions_used = 0,
+                                                   commit_sha = hashlib.sha1("%s-%i-%i" % (course_id, a, r.pk)).hexdigest())
+                                        for r in registrations])
+        # submitted_at is set automatically on creation
+        Submission.objects.filter(registration__assignment = assignment).update(submitted_at = deadline - timedelta(days=1))
+        submissions = dict(Submission.objects.filter(registration__assignment = assignment)
+                                             .values_list("registration_id", "pk"))
+        for r in registrations:
+            r.final_submission_id = submissions[r.pk]
+            r.save(update_fields = ["final_submission"])
+            if realistic:
+                extensions_used = _get_extensions_used(rng, r.team_id, extensions_left)
+                submitted_at = _get_submitted_at(rng, deadline, extensions_used)
+                Submission.objects.filter(pk = r.final_submission_id).update(submitted_at = submitted_at,
+                                                                             extensions_used = extensions_used)
+
+        if graded and realistic:
+            grades = []
+            for r in registrations:
+                graded_components = rubric_components
+                if rng.random() < PARTIALLY_GRADED_RATE:
+                    graded_components = rubric_components[:rng.randint(0, len(rubric_components) - 1)]
+                grades += [Grade(registration = r, rubric_component = rc, points = _get_points(rng, rc.points))
+                           for rc in graded_components]
+            Grade.objects.bulk_create(grades)
+        elif graded:
+            Grade.objects.bulk_create([Grade(registration = r, rubric_component = rc,
+                                             points = rng.randint(0, int(rc.points)))
+                                       for r in registrations
+                                       for rc in rubric_components])
+
+    return course
@@ -10,8 +10,129 @@ from django.core.exceptions import ObjectDoesNotExist
 from django.utils.encoding import smart_text
 from django.utils.translation import ugettext_lazy
 
+# How the URLs of objects (and of their related objects) are included
+# in a representation. Clients can pick one with the "urls" query parameter
+URLS_ABSOLUTE = "absolute"
+URLS_RELATIVE = "relative"
+URLS_NONE = "none"
+
+URLS_MODES = (URLS_ABSOLUTE, URLS_RELATIVE, URLS_NONE)
+
+def get_urls_mode(request):
+    if request is None:
+        return URLS_ABSOLUTE
+    
+    mode = request.query_params.get("urls", URLS_ABSOLUTE)
+    if mode not in URLS_MODES:
+        return URLS_ABSOLUTE
+    else:
+        return mode
+
+def is_url_field(field_name):
+    return field_name == "url" or field_name.endswith("_url")
+
+def parse_fields(fields):
+    """
+    Parses the value of the "fields" query parameter (a comma-separated
+    list of fields, where the fields of nested or included objects are
+    specified with a dotted path) into a tree of dictionaries. For example,
+    "team_id,assignments.grader_username,assignments.grades" becomes:
+    
+        {"team_id": {}, "assignments": {"grader_username": {}, "grades": {}}}
+        
+    An empty dictionary means all the fields of that object.
+    """
+    tree = {}
+    for f in fields.split(","):
+        f = f.strip()
+        if f:
+            node = tree
+            for name in f.split("."):
+                node = node.setdefault(name, {})
+    return tree
+
+def get_requested_fields(context):
+    """
+    Returns the tree of fields (see parse_fields) requested for the
+    objects serialized with the given serializer context, or None if
+    all the fields were requested.
+    """
+    if "fields" not in context:
+        request = context.get("request", None)
+        if request is not None and request.query_params.get("fields"):
+            context["fields"] = parse_fields(request.query_params["fields"])
+        else:
+            context["fields"] = None
+    return context["fields"]
+
+def get_include_context(context, name):
+    """
+    Returns the serializer context for objects that a view includes 
+    (with ?include=) under the given name in the representation of
+    the objects serialized with the given serializer context.
+    """
+    fields = get_requested_fields(context)
+    
+    include_context = dict(context)
+    if fields is None or not fields.get(name):
+        include_context["fields"] = None
+    else:
+        include_context["fields"] = fields[name]
+    return include_context
+
 class ChisubmitSerializer(serializers.Serializer):
     
+    @property
+    def urls_mode(self):
+        if not hasattr(self, "_urls_mode"):
+            # Nested serializers share the context with their parent, 
+            # so we only look at the query parameters once per request
+            if "urls_mode" not in self.context:
+                self.context["urls_mode"] = get_urls_mode(self.context.get("request", None))
+            self._urls_mode = self.context["urls_mode"]
+        return self._urls_mode
+    
+    @property
+    def requested_fields(self):
+        if not hasattr(self, "_requested_fields"):
+            # Nested serializers (including the children of list serializers
+            # nested in another serializer) get their fields from the
+            # fields requested for their parent
+            parent = self.parent
+            field_name = getattr(self, "field_name", None)
+            if isinstance(parent, serializers.ListSerializer):
+                field_name = getattr(parent, "field_name", None)
+                parent = parent.parent
+            
+            if parent is None:
+                self._requested_fields = get_requested_fields(self.context)
+            elif isinstance(parent, ChisubmitSerializer) and parent.requested_fields is not None:
+                self._requested_fields = parent.requested_fields.get(field_name) or None
+            else:
+                self._requested_fields = None
+        return self._requested_fields
+    
+    @property
+    def _readable_fields(self):
+        fields = super(ChisubmitSerializer, self)._readable_fields
+        
+        if self.urls_mode == URLS_NONE:
+            fields = [f for f in fields if not is_url_field(f.field_name)]
+            
+        # The object's URL is always included, so clients can
+        # identify the object (and fetch the rest of its fields)
+        requested_fields = self.requested_fields
+        if requested_fields is not None:
+            fields = [f for f in fields if f.field_name in requested_fields or f.field_name == "url"]
+            
+        return fields
+    
+    def reverse_url(self, viewname, args):
+        if self.urls_mode == URLS_RELATIVE:
+            return reverse(viewname, args=args)
+        else:
+            return reverse(viewname, args=args, request=self.context["request"])
+    
     def to_representation(self, obj):
         # TODO: Avoid generating the representation for fields that
         # aren't going to be returned anyways
@@ -86,6 +207,35 @@ class UserSerializer(serializers.Serializer):
         return instance      
     
 
+class RosterEntrySerializer(serializers.Serializer):
+    USER_TYPES = ("student", "instructor", "grader")
+    
+    username = serializers.CharField(max_length=30)
+    first_name = serializers.CharField(max_length=30)
+    last_name = serializers.CharField(max_length=30)
+    email = serializers.EmailField(allow_blank=True) 
+    user_type = serializers.ChoiceField(choices=USER_TYPES)
+
+class RosterSyncRequestSerializer(serializers.Serializer):
+    # Each entry is validated (with RosterEntrySerializer) separately, 
+    # so an invalid entry doesn't reject the whole roster
+    users = serializers.ListField(child = serializers.DictField())
+    drop_missing = serializers.BooleanField(default=False)
+    update_users = serializers.BooleanField(default=False)
+    dry_run = serializers.BooleanField(default=False)
+
+class RosterSyncResponseSerializer(serializers.Serializer):
+    dry_run = serializers.BooleanField()
+    users_created = serializers.ListField(child = serializers.CharField())
+    users_updated = serializers.ListField(child = serializers.CharField())
+    students_added = serializers.ListField(child = serializers.CharField())
+    students_undropped = serializers.ListField(child = serializers.CharField())
+    students_dropped = serializers.ListField(child = serializers.CharField())
+    instructors_added = serializers.ListField(child = serializers.CharField())
+    graders_added = serializers.ListField(child = serializers.CharField())
+    invalid_users = serializers.DictField(child = serializers.ListField(child = serializers.CharField()))
+
+
 class CourseSerializer(ChisubmitSerializer):
     course_id = serializers.SlugField()
     name = serializers.CharField(max_length=64)
@@ -123,22 +273,22 @@ class CourseSerializer(ChisubmitSerializer):
                       }
 
     def get_url(self, obj):
-        return reverse('course-detail', args=[obj.course_id], request=self.context["request"])
+        return self.reverse_url('course-detail', [obj.course_id])
 
     def get_instructors_url(self, obj):
-        return reverse('instructor-list', args=[obj.course_id], request=self.context["request"])    
+        return self.reverse_url('instructor-list', [obj.course_id])    
 
     def get_graders_url(self, obj):
-        return reverse('grader-list', args=[obj.course_id], request=self.context["request"])    
+        return self.reverse_url('grader-list', [obj.course_id])    
     
     def get_students_url(self, obj):
-        return reverse('student-list', args=[obj.course_id], request=self.context["request"])    
+        return self.reverse_url('student-list', [obj.course_id])    
     
     def get_assignments_url(self, obj):
-        return reverse('assignment-list', args=[obj.course_id], request=self.context["request"])      
+        return self.reverse_url('assignment-list', [obj.course_id])      
 
     def get_teams_url(self, obj):
-        return reverse('team-list', args=[obj.course_id], request=self.context["request"])      
+        return self.reverse_url('team-list', [obj.course_id])      
     
     def create(self, validated_data):
         return Course.objects.create(**validated_data)
@@ -176,7 +326,7 @@ class InstructorSerializer(ChisubmitSerializer):
                       "git_staging_username": ReadWrite }
     
     def get_url(self, obj):
-        return reverse('instructor-detail', args=[self.context["course"].course_id, obj.user.username], request=self.context["request"])
+        return self.reverse_url('instructor-detail', [self.context["course"].course_id, obj.user.username])
     
     def create(self, validated_data):
         return Instructor.objects.create(**validated_data)
@@ -208,7 +358,7 @@ class GraderSerializer(ChisubmitSerializer):
                       "git_staging_username": ReadWrite }    
     
     def get_url(self, obj):
-        return reverse('grader-detail', args=[self.context["course"].course_id, obj.user.username], request=self.context["request"])
+        return self.reverse_url('grader-detail', [self.context["course"].course_id, obj.user.username])
     
     def create(self, validated_data):
         return Grader.objects.create(**validated_data)
@@ -243,7 +393,7 @@ class StudentSerializer(ChisubmitSerializer):
     owner_override = { "git_username": ReadWrite }
         
     def get_url(self, obj):
-        return reverse('student-detail', args=[self.context["course"].course_id, obj.user.username], request=self.context["request"])
+        return self.reverse_url('student-detail', [self.context["course"].course_id, obj.user.username])
     
     def create(self, validated_data):
         if not validated_data.has_key("extensions") and self.context["course"].extension_policy == "per-student":
@@ -282,10 +432,10 @@ class AssignmentSerializer(ChisubmitSerializer):
                       }       
     
     def get_url(self, obj):
-        return reverse('assignment-detail', args=[self.context["course"].course_id, obj.assignment_id], request=self.context["request"])
+        return self.reverse_url('assignment-detail', [self.context["course"].course_id, obj.assignment_id])
 
     def get_rubric_url(self, obj):
-        return reverse('rubric-list', args=[self.context["course"].course_id, obj.assignment_id], request=self.context["request"])
+        return self.reverse_url('rubric-list', [self.context["course"].course_id, obj.assignment_id])
     
     def create(self, validated_data):
         return Assignment.objects.create(**validated_data)
@@ -315,7 +465,7 @@ class RubricComponentSerializer(ChisubmitSerializer):
                       }       
     
     def get_url(self, obj):
-        return reverse('rubric-detail', args=[self.context["course"].course_id, obj.assignment.assignment_id, obj.pk], request=self.context["request"])
+        return self.reverse_url('rubric-detail', [self.context["course"].course_id, obj.assignment.assignment_id, obj.pk])
     
     def create(self, validated_data):
         return RubricComponent.objects.create(**validated_data)
@@ -343,13 +493,13 @@ class TeamSerializer(ChisubmitSerializer):
                       }       
     
     def get_url(self, obj):
-        return reverse('team-detail', args=[self.context["course"].course_id, obj.team_id], request=self.context["request"])
+        return self.reverse_url('team-detail', [self.context["course"].course_id, obj.team_id])
 
     def get_students_url(self, obj):
-        return reverse('teammember-list', args=[self.context["course"].course_id, obj.team_id], request=self.context["request"])
+        return self.reverse_url('teammember-list', [self.context["course"].course_id, obj.team_id])
 
     def get_assignments_url(self, obj):
-        return reverse('registration-list', args=[self.context["course"].course_id, obj.team_id], request=self.context["request"])
+        return self.reverse_url('registration-list', [self.context["course"].course_id, obj.team_id])
     
     def create(self, validated_data):
         return Team.objects.create(**validated_data)
@@ -357,10 +507,37 @@ class TeamSerializer(ChisubmitSerializer):
     def update(self, instance, validated_data):
         instance.team_id = validated_data.get('team_id', instance.team_id)
         instance.extensions = validated_data.get('extensions', instance.extensions)
-        instance.active = validated_data.get('active', instance.min_students)
+        instance.active = validated_data.get('active', instance.active)
         instance.save()
         return instance         
     
+class TeamImportEntrySerializer(serializers.Serializer):
+    team_id = serializers.SlugField(max_length=128)
+    students = serializers.ListField(child = serializers.CharField())
+    assignments = serializers.ListField(child = serializers.SlugField(), required = False)
+    extensions = serializers.IntegerField(required = False, min_value=0)
+
+class TeamImportRequestSerializer(serializers.Serializer):
+    teams = TeamImportEntrySerializer(many=True)
+    dry_run = serializers.BooleanField(default=False)
+
+class TeamImportResponseSerializer(serializers.Serializer):
+    dry_run = serializers.BooleanField()
+    teams_created = serializers.ListField(child = serializers.CharField())
+    teams_updated = serializers.ListField(child = serializers.CharField())
+    teams_unchanged = serializers.ListField(child = serializers.CharField())
+    conflicts = serializers.DictField(child = serializers.ListField(child = serializers.CharField()))
+
+class BatchOperationSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(choices = ["PATCH"])
+    url = serializers.CharField()
+    data = serializers.DictField()
+
+class BatchResponseSerializer(serializers.Serializer):
+    url = serializers.CharField()
+    status = serializers.IntegerField()
+    data = serializers.DictField()
+
 class PersonRelatedField(RelatedField):
     default_error_messages = {
         'does_not_exist': ugettext_lazy('Object with username={value} does not exist.'),
@@ -400,7 +577,7 @@ class TeamMemberSerializer(ChisubmitSerializer):
         super(TeamMemberSerializer, self).__init__(*args, **kwargs)
 
     def get_url(self, obj):
-        return reverse('teammember-detail', args=[self.context["course"].course_id, obj.team.team_id, obj.student.user.username], request=self.context["request"])
+        return self.reverse_url('teammember-detail', [self.context["course"].course_id, obj.team.team_id, obj.student.user.username])
     
     def create(self, validated_data):
         return TeamMember.objects.create(**validated_data)
@@ -429,7 +606,7 @@ class SubmissionSerializer(ChisubmitSerializer):
             # been saved, and thus doesn't have a primary key (or an endpoint)
             return None
         else:
-            return reverse('submission-detail', args=[self.context["course"].course_id, obj.registration.team.team_id, obj.registration.assignment.assignment_id, obj.pk], request=self.context["request"])
+            return self.reverse_url('submission-detail', [self.context["course"].course_id, obj.registration.team.team_id, obj.registration.assignment.assignment_id, obj.pk])
     
     def create(self, validated_data):
         return Submission.objects.create(**validated_data)
@@ -485,13 +662,13 @@ class RegistrationSerializer(ChisubmitSerializer):
         super(RegistrationSerializer, self).__init__(*args, **kwargs)
 
     def get_url(self, obj):
-        return reverse('registration-detail', args=[self.context["course"].course_id, obj.team.team_id, obj.assignment.assignment_id], request=self.context["request"])
+        return self.reverse_url('registration-detail', [self.context["course"].course_id, obj.team.team_id, obj.assignment.assignment_id])
 
     def get_submissions_url(self, obj):
-        return reverse('submission-list', args=[self.context["course"].course_id, obj.team.team_id, obj.assignment.assignment_id], request=self.context["request"])
+        return self.reverse_url('submission-list', [self.context["course"].course_id, obj.team.team_id, obj.assignment.assignment_id])
 
     def get_grades_url(self, obj):
-        return reverse('grade-list', args=[self.context["course"].course_id, obj.team.team_id, obj.assignment.assignment_id], request=self.context["request"])
+        return self.reverse_url('grade-list', [self.context["course"].course_id, obj.team.team_id, obj.assignment.assignment_id])
     
     def create(self, validated_data):
         return Registration.objects.create(**validated_data)
@@ -509,6 +686,17 @@ class RegistrationRequestSerializer(serializers.Serializer):
                                       child = serializers.CharField()
                                       )
     
+class RegistrationUpdateRequestSerializer(serializers.Serializer):
+    team_id = serializers.CharField()
+    grader_username = serializers.CharField(required = False, allow_null = True)
+    final_submission_id = serializers.IntegerField(required = False, allow_null = True)
+    grade_adjustments = serializers.DictField(required = False,
+                                              child = serializers.DecimalField(max_digits=5, decimal_places=2))
+
+class RegistrationUpdateResponseSerializer(serializers.Serializer):
+    team_id = serializers.CharField()
+    updated = serializers.BooleanField()
+
 class RegistrationResponseSerializer(serializers.Serializer):
     new_team = serializers.BooleanField()
     team = TeamSerializer()
@@ -542,7 +730,7 @@ class GradeSerializer(ChisubmitSerializer):
     readonly_fields = { "points": GradersAndStudents }       
     
     def get_url(self, obj):
-        return reverse('grade-detail', args=[self.context["course"].course_id, obj.registration.team.team_id, obj.registration.assignment.assignment_id, obj.pk], request=self.context["request"])
+        return self.reverse_url('grade-detail', [self.context["course"].course_id, obj.registration.team.team_id, obj.registration.assignment.assignment_id, obj.pk])
         
     def create(self, validated_data):
         return Grade.objects.create(**validated_data)
@@ -0,0 +1,116 @@
+import math
+import json
+from django.db.models import Count, Avg, Min, Max, Sum, F, FloatField
+from chisubmit.backend.api.models import Registration, Grade
+from chisubmit.common.utils import is_submission_ready_for_grading,\
+    compute_grade_stats, get_grading_status, GRADING_STATUSES, GRADING_STATUS_GRADED
+
+
+def get_histogram(values, max_value, bins):
+    """
+    Histogram of values in [0, max_value], split into equal-width bins.
+    Values outside that range (e.g., because of penalties or bonuses) are
+    counted in the first or last bin.
+    """
+    width = float(max_value) / bins if max_value > 0 else 1.0
+    counts = [0] * bins
+    for v in values:
+        i = int(v / width)
+        counts[min(max(i, 0), bins - 1)] += 1
+
+    edges = [width * i for i in range(bins + 1)]
+
+    return {"bins": edges, "counts": counts}
+
+
+def get_assignment_stats(assignment_obj, histogram_bins = 10):
+    """
+    Grading statistics for an assignment: how many registrations are in
+    each grading status, summary statistics of the total grades (overall
+    and per grader), per rubric component statistics, and a histogram of
+    the total grades.
+
+    Uses a fixed number of queries regardless of the number of teams.
+    """
+    rubric_components = list(assignment_obj.rubriccomponent_set.all())
+    n_rubric_components = len(rubric_components)
+    max_points = sum([float(rc.points) for rc in rubric_components])
+
+    registrations = Registration.objects.filter(assignment = assignment_obj)\
+                                        .annotate(n_grades = Count("grade"),
+                                                  points = Sum("grade__points"))\
+                                        .values_list("grader__user__username",
+                                                     "final_submission__submitted_at",
+                                                     "final_submission__extensions_used",
+                                                     "grade_adjustments",
+                                                     "n_grades",
+                                                     "points")
+
+    status_counts = dict([(s, 0) for s in GRADING_STATUSES])
+    grader_status_counts = {}
+    totals = []
+    grader_totals = {}
+    for grader, submitted_at, extensions_used, grade_adjustments, n_grades, points in registrations:
+        submitted = submitted_at is not None
+        ready = submitted and is_submission_ready_for_grading(assignment_deadline=assignment_obj.deadline,
+                                                              submission_date=submitted_at,
+                                                              extensions_used=extensions_used,
+                                                              assignment_grace_period=assignment_obj.grace_period)
+        status = get_grading_status(submitted, ready, n_grades, n_rubric_components)
+
+        status_counts[status] += 1
+        grader_counts = grader_status_counts.setdefault(grader, dict([(s, 0) for s in GRADING_STATUSES]))
+        grader_counts[status] += 1
+
+        if status == GRADING_STATUS_GRADED:
+            total = float(points or 0)
+            # values_list bypasses the JSONField, so we get the raw JSON
+            if isinstance(grade_adjustments, basestring):
+                grade_adjustments = json.loads(grade_adjustments) if grade_adjustments else None
+            if grade_adjustments:
+                total += sum([float(v) for v in grade_adjustments.values()])
+            totals.append(total)
+            grader_totals.setdefault(grader, []).append(total)
+
+    rc_aggregates = Grade.objects.filter(registration__assignment = assignment_obj)\
+                                 .values("rubric_component")\
+                                 .annotate(count = Count("id"),
+                                           average = Avg("points"),
+                                           average_sq = Avg(F("points") * F("points"), output_field=FloatField()),
+                                           min = Min("points"),
+                                           max = Max("points"))
+    rc_aggregates = dict([(a["rubric_component"], a) for a in rc_aggregates])
+
+    rc_stats = []
+    for rc in rubric_components:
+        a = rc_aggregates.get(rc.pk)
+        stats = {"rubric_component_id": rc.pk,
+                 "description": rc.description,
+                 "points": float(rc.points)}
+        if a is None:
+            stats.update({"count": 0, "average": None, "stddev": None, "min": None, "max": None})
+        else:
+            average = float(a["average"])
+            variance = max(0.0, float(a["average_sq"]) - average ** 2)
+            stats.update({"count": a["count"],
+                          "average": average,
+                          "stddev": math.sqrt(variance),
+                          "min": float(a["min"]),
+                          "max": float(a["max"])})
+        rc_stats.append(stats)
+
+    graders_stats = []
+    for grader in sorted(grader_status_counts, key = lambda g: (g is None, g)):
+        graders_stats.append({"grader_username": grader,
+                              "registrations": grader_status_counts[grader],
+                              "total": compute_grade_stats(grader_totals.get(grader, []))})
+
+    status_counts["total"] = sum(status_counts.values())
+
+    return {"assignment_id": assignment_obj.assignment_id,
+            "points_possible": max_points,
+            "registrations": status_counts,
+            "total": compute_grade_stats(totals),
+            "histogram": get_histogram(totals, max_points, histogram_bins),
+            "rubric_components": rc_stats,
+            "graders": graders_stats}
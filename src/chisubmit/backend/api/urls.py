@@ -8,6 +8,8 @@ urlpatterns = [
     url(URL_PREFIX + r'courses/$', views.CourseList.as_view(), name="course-list"),
     url(URL_PREFIX + r'courses/(?P<course_id>[a-zA-Z0-9_-]+)/$', views.CourseDetail.as_view(), name="course-detail"),
 
+    url(URL_PREFIX + r'courses/(?P<course_id>[a-zA-Z0-9_-]+)/roster:sync$', views.RosterSync.as_view(), name="roster-sync"),
+
     url(URL_PREFIX + r'courses/(?P<course_id>[a-zA-Z0-9_-]+)/instructors/$', views.InstructorList.as_view(), name="instructor-list"),
     url(URL_PREFIX + r'courses/(?P<course_id>[a-zA-Z0-9_-]+)/instructors/(?P<username>[a-zA-Z0-9_-]+)$', views.InstructorDetail.as_view(), name="instructor-detail"),
 
@@ -20,12 +22,17 @@ urlpatterns = [
     url(URL_PREFIX + r'courses/(?P<course_id>[a-zA-Z0-9_-]+)/assignments/$', views.AssignmentList.as_view(), name="assignment-list"),
     url(URL_PREFIX + r'courses/(?P<course_id>[a-zA-Z0-9_-]+)/assignments/(?P<assignment_id>[a-zA-Z0-9_-]+)$', views.AssignmentDetail.as_view(), name="assignment-detail"),
 
+    url(URL_PREFIX + r'courses/(?P<course_id>[a-zA-Z0-9_-]+)/assignments/(?P<assignment_id>[a-zA-Z0-9_-]+)/stats$', views.AssignmentStats.as_view(), name="assignment-stats"),
+
     url(URL_PREFIX + r'courses/(?P<course_id>[a-zA-Z0-9_-]+)/assignments/(?P<assignment_id>[a-zA-Z0-9_-]+)/rubric/$', views.RubricList.as_view(), name="rubric-list"),
     url(URL_PREFIX + r'courses/(?P<course_id>[a-zA-Z0-9_-]+)/assignments/(?P<assignment_id>[a-zA-Z0-9_-]+)/rubric/(?P<rubric_component_id>[0-9]+)$', views.RubricDetail.as_view(), name="rubric-detail"),
 
+    url(URL_PREFIX + r'courses/(?P<course_id>[a-zA-Z0-9_-]+)/assignments/(?P<assignment_id>[a-zA-Z0-9_-]+)/registrations/$', views.AssignmentRegistrations.as_view(), name="assignment-registrations"),
+
     url(URL_PREFIX + r'courses/(?P<course_id>[a-zA-Z0-9_-]+)/assignments/(?P<assignment_id>[a-zA-Z0-9_-]+)/register', views.Register.as_view(), name="register"),
 
     url(URL_PREFIX + r'courses/(?P<course_id>[a-zA-Z0-9_-]+)/teams/$', views.TeamList.as_view(), name="team-list"),
+    url(URL_PREFIX + r'courses/(?P<course_id>[a-zA-Z0-9_-]+)/teams:import$', views.TeamImport.as_view(), name="team-import"),
     url(URL_PREFIX + r'courses/(?P<course_id>[a-zA-Z0-9_-]+)/teams/(?P<team_id>[a-zA-Z0-9_-]+)$', views.TeamDetail.as_view(), name="team-detail"),
 
     url(URL_PREFIX + r'courses/(?P<course_id>[a-zA-Z0-9_-]+)/teams/(?P<team_id>[a-zA-Z0-9_-]+)/students/$', views.TeamMemberList.as_view(), name="teammember-list"),
@@ -42,6 +49,10 @@ urlpatterns = [
     url(URL_PREFIX + r'courses/(?P<course_id>[a-zA-Z0-9_-]+)/teams/(?P<team_id>[a-zA-Z0-9_-]+)/assignments/(?P<assignment_id>[a-zA-Z0-9_-]+)/grades/$', views.GradeList.as_view(), name="grade-list"),
     url(URL_PREFIX + r'courses/(?P<course_id>[a-zA-Z0-9_-]+)/teams/(?P<team_id>[a-zA-Z0-9_-]+)/assignments/(?P<assignment_id>[a-zA-Z0-9_-]+)/grades/(?P<grade_id>[0-9]+)$', views.GradeDetail.as_view(), name="grade-detail"),
 
+    url(URL_PREFIX + r'batch$', views.Batch.as_view(), name="batch"),
+    url(URL_PREFIX + r'cache/stats$', views.CacheStats.as_view(), name="cache-stats"),
+    url(URL_PREFIX + r'metrics$', views.Metrics.as_view(), name="metrics"),
+
     url(URL_PREFIX + r'users/$', views.UserList.as_view(), name="user-list"),
     url(URL_PREFIX + r'users/(?P<username>[a-zA-Z0-9_-]+)/$', views.UserDetail.as_view(), name="user-detail"),
     url(URL_PREFIX + r'users/(?P<username>[a-zA-Z0-9_-]+)/token/$', views.UserToken.as_view(), name="user-token"),
@@ -1,4 +1,4 @@
-from django.http import Http404
+from django.http import Http404, HttpResponse
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
@@ -10,14 +10,30 @@ from chisubmit.backend.api.serializers import CourseSerializer,\
     AssignmentSerializer, TeamSerializer, UserSerializer,\
     RubricComponentSerializer, RegistrationRequestSerializer, RegistrationSerializer, TeamMemberSerializer,\
     RegistrationResponseSerializer, SubmissionSerializer,\
+    RegistrationUpdateRequestSerializer, RegistrationUpdateResponseSerializer,\
+    RosterSyncRequestSerializer, RosterSyncResponseSerializer, RosterEntrySerializer,\
+    TeamImportRequestSerializer, TeamImportResponseSerializer,\
+    BatchOperationSerializer, BatchResponseSerializer, get_include_context,\
     SubmissionRequestSerializer, SubmissionResponseSerializer, GradeSerializer
 from rest_framework.exceptions import PermissionDenied
 from django.contrib.auth.models import User
-from django.db import Error
-from rest_framework.authentication import BasicAuthentication,\
-    TokenAuthentication
+from django.db import Error, transaction
+from django.db.models import Prefetch
+from django.core.handlers.wsgi import WSGIRequest
+from django.core.urlresolvers import resolve, Resolver404
+from urlparse import urlparse
+from io import BytesIO
+import json
+from rest_framework.authentication import BasicAuthentication
+from rest_framework.utils.encoders import JSONEncoder
+from chisubmit.backend.api.authentication import CachingTokenAuthentication,\
+    invalidate_token, invalidate_user_tokens
+from chisubmit.backend.api.cache import get_cached_representation,\
+    stats as representation_cache_stats
 from rest_framework.authtoken.models import Token
 from chisubmit.common.utils import get_datetime_now_utc
+from chisubmit.backend.api.stats import get_assignment_stats
+from chisubmit.backend.api import metrics
 from chisubmit.backend.api.helpers import get_course_person, get_assignment,\
     get_team, get_course, get_rubric_component, get_team_member,\
     get_registration, get_submission, get_grade
@@ -58,9 +74,11 @@ class CourseDetail(APIView):
         course_obj, roles = get_course(request, course_id)
         serializer_context = {'request': request, 'course': course_obj, 'roles': roles}
         
-        serializer = CourseSerializer(course_obj, context=serializer_context)
+        def build():
+            serializer = CourseSerializer(course_obj, context=serializer_context)
+            return serializer.data
         
-        return Response(serializer.data)
+        return Response(get_cached_representation(request, course_obj, roles, "course", build))
 
     def patch(self, request, course_id, format=None):
         course_obj, roles = get_course(request, course_id)
@@ -87,6 +105,128 @@ class CourseDetail(APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
                 
  
+class RosterSync(APIView):
+    
+    def post(self, request, course_id, format=None):
+        course_obj, roles = get_course(request, course_id)
+        
+        if not CourseRoles.ADMIN in roles:
+            raise PermissionDenied
+        
+        serializer = RosterSyncRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        drop_missing = serializer.validated_data["drop_missing"]
+        update_users = serializer.validated_data["update_users"]
+        dry_run = serializer.validated_data["dry_run"]
+        
+        # Invalid entries are skipped (and reported), keyed by their 
+        # position in the roster ("row 1" is the first entry)
+        entries = []
+        invalid_users = {}
+        invalid_usernames = set()
+        for i, entry in enumerate(serializer.validated_data["users"]):
+            entry_serializer = RosterEntrySerializer(data=entry)
+            if entry_serializer.is_valid():
+                entries.append(entry_serializer.validated_data)
+            else:
+                if isinstance(entry.get("username"), basestring):
+                    invalid_usernames.add(entry["username"])
+                invalid_users["row %i" % (i+1)] = ["%s: %s" % (field, e) 
+                                                   for field, field_errors in sorted(entry_serializer.errors.items()) 
+                                                   for e in field_errors]
+        
+        # If a user appears more than once, the last entry wins
+        users = {}
+        roster = {"student": set(), "instructor": set(), "grader": set()}
+        for entry in entries:
+            users[entry["username"]] = entry
+            roster[entry["user_type"]].add(entry["username"])
+        
+        # Compute the diff against the database
+        user_objs = dict([(u.username, u) for u in User.objects.filter(username__in = users.keys())])
+        
+        users_created = sorted([username for username in users if username not in user_objs])
+        # Existing users may also be in other courses, so we only update 
+        # their names and emails if we're explicitly asked to
+        users_updated = []
+        if update_users:
+            for username, user_obj in user_objs.items():
+                entry = users[username]
+                if (user_obj.first_name, user_obj.last_name, user_obj.email) != (entry["first_name"], entry["last_name"], entry["email"]):
+                    users_updated.append(username)
+            users_updated.sort()
+        
+        student_objs = dict([(s.user.username, s) for s in Student.objects.filter(course = course_obj).select_related("user")])
+        instructors = set(Instructor.objects.filter(course = course_obj).values_list("user__username", flat=True))
+        graders = set(Grader.objects.filter(course = course_obj).values_list("user__username", flat=True))
+        
+        students_added = sorted(roster["student"] - set(student_objs.keys()))
+        students_undropped = sorted([username for username in roster["student"] 
+                                     if username in student_objs and student_objs[username].dropped])
+        if drop_missing:
+            # Students with an invalid entry are not missing from the roster
+            students_dropped = sorted([username for username, student_obj in student_objs.items() 
+                                       if username not in roster["student"] and username not in invalid_usernames 
+                                       and not student_obj.dropped])
+        else:
+            students_dropped = []
+        instructors_added = sorted(roster["instructor"] - instructors)
+        graders_added = sorted(roster["grader"] - graders)
+        
+        if not dry_run:
+            try:
+                with transaction.atomic():
+                    User.objects.bulk_create([User(username = username,
+                                                   first_name = users[username]["first_name"],
+                                                   last_name = users[username]["last_name"],
+                                                   email = users[username]["email"]) for username in users_created])
+                    
+                    for username in users_updated:
+                        user_obj = user_objs[username]
+                        user_obj.first_name = users[username]["first_name"]
+                        user_obj.last_name = users[username]["last_name"]
+                        user_obj.email = users[username]["email"]
+                        user_obj.save(update_fields=["first_name", "last_name", "email"])
+                    
+                    if len(users_created) > 0:
+                        user_objs.update([(u.username, u) for u in User.objects.filter(username__in = users_created)])
+                    
+                    if course_obj.extension_policy == Course.EXT_PER_STUDENT:
+                        extensions = course_obj.default_extensions
+                    else:
+                        extensions = 0
+                    
+                    Student.objects.bulk_create([Student(course = course_obj, 
+                                                         user = user_objs[username],
+                                                         extensions = extensions) for username in students_added])
+                    Instructor.objects.bulk_create([Instructor(course = course_obj, 
+                                                               user = user_objs[username]) for username in instructors_added])
+                    Grader.objects.bulk_create([Grader(course = course_obj, 
+                                                       user = user_objs[username]) for username in graders_added])
+                    
+                    if len(students_undropped) > 0:
+                        Student.objects.filter(course = course_obj, user__username__in = students_undropped).update(dropped = False)
+                    if len(students_dropped) > 0:
+                        Student.objects.filter(course = course_obj, user__username__in = students_dropped).update(dropped = True)
+            except Error, e:
+                return Response({"database": [str(e)]}, status=status.HTTP_400_BAD_REQUEST)
+        
+        response_data = {"dry_run": dry_run,
+                         "users_created": users_created,
+                         "users_updated": users_updated,
+                         "students_added": students_added,
+                         "students_undropped": students_undropped,
+                         "students_dropped": students_dropped,
+                         "instructors_added": instructors_added,
+                         "graders_added": graders_added,
+                         "invalid_users": invalid_users}
+        
+        serializer = RosterSyncResponseSerializer(response_data)
+        return Response(serializer.data)
+
+
 class PersonList(APIView):
     def get(self, request, course_id, format=None):
         course_obj, roles = get_course(request, course_id)
@@ -95,7 +235,7 @@ class PersonList(APIView):
         if not (CourseRoles.ADMIN in roles or CourseRoles.INSTRUCTOR in roles or CourseRoles.GRADER in roles):
             raise PermissionDenied
         
-        persons = self.person_class.objects.filter(course = course_obj)
+        persons = self.person_class.objects.filter(course = course_obj).select_related("user")
         
         serializer = self.person_serializer(persons, many=True, context=serializer_context)
         return Response(serializer.data)
@@ -201,26 +341,26 @@ class AssignmentList(APIView):
         course_obj, roles = get_course(request, course_id)
         serializer_context = {'request': request, 'course': course_obj, 'roles': roles}   
                 
-        assignments = Assignment.objects.filter(course = course_obj)
-        
-        serialized_assignments = []
-
         include = request.query_params.getlist("include")
 
-        for assignment in assignments:
-            asr = AssignmentSerializer(assignment, context=serializer_context)
-            serialized_assignment = asr.data 
-
-            if "rubric" in include:
-                rcs = RubricComponentSerializer(assignment.get_rubric_components(), many=True, context=serializer_context)
-                serialized_assignment["rubric"] = rcs.data
+        def build():
+            assignments = Assignment.objects.filter(course = course_obj)
             
-            serialized_assignments.append(serialized_assignment)
-        
-        return Response(serialized_assignments)        
+            serialized_assignments = []
+    
+            for assignment in assignments:
+                asr = AssignmentSerializer(assignment, context=serializer_context)
+                serialized_assignment = asr.data 
+    
+                if "rubric" in include:
+                    rcs = RubricComponentSerializer(assignment.get_rubric_components(), many=True, context=get_include_context(serializer_context, "rubric"))
+                    serialized_assignment["rubric"] = rcs.data
+                
+                serialized_assignments.append(serialized_assignment)
+                
+            return serialized_assignments
         
-        serializer = AssignmentSerializer(assignments, many=True, context=serializer_context)
-        return Response(serializer.data)
+        return Response(get_cached_representation(request, course_obj, roles, "assignments", build))
 
     def post(self, request, course_id, format=None):
         course_obj, roles = get_course(request, course_id)
@@ -251,16 +391,19 @@ class AssignmentDetail(APIView):
 
         include = request.query_params.getlist("include")
         
-        assignment_obj = get_assignment(course_obj, request.user, roles, assignment_id)
-        serializer = AssignmentSerializer(assignment_obj, context=serializer_context)
-        
-        serialized_assignment = serializer.data 
-
-        if "rubric" in include:
-            rcs = RubricComponentSerializer(assignment_obj.get_rubric_components(), many=True, context=serializer_context)
-            serialized_assignment["rubric"] = rcs.data
+        def build():
+            assignment_obj = get_assignment(course_obj, request.user, roles, assignment_id)
+            serializer = AssignmentSerializer(assignment_obj, context=serializer_context)
+            
+            serialized_assignment = serializer.data 
+    
+            if "rubric" in include:
+                rcs = RubricComponentSerializer(assignment_obj.get_rubric_components(), many=True, context=get_include_context(serializer_context, "rubric"))
+                serialized_assignment["rubric"] = rcs.data
+                
+            return serialized_assignment
                     
-        return Response(serialized_assignment)
+        return Response(get_cached_representation(request, course_obj, roles, "assignment:" + assignment_id, build))
 
     def patch(self, request, course_id, assignment_id, format=None):
         course_obj, roles = get_course(request, course_id)
@@ -288,17 +431,41 @@ class AssignmentDetail(APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)    
     
 
+class AssignmentStats(APIView):
+
+    def get(self, request, course_id, assignment_id, format=None):
+        course_obj, roles = get_course(request, course_id)
+
+        if not (CourseRoles.ADMIN in roles or CourseRoles.INSTRUCTOR in roles):
+            raise PermissionDenied        
+
+        assignment_obj = get_assignment(course_obj, request.user, roles, assignment_id)
+        
+        try:
+            bins = int(request.query_params.get("bins", 10))
+            if bins <= 0:
+                raise ValueError
+        except ValueError:
+            msg = "The number of histogram bins must be a positive integer."
+            return Response({"bins": [msg]}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(get_assignment_stats(assignment_obj, histogram_bins = bins))
+    
+
 class RubricList(APIView):
    
     def get(self, request, course_id, assignment_id, format=None):
         course_obj, roles = get_course(request, course_id)
         serializer_context = {'request': request, 'course': course_obj, 'roles': roles}
                    
-        assignment_obj = get_assignment(course_obj, request.user, roles, assignment_id)        
-        rubric_components = assignment_obj.get_rubric_components()
+        def build():
+            assignment_obj = get_assignment(course_obj, request.user, roles, assignment_id)        
+            rubric_components = assignment_obj.get_rubric_components()
+            
+            serializer = RubricComponentSerializer(rubric_components, many=True, context=serializer_context)
+            return serializer.data
         
-        serializer = RubricComponentSerializer(rubric_components, many=True, context=serializer_context)
-        return Response(serializer.data)
+        return Response(get_cached_representation(request, course_obj, roles, "rubric:" + assignment_id, build))
 
     def post(self, request, course_id, assignment_id, format=None):
         course_obj, roles = get_course(request, course_id)
@@ -522,6 +689,31 @@ class Register(APIView):
         return Response(serializer.data, status=response_status)        
     
 
+def get_team_prefetches(include):
+    """
+    Lookups to prefetch the objects included in a list of teams, so 
+    serializing them takes the same number of queries regardless of 
+    the number of teams.
+    """
+    prefetches = []
+    
+    if "students" in include:
+        prefetches.append(Prefetch("teammember_set", 
+                                   queryset = TeamMember.objects.select_related("student__user")))
+        
+    if "assignments" in include or "assignments__grades" in include:
+        registrations = Registration.objects.select_related("assignment", "grader__user",
+                                                            "final_submission__registration__team",
+                                                            "final_submission__registration__assignment")
+        prefetches.append(Prefetch("registration_set", queryset = registrations))
+        
+    if "assignments__grades" in include:
+        prefetches.append(Prefetch("registration_set__grade_set",
+                                   queryset = Grade.objects.select_related("rubric_component__assignment")))
+        
+    return prefetches
+    
+
 class TeamList(APIView):
     def get(self, request, course_id, format=None):       
         course_obj, roles = get_course(request, course_id)
@@ -533,11 +725,16 @@ class TeamList(APIView):
             student = course_obj.get_student(request.user)  
             teams = course_obj.get_teams_with_students([student])
         else:
-            teams = []
+            teams = Team.objects.none()
         
         serialized_teams = []
 
         include = request.query_params.getlist("include")
+        teams = teams.prefetch_related(*get_team_prefetches(include))
+
+        students_context = get_include_context(serializer_context, "students")
+        assignments_context = get_include_context(serializer_context, "assignments")
+        grades_context = get_include_context(assignments_context, "grades")
 
         # TODO: This needs to be generalized and refactored
         for team in teams:
@@ -545,7 +742,7 @@ class TeamList(APIView):
             serialized_team = ts.data 
 
             if "students" in include:
-                tms = TeamMemberSerializer(team.teammember_set.all(), many=True, context=serializer_context)
+                tms = TeamMemberSerializer(team.teammember_set.all(), many=True, context=students_context)
                 serialized_team["students"] = tms.data
 
             if "assignments__grades" in include:
@@ -553,11 +750,11 @@ class TeamList(APIView):
                 registrations = team.registration_set.all()
                 
                 for registration in registrations:
-                    rs = RegistrationSerializer(registration, context=serializer_context)
+                    rs = RegistrationSerializer(registration, context=assignments_context)
                     serialized_registration = rs.data
                     
                     grades = registration.grade_set.all()
-                    gs = GradeSerializer(grades, many=True, context=serializer_context)
+                    gs = GradeSerializer(grades, many=True, context=grades_context)
                     
                     serialized_registration["grades"] = gs.data
                     
@@ -565,7 +762,7 @@ class TeamList(APIView):
                     
                 serialized_team["assignments"] = serialized_registrations
             elif "assignments" in include:
-                rs = RegistrationSerializer(team.registration_set.all(), many=True, context=serializer_context)
+                rs = RegistrationSerializer(team.registration_set.all(), many=True, context=assignments_context)
                 serialized_team["assignments"] = rs.data
             
             serialized_teams.append(serialized_team)
@@ -589,6 +786,142 @@ class TeamList(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)        
     
     
+class TeamImport(APIView):
+    
+    def post(self, request, course_id, format=None):
+        course_obj, roles = get_course(request, course_id)
+        
+        if not (CourseRoles.ADMIN in roles or CourseRoles.INSTRUCTOR in roles):
+            raise PermissionDenied
+
+        serializer = TeamImportRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        specs = serializer.validated_data["teams"]
+        dry_run = serializer.validated_data["dry_run"]
+        
+        team_ids = set([spec["team_id"] for spec in specs])
+        usernames = set([username for spec in specs for username in spec["students"]])
+        assignment_ids = set([aid for spec in specs for aid in spec.get("assignments", [])])
+        
+        # Load everything we need to validate the request up front
+        team_objs = dict([(t.team_id, t) for t in Team.objects.filter(course = course_obj, team_id__in = team_ids)])
+        student_objs = dict([(s.user.username, s) for s in Student.objects.filter(course = course_obj, user__username__in = usernames).select_related("user")])
+        assignment_objs = dict([(a.assignment_id, a) for a in Assignment.objects.filter(course = course_obj, assignment_id__in = assignment_ids)])
+        
+        team_members = dict([(team_id, set()) for team_id in team_objs])
+        for team_id, username in TeamMember.objects.filter(team__in = team_objs.values()).values_list("team__team_id", "student__user__username"):
+            team_members[team_id].add(username)
+        
+        registrations = set(Registration.objects.filter(team__in = team_objs.values()).values_list("team__team_id", "assignment__assignment_id"))
+
+        # (student, assignment) -> team the student is registered with 
+        registered_with = {}
+        for username, team_id, aid in TeamMember.objects.filter(student__in = student_objs.values(), 
+                                                                team__registration__assignment__in = assignment_objs.values())\
+                                                        .values_list("student__user__username", "team__team_id", "team__registration__assignment__assignment_id"):
+            registered_with[(username, aid)] = team_id
+        
+        if course_obj.extension_policy == Course.EXT_PER_TEAM:
+            default_extensions = course_obj.default_extensions
+        else:
+            default_extensions = 0
+        
+        conflicts = {}
+        seen = set()
+        new_teams = []
+        new_members = []
+        new_registrations = []
+        teams_created = []
+        teams_updated = []
+        teams_unchanged = []
+        for spec in specs:
+            team_id = spec["team_id"]
+            students = spec["students"]
+            assignments = spec.get("assignments", [])
+            errors = []
+            
+            if team_id in seen:
+                errors.append("Team '%s' appears more than once in the request." % team_id)
+            seen.add(team_id)
+            
+            if len(students) == 0:
+                errors.append("Team '%s' has no students." % team_id)
+            for username in students:
+                if username not in student_objs:
+                    errors.append("'%s' is not a student in course '%s'" % (username, course_obj.course_id))
+            for aid in assignments:
+                if aid not in assignment_objs:
+                    errors.append("'%s' is not an assignment in course '%s'" % (aid, course_obj.course_id))
+
+            if team_id in team_objs and len(team_members[team_id]) > 0 and team_members[team_id] != set(students):
+                errors.append("Team '%s' already exists, but it has these team members: %s" % (team_id, ", ".join(sorted(team_members[team_id]))))
+            
+            if len(errors) == 0:
+                for aid in assignments:
+                    for username in students:
+                        other_team_id = registered_with.get((username, aid), team_id)
+                        if other_team_id != team_id:
+                            errors.append("'%s' is already registered for assignment '%s' in team '%s'" % (username, aid, other_team_id))
+                                                                    
+            if len(errors) > 0:
+                conflicts[team_id] = errors
+                continue
+
+            if team_id not in team_objs:
+                extensions = spec.get("extensions", default_extensions)
+                new_teams.append(Team(course = course_obj, team_id = team_id, extensions = extensions))
+                created = True
+            else:
+                created = False
+                
+            changed = False
+            if created or len(team_members[team_id]) == 0:
+                new_members += [(team_id, username) for username in students]
+                changed = True
+                
+            for aid in assignments:
+                if (team_id, aid) not in registrations:
+                    new_registrations.append((team_id, aid))
+                    registrations.add((team_id, aid))
+                    changed = True
+                for username in students:
+                    registered_with[(username, aid)] = team_id
+            
+            if created:
+                teams_created.append(team_id)
+            elif changed:
+                teams_updated.append(team_id)
+            else:
+                teams_unchanged.append(team_id)
+                
+        if not dry_run:
+            try:
+                with transaction.atomic():
+                    Team.objects.bulk_create(new_teams)
+                    
+                    if len(new_teams) > 0:
+                        team_objs.update([(t.team_id, t) for t in Team.objects.filter(course = course_obj, team_id__in = [t.team_id for t in new_teams])])
+                    
+                    TeamMember.objects.bulk_create([TeamMember(team = team_objs[team_id], 
+                                                               student = student_objs[username],
+                                                               confirmed = True) for team_id, username in new_members])
+                    Registration.objects.bulk_create([Registration(team = team_objs[team_id], 
+                                                                   assignment = assignment_objs[aid]) for team_id, aid in new_registrations])
+            except Error, e:
+                return Response({"database": [str(e)]}, status=status.HTTP_400_BAD_REQUEST)
+        
+        response_data = {"dry_run": dry_run,
+                         "teams_created": teams_created,
+                         "teams_updated": teams_updated,
+                         "teams_unchanged": teams_unchanged,
+                         "conflicts": conflicts}
+        
+        serializer = TeamImportResponseSerializer(response_data)
+        return Response(serializer.data)
+    
+
 class TeamDetail(APIView):
             
     def get(self, request, course_id, team_id, format=None):
@@ -720,6 +1053,120 @@ class RegistrationList(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)       
     
 
+class AssignmentRegistrations(APIView):
+
+    def patch(self, request, course_id, assignment_id, format=None):
+        course_obj, roles = get_course(request, course_id)
+        
+        if not (CourseRoles.ADMIN in roles or CourseRoles.INSTRUCTOR in roles):
+            raise PermissionDenied        
+
+        assignment_obj = get_assignment(course_obj, request.user, roles, assignment_id)
+
+        if not isinstance(request.data, list):
+            msg = "Expected a list of registration updates."
+            return Response({"registrations": [msg]}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = RegistrationUpdateRequestSerializer(data=request.data, many=True)
+        if not serializer.is_valid():
+            errors = {}
+            for i, (row, row_errors) in enumerate(zip(request.data, serializer.errors)):
+                if len(row_errors) > 0:
+                    key = row.get("team_id", "row %i" % i) if isinstance(row, dict) else "row %i" % i
+                    for field, field_errors in row_errors.items():
+                        errors.setdefault(key, []).extend(["%s: %s" % (field, e) for e in field_errors])
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        updates = serializer.validated_data
+        team_ids = [u["team_id"] for u in updates]
+        
+        registration_objs = Registration.objects.filter(assignment = assignment_obj, team__team_id__in = team_ids).select_related("team")
+        registration_objs = dict([(r.team.team_id, r) for r in registration_objs])
+        
+        grader_objs = Grader.objects.filter(course = course_obj).select_related("user")
+        grader_objs = dict([(g.user.username, g) for g in grader_objs])
+
+        submission_ids = [u["final_submission_id"] for u in updates if u.get("final_submission_id") is not None]
+        submission_objs = Submission.objects.filter(registration__in = registration_objs.values(), pk__in = submission_ids)
+        submission_objs = dict([(s.pk, s) for s in submission_objs])
+
+        # Validate every row, and figure out what has actually changed,
+        # before touching the database.
+        errors = {}
+        changes = []
+        seen = set()
+        for update in updates:
+            team_id = update["team_id"]
+            row_errors = []
+            row_changes = {}
+            
+            registration_obj = registration_objs.get(team_id)
+            if team_id in seen:
+                row_errors.append("Team '%s' appears more than once in the request." % team_id)
+            elif registration_obj is None:
+                row_errors.append("Team '%s' is not registered for assignment '%s'" % (team_id, assignment_obj.assignment_id))
+            else:
+                if "grader_username" in update:
+                    grader_username = update["grader_username"]
+                    if grader_username is None:
+                        grader_obj = None
+                    else:
+                        grader_obj = grader_objs.get(grader_username)
+                        if grader_obj is None:
+                            row_errors.append("grader_username: '%s' is not a grader in course '%s'" % (grader_username, course_obj.course_id))
+                    if grader_obj is None or registration_obj.grader_id != grader_obj.pk:
+                        row_changes["grader"] = grader_obj
+                        
+                if "final_submission_id" in update:
+                    submission_id = update["final_submission_id"]
+                    if submission_id is None:
+                        submission_obj = None
+                    else:
+                        submission_obj = submission_objs.get(submission_id)
+                        if submission_obj is None or submission_obj.registration_id != registration_obj.pk:
+                            row_errors.append("final_submission_id: %s is not a submission for this registration" % submission_id)
+                    if registration_obj.final_submission_id != (submission_obj.pk if submission_obj is not None else None):
+                        row_changes["final_submission"] = submission_obj
+                        
+                if "grade_adjustments" in update:
+                    if registration_obj.grade_adjustments != update["grade_adjustments"]:
+                        row_changes["grade_adjustments"] = update["grade_adjustments"]
+            
+            seen.add(team_id)
+            
+            if len(row_errors) > 0:
+                errors.setdefault(team_id, []).extend(row_errors)
+            else:
+                changes.append((team_id, registration_obj, row_changes))
+                
+        if len(errors) > 0:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        # Registrations that get the exact same changes (e.g., the same grader)
+        # are updated together with a single query.
+        batches = []
+        for team_id, registration_obj, row_changes in changes:
+            if len(row_changes) == 0:
+                continue
+            for batch_changes, pks in batches:
+                if batch_changes == row_changes:
+                    pks.append(registration_obj.pk)
+                    break
+            else:
+                batches.append((row_changes, [registration_obj.pk]))
+
+        try:
+            with transaction.atomic():
+                for batch_changes, pks in batches:
+                    Registration.objects.filter(pk__in = pks).update(**batch_changes)
+        except Error, e:
+            return Response({"database": [str(e)]}, status=status.HTTP_400_BAD_REQUEST)
+
+        response_data = [{"team_id": team_id, "updated": len(row_changes) > 0} for team_id, _, row_changes in changes]
+        serializer = RegistrationUpdateResponseSerializer(response_data, many=True)
+        return Response(serializer.data)
+
+
 class RegistrationDetail(APIView):
 
     def get(self, request, course_id, team_id, assignment_id, format=None):
@@ -1001,6 +1448,7 @@ class BaseUserDetail(APIView):
                 serializer.save()
             except Error, e:
                 return Response({"database": [str(e)]}, status=status.HTTP_400_BAD_REQUEST)
+            invalidate_user_tokens(user)
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -1011,6 +1459,7 @@ class BaseUserDetail(APIView):
             else:
                 raise Http404  
         user = self.get_user(username)
+        invalidate_user_tokens(user)
         user.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)    
     
@@ -1038,7 +1487,7 @@ class AuthUserDetail(BaseUserDetail):
     
 class BaseUserToken(APIView):
     
-    authentication_classes = (BasicAuthentication, TokenAuthentication)
+    authentication_classes = (BasicAuthentication, CachingTokenAuthentication)
     
     def _get(self, request, username, format=None):
         try:
@@ -1056,6 +1505,7 @@ class BaseUserToken(APIView):
                 token = Token.objects.get(user__username=username)
                 old_token = token.key
                 token.delete()
+                invalidate_token(old_token)
             except Token.DoesNotExist:
                 old_token = None
         
@@ -1083,3 +1533,100 @@ class AuthUserToken(BaseUserToken):
         
 
 
+class Batch(APIView):
+    """
+    Applies a list of operations (currently, only PATCHes of individual
+    resources) in a single request and a single transaction. Each operation 
+    is dispatched to the view for its URL, with the same user as the batch
+    request, so the same permission checks apply. If any operation fails,
+    none of them are applied.
+    """
+    
+    def _dispatch(self, request, method, path, data):
+        # The operation data may contain datetimes and timedeltas (if the
+        # batch request was sent as MessagePack), so we use the same
+        # encoder as DRF's JSONRenderer
+        body = json.dumps(data, cls=JSONEncoder)
+        
+        environ = dict(request.META)
+        environ.update({"REQUEST_METHOD": method,
+                        "PATH_INFO": path,
+                        "SCRIPT_NAME": "",
+                        "QUERY_STRING": "",
+                        "CONTENT_TYPE": "application/json",
+                        "CONTENT_LENGTH": str(len(body)),
+                        "wsgi.input": BytesIO(body)})
+        subrequest = WSGIRequest(environ)
+        
+        # The user has already been authenticated by this request
+        subrequest._force_auth_user = request.user
+        subrequest._force_auth_token = request.auth
+        
+        match = resolve(path)
+        return match.func(subrequest, *match.args, **match.kwargs)
+    
+    def post(self, request, format=None):
+        if not isinstance(request.data, list):
+            return Response({"operations": ["Expected a list of operations"]}, status=status.HTTP_400_BAD_REQUEST)
+        
+        serializer = BatchOperationSerializer(data=request.data, many=True)
+        if not serializer.is_valid():
+            errors = {}
+            for i, op_errors in enumerate(serializer.errors):
+                for field, msgs in op_errors.items():
+                    errors.setdefault("operation %i" % (i+1), []).extend(["%s: %s" % (field, msg) for msg in msgs])
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        results = []
+        with transaction.atomic():
+            for op in serializer.validated_data:
+                url = op["url"]
+                try:
+                    response = self._dispatch(request, op["method"], urlparse(url).path, op["data"])
+                except Resolver404:
+                    transaction.set_rollback(True)
+                    return Response({url: ["No such resource"]}, status=status.HTTP_400_BAD_REQUEST)
+                
+                if response.status_code >= 400:
+                    transaction.set_rollback(True)
+                    if isinstance(response.data, dict):
+                        msgs = []
+                        for field, field_errors in response.data.items():
+                            if isinstance(field_errors, list):
+                                msgs += ["%s: %s" % (field, e) for e in field_errors]
+                            else:
+                                msgs.append("%s: %s" % (field, field_errors))
+                    else:
+                        msgs = [unicode(response.data)]
+                    return Response({url: msgs}, status=status.HTTP_400_BAD_REQUEST)
+                
+                results.append({"url": url, "status": response.status_code, "data": response.data})
+            
+        serializer = BatchResponseSerializer(results, many=True)
+        return Response(serializer.data)
+
+
+class CacheStats(APIView):
+    """
+    Hit/miss counters of the course representation cache (for the
+    process that handles the request). Only available to admins.
+    """
+    
+    def get(self, request, format=None):
+        if not (request.user.is_staff or request.user.is_superuser):
+            raise PermissionDenied
+        
+        return Response(representation_cache_stats.as_dict())
+
+
+class Metrics(APIView):
+    """
+    Request metrics (for the process that handles the request), in the
+    Prometheus text format. Only available to admins.
+    """
+    
+    def get(self, request, format=None):
+        if not (request.user.is_staff or request.user.is_superuser):
+            raise PermissionDenied
+        
+        return HttpResponse(metrics.registry.render(), content_type=metrics.CONTENT_TYPE)
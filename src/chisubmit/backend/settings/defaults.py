@@ -15,6 +15,14 @@ INSTALLED_APPS = (
 )
 
 MIDDLEWARE_CLASSES = (
+    # Records request metrics (time, queries, response size). Goes
+    # first, so it times the whole request and, since it processes the
+    # response last, sees the (compressed) bytes actually sent.
+    'chisubmit.backend.api.middleware.RequestMetricsMiddleware',
+    # Compresses responses (when the client accepts gzip). Goes before
+    # all other middleware except RequestMetricsMiddleware, so it
+    # processes the response after them
+    'django.middleware.gzip.GZipMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -23,6 +31,7 @@ MIDDLEWARE_CLASSES = (
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'chisubmit.backend.api.middleware.SparseFieldsetsMiddleware',
 )
 
 ROOT_URLCONF = 'chisubmit.backend.urls'
@@ -67,12 +76,77 @@ TEMPLATES = [
 STATIC_URL = '/static/'
 
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Cache used to avoid looking up the API token in the database on
+# every request, and how long (in seconds) tokens are cached.
+CHISUBMIT_TOKEN_CACHE = 'default'
+CHISUBMIT_TOKEN_CACHE_TTL = 60
+
+# Cache for the representations of courses, assignments, and rubrics,
+# and how long (in seconds) they are cached (they are also invalidated
+# whenever a course, assignment, or rubric component changes, but only
+# in the cache of the process that made the change, unless the cache is
+# shared; see production.py.sample). If the TTL is None, they are cached
+# for 300 seconds in a shared cache, but only for 5 seconds in a 
+# per-process (LocMemCache) cache.
+CHISUBMIT_REPRESENTATION_CACHE = 'default'
+CHISUBMIT_REPRESENTATION_CACHE_TTL = None
+
+# Whether to record per-view request metrics (exposed, in the Prometheus
+# format, in /api/v1/metrics), and the time (in seconds) above which
+# a request is logged (None to never log requests). The SQL queries 
+# made by a slow request are also logged if the level of the
+# chisubmit.backend.requests logger is set to DEBUG.
+CHISUBMIT_METRICS = True
+CHISUBMIT_SLOW_REQUEST_THRESHOLD = 1.0
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        # Slow requests (only a summary of each request, without its
+        # queries, at the WARNING level)
+        'chisubmit.backend.requests': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+        },
+    },
+}
+
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
+        'chisubmit.backend.api.authentication.CachingTokenAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
-    )                  
+    ),
+    # JSON must remain the first renderer, so it is the default
+    # when the client doesn't ask for a specific format.
+    'DEFAULT_RENDERER_CLASSES': (
+        'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
 }
 
+# If msgpack is installed, clients can ask for MessagePack instead of JSON
+from chisubmit.common.wire import msgpack_available
+if msgpack_available():
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] += ('chisubmit.backend.api.renderers.MessagePackRenderer',)
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'] += ('chisubmit.backend.api.renderers.MessagePackParser',)
+
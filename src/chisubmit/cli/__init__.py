@@ -50,6 +50,7 @@ from chisubmit.repos.factory import RemoteRepositoryConnectionFactory
 config = None
 
 import chisubmit.common.log as log
+from chisubmit.common.profiling import Profiler
 from chisubmit.config import Config, ConfigDirectoryNotFoundException
 from chisubmit import RELEASE
 from chisubmit.client import Chisubmit
@@ -64,10 +65,13 @@ DEBUG = False
 @click.option('--work-dir', type=str, default=None)
 @click.option('--verbose', '-v', is_flag=True)
 @click.option('--debug', is_flag=True)
+@click.option('--profile', is_flag=True, help="Print a summary of the time spent in HTTP requests and git operations")
+@click.option('--profile-output', type=click.Path(dir_okay=False, writable=True), default=None,
+              help="Also profile the command with cProfile, and write the statistics to this file (implies --profile)")
 @click.version_option(version=RELEASE)
 @catch_chisubmit_exceptions
 @click.pass_context
-def chisubmit_cmd(ctx, config, config_dir, work_dir, verbose, debug):
+def chisubmit_cmd(ctx, config, config_dir, work_dir, verbose, debug, profile, profile_output):
     global VERBOSE, DEBUG
     
     VERBOSE = verbose
@@ -82,6 +86,18 @@ def chisubmit_cmd(ctx, config, config_dir, work_dir, verbose, debug):
         ctx.exit(CHISUBMIT_FAIL)
     
     log.init_logging(verbose, debug)
+    
+    if profile or profile_output is not None:
+        profiler = Profiler(pstats_file = profile_output)
+        
+        def print_profile():
+            profiler.stop()
+            click.echo("", err=True)
+            for line in profiler.get_summary():
+                click.echo(line, err=True)
+        
+        profiler.start()
+        ctx.call_on_close(print_profile)
 
     config_overrides = {}
     for c in config:
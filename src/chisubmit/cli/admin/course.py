@@ -171,13 +171,15 @@ VALID_USER_TYPES = ['student', 'grader', 'instructor']
 @click.argument('csv_email_column', type=str)
 @click.option('--dry-run', is_flag=True)
 @click.option('--sync', is_flag=True)
+@click.option('--update-users', is_flag=True)
 @click.option('--user-type', type=click.Choice(VALID_USER_TYPES + ['column']))
 @click.option('--user-type-column', type=str)
 @click.option('--id-from-email', is_flag=True)
+@catch_chisubmit_exceptions
 @require_config
 @click.pass_context
 def admin_course_load_users(ctx, course_id, csv_file, csv_username_column, csv_fname_column, csv_lname_column, csv_email_column,
-                                 dry_run, sync, user_type, user_type_column, id_from_email):   
+                                 dry_run, sync, update_users, user_type, user_type_column, id_from_email):   
     course = get_course_or_exit(ctx, course_id)    
                 
     if user_type == "column" and user_type_column is None:
@@ -196,7 +198,7 @@ def admin_course_load_users(ctx, course_id, csv_file, csv_username_column, csv_f
             print "CSV file %s does not have a '%s' column" % (csv_file, col)
             ctx.exit(CHISUBMIT_FAIL)
         
-    student_usernames = set()
+    users = []
         
     for entry in csvf:
         username = entry[csv_username_column]
@@ -204,74 +206,52 @@ def admin_course_load_users(ctx, course_id, csv_file, csv_username_column, csv_f
         if id_from_email:
             username = username.split("@")[0].strip()
         
-        first_name = entry[csv_fname_column]
-        last_name = entry[csv_lname_column]
-        email = entry[csv_email_column]
-        
-        print "Processing %s (%s, %s)" % (username, last_name, first_name)        
-        
         if user_type == "column":
             cur_user_type = entry[user_type_column]
             if cur_user_type not in VALID_USER_TYPES:
-                print "- User %s has invalid user type '%s'." % (username, cur_user_type)
+                print "User %s has invalid user type '%s'. Skipping." % (username, cur_user_type)
                 continue
         else:
             cur_user_type = user_type
 
-        if cur_user_type == "student":
-            student_usernames.add(username)
-
-        try:
-            user = ctx.obj["client"].get_user(username = username)
-            print "- User %s already exists." % username
-        except UnknownObjectException, uoe:
-            print "- Creating user %s" % username
-            if not dry_run:
-                user = ctx.obj["client"].create_user(username = username,
-                                                     first_name = first_name,
-                                                     last_name = last_name,
-                                                     email = email)
+        users.append({"username": username,
+                      "first_name": entry[csv_fname_column],
+                      "last_name": entry[csv_lname_column],
+                      "email": entry[csv_email_column],
+                      "user_type": cur_user_type})
         
-        if cur_user_type == "student":
-            try:
-                student = course.get_student(username)
-                if not student.dropped:
-                    print "- User %s is already a student in %s" % (username, course_id)
-                else:
-                    if not dry_run:
-                        student.dropped = False
-                    print "- Student had previously been marked as dropped, has been un-dropped"
-            except UnknownObjectException, uoe:
-                print "- Adding student %s to %s" % (username, course_id)
-                if not dry_run:
-                    course.add_student(user)
-        elif cur_user_type == "instructor":
-            try:
-                instructor = course.get_instructor(username)
-                print "- User %s is already an instructor in %s" % (username, course_id)
-            except UnknownObjectException, uoe:
-                print "- Adding instructor %s to %s" % (username, course_id)
-                if not dry_run:
-                    course.add_instructor(user)
-        elif cur_user_type == "grader":
-            try:
-                grader = course.get_grader(username)
-                print "- User %s is already a grader in %s" % (username, course_id)
-            except UnknownObjectException, uoe:
-                print "- Adding grader %s to %s" % (username, course_id)
-                if not dry_run:
-                    course.add_grader(user)
-            
-        print 
-    
-    if sync:
-        existing_students = course.get_students()
-        for existing_student in existing_students:
-            if existing_student.username not in student_usernames:
-                if not dry_run:
-                    existing_student.dropped = True
-                print "Dropped %s" % existing_student.username
+    summary = course.sync_roster(users, drop_missing = sync, update_users = update_users, dry_run = dry_run)
+    
+    # Invalid users are reported by their position in the roster ("row 1"
+    # is the first user we sent)
+    invalid_users = dict([(int(row.split()[1]), errors) for row, errors in summary.invalid_users.items()])
+    for row in sorted(invalid_users):
+        username = users[row - 1]["username"]
+        print "User %s is not valid (%s). Skipping." % (username, "; ".join(invalid_users[row]))
+    
+    if dry_run:
+        print "Dry run. The following changes would be made:"
+        print
+    
+    changes = [("Created user", summary.users_created),
+               ("Updated user", summary.users_updated),
+               ("Added student", summary.students_added),
+               ("Un-dropped student", summary.students_undropped),
+               ("Dropped student", summary.students_dropped),
+               ("Added instructor", summary.instructors_added),
+               ("Added grader", summary.graders_added)]
+    
+    n_changes = 0
+    for msg, usernames in changes:
+        for username in usernames:
+            print "%s %s" % (msg, username)
+        n_changes += len(usernames)
         
+    if n_changes == 0:
+        print "No changes to the roster of %s" % course_id
+    
+    return CHISUBMIT_SUCCESS
+
 
 @click.command(name="create-git-users")
 @click.argument('course_id', type=str)
@@ -318,10 +298,28 @@ def admin_course_create_git_users(ctx, course_id, staging, dry_run, all_types, o
                 except ChisubmitException, ce:
                     print "[ERROR] Couldn't create user '%s': %s" % (user.username, ce.message)
     
+def print_team_import(summary):
+    if summary.dry_run:
+        print "Dry run. The following changes would be made:"
+        print
+    
+    for team_id in summary.teams_created:
+        print "Created team %s" % team_id
+    for team_id in summary.teams_updated:
+        print "Updated team %s" % team_id
+    for team_id in summary.teams_unchanged:
+        print "Team %s already exists" % team_id
+    for team_id in sorted(summary.conflicts):
+        print "ERROR: Could not import team %s" % team_id
+        for msg in summary.conflicts[team_id]:
+            print " - %s" % msg
+            
+
 @click.command(name="create-individual-teams")
 @click.argument('course_id', type=str)
 @click.option('--dry-run', is_flag=True)
 @click.option('--only', type=str)
+@catch_chisubmit_exceptions
 @require_config
 @click.pass_context
 def admin_course_create_individual_teams(ctx, course_id, dry_run, only):      
@@ -331,35 +329,58 @@ def admin_course_create_individual_teams(ctx, course_id, dry_run, only):
         students = [get_student_or_exit(ctx, course, only)]
     else:
         students = course.get_students()
-        
     
-    for student in students:
-        print "Processing %s (%s, %s)" % (student.username, student.user.last_name, student.user.first_name)        
+    teams = [{"team_id": student.username, "students": [student.username]} for student in students]
+    
+    summary = course.import_teams(teams, dry_run = dry_run)
+    print_team_import(summary)
+    
+    if len(summary.conflicts) > 0:
+        ctx.exit(CHISUBMIT_FAIL)
+    else:
+        return CHISUBMIT_SUCCESS
 
-        try:
-            team = course.get_team(student.username)
-
-            tms = team.get_team_members()
-            if len(tms) == 0:
-                # Incomplete team creation
-                if not dry_run:
-                    team.add_team_member(student.username, confirmed = True)
-                print "- Added user %s to team %s." % (student.username, team.team_id)
-            elif len(tms) == 1 and tms[0].username == student.username:
-                print "- User %s already has an individual team." % student.username
-            else:
-                print "- ERROR: Team '%s' exists but it has these team members: %s" % (team.team_id, [tm.username for tm in tms])
-            
-        except UnknownObjectException, uoe:
-            if not dry_run:
-                team = course.create_team(student.username)
-                team.add_team_member(student.username, confirmed = True)
-            print "- Created individual team for user %s." % student.username
+
+@click.command(name="load-teams")
+@click.argument('course_id', type=str)
+@click.argument('csv_file', type=click.File('rb'))
+@click.argument('csv_team_column', type=str)
+@click.argument('csv_student_column', type=str)
+@click.option('--assignment', type=str, multiple=True)
+@click.option('--dry-run', is_flag=True)
+@catch_chisubmit_exceptions
+@require_config
+@click.pass_context
+def admin_course_load_teams(ctx, course_id, csv_file, csv_team_column, csv_student_column, assignment, dry_run):
+    course = get_course_or_exit(ctx, course_id)    
+
+    csvf = csv.DictReader(csv_file)
             
-        print
-        
+    for col in [csv_team_column, csv_student_column]:
+        if col not in csvf.fieldnames:
+            print "CSV file %s does not have a '%s' column" % (csv_file, col)
+            ctx.exit(CHISUBMIT_FAIL)
+    
+    # Each row of the CSV file contains one team member
+    teams = {}
+    team_ids = []
+    for entry in csvf:
+        team_id = entry[csv_team_column].strip()
+        username = entry[csv_student_column].strip()
         
-            
+        if team_id not in teams:
+            teams[team_id] = {"team_id": team_id, "students": [], "assignments": list(assignment)}
+            team_ids.append(team_id)
+        teams[team_id]["students"].append(username)
+
+    summary = course.import_teams([teams[team_id] for team_id in team_ids], dry_run = dry_run)
+    print_team_import(summary)
+    
+    if len(summary.conflicts) > 0:
+        ctx.exit(CHISUBMIT_FAIL)
+    else:
+        return CHISUBMIT_SUCCESS
+    
     
 @click.command(name="set-attribute")
 @click.argument('course_id', type=str)
@@ -594,6 +615,7 @@ admin_course.add_command(admin_course_add_student)
 admin_course.add_command(admin_course_load_users)
 admin_course.add_command(admin_course_create_git_users)
 admin_course.add_command(admin_course_create_individual_teams)
+admin_course.add_command(admin_course_load_teams)
 admin_course.add_command(admin_course_set_attribute)
 admin_course.add_command(admin_course_setup_repo)
 admin_course.add_command(admin_course_unsetup_repo)
@@ -289,15 +289,15 @@ class DateTimeParamType(click.ParamType):
 DATETIME = DateTimeParamType()
 
 
-def get_teams_registrations(course, assignment, only_ready_for_grading=False, grader=None, only=None, include_grades=False):
+def get_teams_registrations(course, assignment, only_ready_for_grading=False, grader=None, only=None, include_grades=False, include_students=False, fields=None):
     if only is not None:
         try:
-            team = course.get_team(only, include_assignments=True, include_grades=include_grades)
+            team = course.get_team(only, include_students=include_students, include_assignments=True, include_grades=include_grades, fields=fields)
             teams = [team]
         except UnknownObjectException:
             return {}
     else:
-        teams = course.get_teams(include_assignments=True, include_grades=include_grades)
+        teams = course.iter_teams(include_students=include_students, include_assignments=True, include_grades=include_grades, fields=fields)
 
     rv = {}
     
@@ -1,7 +1,7 @@
 import click
 from chisubmit.cli.common import pass_course, DATETIME, get_assignment_or_exit,\
     catch_chisubmit_exceptions, require_local_config, get_team_or_exit,\
-    get_assignment_registration_or_exit
+    get_assignment_registration_or_exit, get_teams_registrations
 from chisubmit.client.assignment import Assignment
 from chisubmit.common import CHISUBMIT_SUCCESS, CHISUBMIT_FAIL
 from chisubmit.common.utils import convert_datetime_to_utc, create_connection,\
@@ -12,6 +12,8 @@ from chisubmit.cli.shared.assignment import shared_assignment_list,\
 from chisubmit.client.exceptions import UnknownObjectException,\
     BadRequestException
 from chisubmit.cli.student.assignment import print_commit
+from chisubmit.repos.export import SubmissionExporter, get_export_format,\
+    EXPORT_FORMATS, DEFAULT_EXPORT_WORKERS, EXPORT_EXPORTED, EXPORT_FAILED
 
 
 @click.group(name="assignment")
@@ -250,6 +252,60 @@ def instructor_assignment_stats(ctx, course, assignment_id):
     return CHISUBMIT_SUCCESS
 
 
+@click.command(name="export-submissions")
+@click.argument('assignment_id', type=str)
+@click.argument('output', type=click.Path(dir_okay=False, writable=True))
+@click.option('--format', 'export_format', type=click.Choice(EXPORT_FORMATS))
+@click.option('--all-teams', is_flag=True)
+@click.option('--only', type=str)
+@click.option('--workers', type=click.IntRange(min=1), default=DEFAULT_EXPORT_WORKERS)
+@catch_chisubmit_exceptions
+@require_local_config
+@pass_course
+@click.pass_context
+def instructor_assignment_export_submissions(ctx, course, assignment_id, output, export_format, all_teams, only, workers):
+    assignment = get_assignment_or_exit(ctx, course, assignment_id)
+    
+    if export_format is None:
+        export_format = get_export_format(output)
+        if export_format is None:
+            print "Could not tell the format of %s from its extension. Please use --format" % output
+            ctx.exit(CHISUBMIT_FAIL)
+    
+    teams_registrations = get_teams_registrations(course, assignment, only = only, only_ready_for_grading=not all_teams)
+
+    if len(teams_registrations) == 0:
+        ctx.exit(CHISUBMIT_FAIL)
+
+    conn = create_connection(course, ctx.obj['config'])
+    if conn is None:
+        print "Could not connect to git server."
+        ctx.exit(CHISUBMIT_FAIL)
+        
+    exporter = SubmissionExporter(ctx.obj['config'], course, assignment, workers = workers)
+    
+    failed = False
+    for team, registration, status, error in exporter.export_submissions(teams_registrations, conn):
+        if status == EXPORT_FAILED:
+            failed = True
+            print "%40s -- %s (%s)" % (team.team_id, status, error)
+        elif status == EXPORT_EXPORTED:
+            print "%40s -- %s (%s)" % (team.team_id, status, registration.final_submission.commit_sha)
+        else:
+            print "%40s -- %s" % (team.team_id, status)
+            
+    n_exported = exporter.write_archive(teams_registrations, output, export_format)
+    
+    print
+    print "Wrote %i submissions to %s" % (n_exported, output)
+
+    if failed:
+        print "WARNING: Some submissions could not be exported"
+        ctx.exit(CHISUBMIT_FAIL)
+
+    return CHISUBMIT_SUCCESS
+
+
 instructor_assignment.add_command(shared_assignment_list)
 instructor_assignment.add_command(shared_assignment_set_attribute)
 
@@ -258,4 +314,5 @@ instructor_assignment.add_command(instructor_assignment_add_rubric_component)
 instructor_assignment.add_command(instructor_assignment_register)
 instructor_assignment.add_command(instructor_assignment_submit)
 instructor_assignment.add_command(instructor_assignment_stats)
+instructor_assignment.add_command(instructor_assignment_export_submissions)
 
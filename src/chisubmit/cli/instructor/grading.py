@@ -2,6 +2,7 @@ import click
 
 from chisubmit.common import CHISUBMIT_SUCCESS, CHISUBMIT_FAIL
 from chisubmit.repos.grading import GradingGitRepo
+from chisubmit.repos.local import CLONE_FULL, CLONE_PARTIAL, CLONE_SHALLOW
 from chisubmit.rubric import RubricFile, ChisubmitRubricException
 from chisubmit.cli.common import create_grading_repos,\
     gradingrepo_push_grading_branch, gradingrepo_pull_grading_branch,\
@@ -9,16 +10,20 @@ from chisubmit.cli.common import create_grading_repos,\
     get_assignment_registration_or_exit, get_grader_or_exit,\
     catch_chisubmit_exceptions, require_local_config, validate_repo_rubric
 from chisubmit.cli.common import pass_course
-from chisubmit.common.utils import create_connection
+from chisubmit.common.utils import create_connection, compute_grade_stats,\
+    is_submission_ready_for_grading, get_grading_status,\
+    GRADING_STATUS_NOT_SUBMITTED, GRADING_STATUS_NOT_READY, GRADING_STATUS_UNGRADED,\
+    GRADING_STATUS_PARTIALLY_GRADED, GRADING_STATUS_GRADED
+from chisubmit.client.concurrency import AsyncChisubmit
+from chisubmit.grading import GraderAssignment, GraderAssignmentException,\
+    compute_workloads, WORKLOAD_REMAINDER
 
 import csv
 import operator
-import random
-import itertools
 import os.path
+import threading
 import yaml
-from chisubmit.client.exceptions import UnknownObjectException
-import math
+from chisubmit.client.exceptions import UnknownObjectException, BadRequestException
 
 @click.group(name="grading")
 @click.pass_context
@@ -234,12 +239,19 @@ def instructor_grading_list_grades(ctx, course, detailed):
 @pass_course
 @click.pass_context
 def instructor_grading_assign_grader(ctx, course, assignment_id, team_id, grader_id):
-    team = get_team_or_exit(ctx, course, team_id)
-    grader = get_grader_or_exit(ctx, course, grader_id)
+    assignment = get_assignment_or_exit(ctx, course, assignment_id)
 
-    registration = get_assignment_registration_or_exit(ctx, team, assignment_id)
+    # The server checks that the team is registered for the assignment,
+    # and that the grader is a grader in the course
+    try:
+        assignment.bulk_update_registrations([{"team_id": team_id,
+                                               "grader_username": grader_id}])
+    except BadRequestException, bre:
+        print "ERROR: Could not assign grader %s to team %s. The server reported the following errors:" % (grader_id, team_id)
+        bre.print_errors()
+        ctx.exit(CHISUBMIT_FAIL)
 
-    registration.grader_username = grader.username
+    return CHISUBMIT_SUCCESS
 
 @click.command(name="assign-graders")
 @click.argument('assignment_id', type=str)
@@ -282,110 +294,74 @@ def instructor_grading_assign_graders(ctx, course, assignment_id, from_assignmen
                 ctx.exit(CHISUBMIT_FAIL)
     else:
         graders = course.get_graders()
-        grader_workload = {g.user.username: "remainder" for g in graders}
+        grader_workload = {g.user.username: WORKLOAD_REMAINDER for g in graders}
 
     if len(graders) == 0:
         print "ERROR: No graders."
         ctx.exit(CHISUBMIT_FAIL)
             
-    teams_registrations = get_teams_registrations(course, assignment)
-    teams = teams_registrations.keys()
+    # Load everything the assignment depends on up front, so that solving
+    # the assignment itself does not require any further requests.
+    conflicts = dict([(g.user.username, g.get_conflicts()) for g in graders])
+    include_students = any([len(c) > 0 for c in conflicts.values()])
 
-    n_teams = len(teams)
-    teams_per_grader = {}
-    teams_per_grader_assigned = dict([(g.user.username, 0) for g in graders])    
-    assigned = 0
-    graders_assigned_remainder = []
-    for username, workload in grader_workload.items():
-        if workload != "remainder":
-            if not isinstance(workload, int) or workload <= 0:
-                print "Invalid workload for grader '%s': %s" % (username, workload)
-            teams_per_grader[username] = workload
-            assigned += workload
-        else:
-            teams_per_grader[username] = None
-            graders_assigned_remainder.append(username)
-                        
-    min_teams_per_grader = (n_teams - assigned) / len(graders_assigned_remainder)
-    extra_teams = (n_teams - assigned) % len(graders_assigned_remainder)
-
-    for username in teams_per_grader:
-        if teams_per_grader[username] is None:
-            teams_per_grader[username] = min_teams_per_grader
-            
-    random.seed(course.course_id + assignment_id)
-    random.shuffle(graders_assigned_remainder)
+    teams_registrations = get_teams_registrations(course, assignment, include_students=include_students)
 
-    # so many graders in this course that some will end up expecting zero
-    # teams to grade. Make sure they are able to get at least one.
-    for username in graders_assigned_remainder[:extra_teams]:
-        teams_per_grader[username] += 1
-    
-    assert sum([v for v in teams_per_grader.values()]) == n_teams
+    try:
+        teams_per_grader = compute_workloads(grader_workload, len(teams_registrations), seed=course.course_id + assignment_id)
+    except GraderAssignmentException, gae:
+        print gae.message
+        ctx.exit(CHISUBMIT_FAIL)
 
-    team_grader = {t.team_id: None for t in teams_registrations.keys()}
+    teams_per_grader_assigned = dict([(username, 0) for username in teams_per_grader])
 
+    continuity = {}
     if from_assignment is not None:
-        from_assignment_registrations = get_teams_registrations(course, from_assignment)
-        
-        common_teams = [t for t in teams if teams_registrations.has_key(t) and from_assignment_registrations.has_key(t)]
-        for t in common_teams:
-            registration = from_assignment_registrations[t]
-
-            # try to assign the same grader that would grade the same team's other assignment
-            grader = registration.grader
-            if grader is not None and teams_per_grader[grader.user.username] > 0:
-                team_grader[t.team_id] = grader.user.username 
-                teams_per_grader[grader.user.username] -= 1
-                teams_per_grader_assigned[grader.user.username] += 1
+        for t, registration in get_teams_registrations(course, from_assignment).items():
+            if registration.grader_username is not None:
+                continuity[t.team_id] = registration.grader_username
 
+    avoid = {}
     if avoid_assignment is not None:
-        avoid_assignment_registrations = get_teams_registrations(course, avoid_assignment)
-
-    if not reset:
-        for t in teams:
-            if teams_registrations[t].grader is None:
-                team_grader[t.team_id] = None
-            else:
-                grader_id = teams_registrations[t].grader.user.username
-                team_grader[t.team_id] = grader_id
-                teams_per_grader[grader_id] = max(0, teams_per_grader[grader_id] - 1)
-                teams_per_grader_assigned[grader_id] += 1
+        for t, registration in get_teams_registrations(course, avoid_assignment).items():
+            if registration.grader_username is not None:
+                avoid[t.team_id] = registration.grader_username
 
+    team_grader = {}
+    team_members = {}
     not_ready_for_grading = []
-    ta_avoid = {}
-    graders_cycle = itertools.cycle(graders)
     for team, registration in teams_registrations.items():
-        if team_grader[team.team_id] is not None:
-            continue
-
-        if not registration.is_ready_for_grading():
+        team_grader[team.team_id] = None
+
+        if not reset and registration.grader_username is not None:
+            grader_id = registration.grader_username
+            team_grader[team.team_id] = grader_id
+            teams_per_grader[grader_id] = max(0, teams_per_grader.get(grader_id, 0) - 1)
+            teams_per_grader_assigned[grader_id] = teams_per_grader_assigned.get(grader_id, 0) + 1
+        elif not registration.is_ready_for_grading():
             not_ready_for_grading.append(team.team_id)
-            continue
-
-        for g in graders_cycle:
-            if teams_per_grader[g.user.username] == 0:
-                continue
-            else:
-                if avoid_assignment is not None:
-                    avoid_registration = ta_avoid.setdefault(team.team_id, avoid_assignment_registrations.get(team))
-                    if avoid_registration is not None and avoid_registration.grader.user.username == grader.user.username:
-                        continue
-                
-                valid = True
-                for tm in team.get_team_members():
-                    conflicts = g.get_conflicts()
-                    if tm.username in conflicts:
-                        valid = False
-                        break
-
-                if valid:
-                    team_grader[team.team_id] = g.user.username 
-                    teams_per_grader[g.user.username] -= 1
-                    teams_per_grader_assigned[g.user.username] += 1                        
-                    break                    
-    
-    for team, registration in teams_registrations.items():
+        elif include_students:
+            team_members[team.team_id] = [tm.username for tm in team.get_team_members()]
+        else:
+            team_members[team.team_id] = []
+
+    grader_assignment = GraderAssignment(team_ids = team_members.keys(),
+                                         workloads = teams_per_grader,
+                                         team_members = team_members,
+                                         conflicts = conflicts,
+                                         continuity = continuity,
+                                         avoid = avoid)
+
+    for team_id, grader_id in grader_assignment.solve().items():
+        if grader_id is not None:
+            team_grader[team_id] = grader_id
+            teams_per_grader[grader_id] -= 1
+            teams_per_grader_assigned[grader_id] += 1
+
+    updates = []
+    teams = sorted(teams_registrations.keys(), key=operator.attrgetter("team_id"))
+    for team in teams:
+        registration = teams_registrations[team]
         if team_grader[team.team_id] is None:
             if team.team_id not in not_ready_for_grading:
                 print "Team %s has no grader" % (team.team_id)
@@ -394,12 +370,17 @@ def instructor_grading_assign_graders(ctx, course, assignment_id, from_assignmen
         else:
             if not dry_run:
                 if registration.grader_username != team_grader[team.team_id]:
-                    registration.grader_username = team_grader[team.team_id]
+                    updates.append({"team_id": team.team_id,
+                                    "grader_username": team_grader[team.team_id]})
             else:
                 print "%s: %s" % (team.team_id, team_grader[team.team_id])
+
+    if len(updates) > 0:
+        assignment.bulk_update_registrations(updates)
     print 
-    for grader_id, assigned in teams_per_grader_assigned.items():
-        if teams_per_grader[grader_id] != 0:
+    for grader_id in sorted(teams_per_grader_assigned):
+        assigned = teams_per_grader_assigned[grader_id]
+        if teams_per_grader.get(grader_id, 0) != 0:
             print grader_id, assigned, "(still needs to be assigned %i more assignments)" % (teams_per_grader[grader_id])
         else:
             print grader_id, assigned
@@ -422,7 +403,8 @@ def instructor_grading_list_grader_assignments(ctx, course, assignment_id, grade
     else:
         grader = None
 
-    teams_registrations = get_teams_registrations(course, assignment)
+    teams_registrations = get_teams_registrations(course, assignment, 
+                                                  fields = ["team_id", "assignments.assignment_id", "assignments.grader"])
     
     teams = teams_registrations.keys()
     teams.sort(key=operator.attrgetter("team_id"))
@@ -451,7 +433,9 @@ def instructor_grading_list_grader_assignments(ctx, course, assignment_id, grade
 def instructor_grading_list_submissions(ctx, course, assignment_id):
     assignment = get_assignment_or_exit(ctx, course, assignment_id)
 
-    teams_registrations = get_teams_registrations(course, assignment)
+    teams_registrations = get_teams_registrations(course, assignment,
+                                                  fields = ["team_id", "assignments.assignment_id", 
+                                                            "assignments.assignment", "assignments.final_submission"])
     teams = sorted(teams_registrations.keys(), key=operator.attrgetter("team_id"))
 
     conn = create_connection(course, ctx.obj['config'])
@@ -460,13 +444,31 @@ def instructor_grading_list_submissions(ctx, course, assignment_id):
         print "Could not connect to git server."
         ctx.exit(CHISUBMIT_FAIL)
 
+    # Look up the commits concurrently. The git server connection may not 
+    # be thread-safe, so each thread creates its own.
+    local = threading.local()
+    def get_commit(team, commit_sha):
+        if not hasattr(local, "conn"):
+            local.conn = create_connection(course, ctx.obj['config'])
+        return local.conn.get_commit(course, team, commit_sha)
+
+    with AsyncChisubmit.from_client(ctx.obj["client"]) as async_client:
+        submission_commits = {}
+        for team in teams:
+            registration = teams_registrations[team]
+            if registration.final_submission is not None:
+                submission_commits[team] = async_client.run(get_commit, team, registration.final_submission.commit_sha)
+
+        for team in teams:
+            submission_commits[team] = submission_commits[team].get() if team in submission_commits else None
+
     for team in teams:
         registration = teams_registrations[team]
 
         if registration.final_submission is None:
             print "%25s NOT SUBMITTED" % team.team_id
         else:
-            submission_commit = conn.get_commit(course, team, registration.final_submission.commit_sha)
+            submission_commit = submission_commits[team]
             if submission_commit is not None:
                 if registration.is_ready_for_grading():
                     print "%25s SUBMITTED (READY for grading)" % team.team_id
@@ -478,23 +480,31 @@ def instructor_grading_list_submissions(ctx, course, assignment_id):
     return CHISUBMIT_SUCCESS
 
 
-def print_grades_stats(grades):
-    grades.sort()
-    avg = sum(grades) / len(grades)
-    stdev = math.sqrt(sum([(x-avg)**2 for x in grades])/len(grades))
+def print_grades_stats(stats):
     print
-    print "     Average grade: %.2f" % avg
-    print "Standard deviation: %.2f" % stdev
+    print "     Average grade: %.2f" % stats["average"]
+    print "Standard deviation: %.2f" % stats["stddev"]
     print
-    print "               Max: %.2f" % grades[-1]
-    print "    Upper Quartile: %.2f" % grades[ int(len(grades)*0.75) ]
-    print "            Median: %.2f" % grades[ int(len(grades)*0.5) ]
-    print "    Lower Quartile: %.2f" % grades[ int(len(grades)*0.25) ]
-    print "               Min: %.2f" % grades[0]
+    print "               Max: %.2f" % stats["max"]
+    print "    Upper Quartile: %.2f" % stats["upper_quartile"]
+    print "            Median: %.2f" % stats["median"]
+    print "    Lower Quartile: %.2f" % stats["lower_quartile"]
+    print "               Min: %.2f" % stats["min"]
     print
 
 
 
+# How show-grading-status --use-stored-grades shows each grading status
+STORED_GRADING_STATUSES = {GRADING_STATUS_NOT_SUBMITTED: "NOT SUBMITTED",
+                           GRADING_STATUS_NOT_READY: "NOT READY",
+                           GRADING_STATUS_UNGRADED: "NOT GRADED",
+                           GRADING_STATUS_PARTIALLY_GRADED: "PARTIALLY GRADED",
+                           GRADING_STATUS_GRADED: "GRADED"}
+
+def get_grading_diff_url(course, team, assignment, registration):
+    commit_sha = registration.final_submission.commit_sha[:8]
+    return "https://mit.cs.uchicago.edu/%s-staging/%s/compare/%s...%s-grading" % (course.course_id, team.team_id, commit_sha, assignment.assignment_id)
+
 @click.command(name="show-grading-status")
 @click.argument('assignment_id', type=str)
 @click.option('--by-grader', is_flag=True)
@@ -527,10 +537,21 @@ def instructor_grading_show_grading_status(ctx, course, assignment_id, by_grader
         diff_url = ""
         
         if use_stored_grades:
+            # We classify the registration like the server does when 
+            # computing the statistics we print with --by-grader
             grades = registration.get_grades()
             total_grade = registration.get_total_grade()
             
-            graded_rc_ids = [g.rubric_component_id for g in grades]            
+            submitted = registration.final_submission is not None
+            ready = submitted and is_submission_ready_for_grading(assignment_deadline=assignment.deadline,
+                                                                  submission_date=registration.final_submission.submitted_at,
+                                                                  extensions_used=registration.final_submission.extensions_used,
+                                                                  assignment_grace_period=assignment.grace_period)
+            status = get_grading_status(submitted, ready, len(grades), len(rubric_components))
+            grading_status = STORED_GRADING_STATUSES[status]
+            
+            if include_diff_urls and status in (GRADING_STATUS_PARTIALLY_GRADED, GRADING_STATUS_GRADED):
+                diff_url = get_grading_diff_url(course, team, assignment, registration)
         else:
             total_grade = 0.0
             repo = GradingGitRepo.get_grading_repo(ctx.obj['config'], course, team, registration)
@@ -580,8 +601,7 @@ def instructor_grading_show_grading_status(ctx, course, assignment_id, by_grader
 
             
             if include_diff_urls and has_some:
-                commit_sha = registration.final_submission.commit_sha[:8]
-                diff_url = "https://mit.cs.uchicago.edu/%s-staging/%s/compare/%s...%s-grading" % (course.course_id, team.team_id, commit_sha, assignment.assignment_id)
+                diff_url = get_grading_diff_url(course, team, assignment, registration)
             
         team_status.append((team.team_id, grader_str, total_grade, diff_url, grading_status))
 
@@ -589,7 +609,21 @@ def instructor_grading_show_grading_status(ctx, course, assignment_id, by_grader
         for team, grader, total_grade, diff_url, status in team_status:
             print "%-40s %-20s %-20.2f %10s  %s" % (team, status, total_grade, grader, diff_url)
     else:
-        all_grades = []
+        if use_stored_grades:
+            # With the stored grades, use the same statistics the server
+            # reports, instead of recomputing them here.
+            assignment_stats = assignment.get_stats()
+            grader_stats = {}
+            for gs in assignment_stats.graders:
+                if gs.grader_username is None:
+                    grader_stats["<no grader assigned>"] = gs.total
+                else:
+                    grader_stats[gs.grader_username] = gs.total
+            total_stats = assignment_stats.total
+        else:
+            grader_stats = None
+            all_grades = []
+
         for grader in sorted(list(graders)):
             print grader
             print "-" * len(grader)
@@ -599,22 +633,30 @@ def instructor_grading_show_grading_status(ctx, course, assignment_id, by_grader
             team_status_grader = [ts for ts in team_status if ts[1] == grader]
             
             for team, _, total_grade, diff_url, status in team_status_grader:
-                if status == "NOT GRADED":
+                if status in ("NOT GRADED", "NOT SUBMITTED", "NOT READY"):
                     print "%-40s %s  %s" % (team, status, diff_url)
                 else:
                     print "%-40s %s %8.2f  %s" % (team, status, total_grade, diff_url)
                     if status == "GRADED":
                         grades.append(total_grade)
-                        
-            if len(grades) > 0:
+
+            if grader_stats is None:
                 all_grades += grades
-                print_grades_stats(grades)
+                stats = compute_grade_stats(grades)
+            else:
+                stats = grader_stats.get(grader)
+
+            if stats is not None and stats["count"] > 0:
+                print_grades_stats(stats)
             print
 
-        if len(all_grades) > 0:
+        if grader_stats is None:
+            total_stats = compute_grade_stats(all_grades)
+
+        if total_stats["count"] > 0:
             print "TOTAL"
             print "-----"
-            print_grades_stats(all_grades)
+            print_grades_stats(total_stats)
 
     return CHISUBMIT_SUCCESS
 
@@ -623,13 +665,26 @@ def instructor_grading_show_grading_status(ctx, course, assignment_id, by_grader
 @click.option('--all-teams', is_flag=True)
 @click.option('--only', type=str)
 @click.option('--master', is_flag=True)
+@click.option('--partial', is_flag=True)
+@click.option('--shallow', is_flag=True)
 @catch_chisubmit_exceptions
 @require_local_config
 @pass_course
 @click.pass_context
-def instructor_grading_create_grading_repos(ctx, course, assignment_id, all_teams, only, master):
+def instructor_grading_create_grading_repos(ctx, course, assignment_id, all_teams, only, master, partial, shallow):
     assignment = get_assignment_or_exit(ctx, course, assignment_id)
     
+    if partial and shallow:
+        print "--partial and --shallow are mutually exclusive"
+        ctx.exit(CHISUBMIT_FAIL)
+        
+    if partial:
+        clone_mode = CLONE_PARTIAL
+    elif shallow:
+        clone_mode = CLONE_SHALLOW
+    else:
+        clone_mode = CLONE_FULL
+    
     teams_registrations = get_teams_registrations(course, assignment, only = only, only_ready_for_grading=not all_teams)
 
     if len(teams_registrations) == 0:
@@ -644,7 +699,8 @@ def instructor_grading_create_grading_repos(ctx, course, assignment_id, all_team
         if repo is None:
             print ("%40s -- Creating grading repo... " % team.team_id),
                 
-            repo = GradingGitRepo.create_grading_repo(ctx.obj['config'], course, team, registration, staging_only = not master)
+            repo = GradingGitRepo.create_grading_repo(ctx.obj['config'], course, team, registration, staging_only = not master,
+                                                      clone_mode = clone_mode)
             repo.sync()
             
             if registration.final_submission is not None:
@@ -58,7 +58,7 @@ def instructor_team_pull_repos(ctx, course, assignment_id, directory, only_ready
                 r = LocalGitRepo.create_repo(team_dir, clone_from_url=team_git_url)
                 msg = "Cloned repo"
             else:
-                r = LocalGitRepo(team_dir)
+                r = LocalGitRepo.open(team_dir)
                 if reset:
                     r.fetch("origin")
                     r.reset_branch("origin", "master")
@@ -153,7 +153,7 @@ def student_assignment_cancel_registration(ctx, course, assignment_id, yes):
 @pass_course
 @click.pass_context
 def student_assignment_show_deadline(ctx, course, assignment_id, utc):
-    assignment = course.get_assignment(assignment_id)
+    assignment = course.get_assignment(assignment_id, fields = ["name", "deadline"])
     if assignment is None:
         print "Assignment %s does not exist" % assignment_id
         ctx.exit(CHISUBMIT_FAIL)
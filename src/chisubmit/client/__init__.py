@@ -29,31 +29,87 @@
 
 import chisubmit.client.course
 from chisubmit.client.requester import Requester
+from chisubmit.client.session import IdentityMap, Session
+from chisubmit.client.types import fields_params
+from contextlib import contextmanager
 
 class Chisubmit(object):
     
-    def __init__(self, login_or_token, base_url, password = None, deferred_save = False):
+    def __init__(self, login_or_token, base_url, password = None, deferred_save = False, use_msgpack = None):
         # TODO: Validate URL 
         
-        self._requester = Requester(login_or_token, password, base_url.rstrip("/"))
+        self._requester = Requester(login_or_token, password, base_url.rstrip("/"), use_msgpack = use_msgpack)
         self._deferred_save = deferred_save
+        self._identity_map = IdentityMap(self._requester)
+        self._session = None
+        
+    @contextmanager
+    def session(self):
+        """
+        Unit of work. Edits made to API objects inside the with block
+        are collected, and sent to the server in a single request when
+        the block exits. If the block raises an exception, the edits
+        are discarded.
+        
+            with client.session():
+                for team in teams:
+                    team.extensions = 2
+        """
+        if self._session is not None:
+            # Nested sessions are part of the outermost one
+            yield self._session
+            return
+        
+        session = Session(self)
+        self._session = session
+        try:
+            yield session
+        except:
+            self._session = None
+            session.discard()
+            raise
+        
+        self._session = None
+        session.flush()
+
+    def _get_object(self, klass, resource, params = None, fields = None):
+        """
+        Returns the object for a resource, from the identity map if 
+        we already have an up-to-date copy of it, or from the server
+        otherwise. If fields is specified, only those fields are
+        requested (the rest will be fetched if they are accessed).
+        """
+        if params is None:
+            obj = self._identity_map.get_fresh(self._requester.absolute_url(resource), klass)
+            if obj is not None:
+                return obj
+            
+        headers, data = self._requester.request(
+            "GET",
+            resource,
+            params = fields_params(params, fields)
+        )
+        return klass(self, headers, data)
     
-    def get_courses(self):
+    def get_courses(self, fields = None):
         """
         :calls: GET /courses/
+        :param fields: list of strings (optional)
         :rtype: List of :class:`chisubmit.client.course.Course`
         """
         
         headers, data = self._requester.request(
             "GET",
-            "/courses/"
+            "/courses/",
+            params = fields_params(None, fields)
         )
         return [chisubmit.client.course.Course(self, headers, elem) for elem in data]    
     
-    def get_course(self, course_id, include_users=False, include_assignments=False, include_teams=False):
+    def get_course(self, course_id, include_users=False, include_assignments=False, include_teams=False, fields = None):
         """
         :calls: GET /courses/:course
         :param course_id: string
+        :param fields: list of strings (optional)
         :rtype: :class:`chisubmit.client.course.Course`
         """
         assert isinstance(course_id, (str, unicode)), course_id
@@ -77,12 +133,7 @@ class Chisubmit(object):
         else:
             params = None            
         
-        headers, data = self._requester.request(
-            "GET",
-            "/courses/" + course_id,
-            params = params
-        )
-        return chisubmit.client.course.Course(self, headers, data)
+        return self._get_object(chisubmit.client.course.Course, "/courses/" + course_id, params, fields)
  
     def create_course(self, course_id, name, git_usernames = None, git_staging_usernames = None, 
                       extension_policy = None, default_extensions = None):
@@ -129,6 +180,23 @@ class Chisubmit(object):
         )
         return [chisubmit.client.users.User(self, headers, elem) for elem in data]    
     
+    def iter_users(self):
+        """
+        Like get_users, but returns a generator that creates each user
+        as it is read from the response.
+        
+        :calls: GET /users/
+        :rtype: Generator of :class:`chisubmit.client.users.User`
+        """
+        
+        headers, data = self._requester.request(
+            "GET",
+            "/users/",
+            stream = True
+        )
+        for elem in data:
+            yield chisubmit.client.users.User(self, headers, elem)
+    
     def get_user(self, username = None):
         """
         :calls: GET /users/:username or GET /user
@@ -142,12 +210,9 @@ class Chisubmit(object):
                 "GET",
                 "/user"
             )            
+            return chisubmit.client.users.User(self, headers, data)
         else:        
-            headers, data = self._requester.request(
-                "GET",
-                "/users/" + username
-            )
-        return chisubmit.client.users.User(self, headers, data)
+            return self._get_object(chisubmit.client.users.User, "/users/" + username)
     
     def get_user_token(self, username = None, reset=False):
         """
@@ -29,7 +29,7 @@
 
 from chisubmit.client.types import ChisubmitAPIObject, Attribute, APIStringType,\
     APIIntegerType, APIDateTimeType, APIDecimalType, APIBooleanType,\
-    APIObjectType, APIListType, Relationship, APITimeDeltaType
+    APIObjectType, APIListType, APIDictType, Relationship, APITimeDeltaType
 
 class RubricComponent(ChisubmitAPIObject):
 
@@ -95,13 +95,13 @@ class Assignment(ChisubmitAPIObject):
     
     
     
-    def get_rubric_components(self):
+    def get_rubric_components(self, fields = None):
         """
         :calls: GET /courses/:course/assignments/:assignment/rubric
         :rtype: List of :class:`chisubmit.client.assignment.RubricComponent`
         """
         
-        rubric_components = self.get_related("rubric")
+        rubric_components = self.get_related("rubric", fields = fields)
         
         return rubric_components
     
@@ -146,6 +146,42 @@ class Assignment(ChisubmitAPIObject):
         )
         return RegistrationResponse(self._api_client, headers, data)       
     
+    def bulk_update_registrations(self, updates):
+        """
+        :calls: PATCH /courses/:course/assignments/:assignment/registrations/
+        :param updates: list of dicts, each with a "team_id" and any of
+                        "grader_username", "grade_adjustments",
+                        and "final_submission_id"
+        :rtype: List of :class:`chisubmit.client.assignment.RegistrationUpdateResponse`
+        """
+        assert isinstance(updates, (list, tuple)), updates
+        assert all(["team_id" in u for u in updates]), updates
+        
+        headers, data = self._api_client._requester.request(
+            "PATCH",
+            self.url + "/registrations/",
+            data = list(updates)
+        )
+        return [RegistrationUpdateResponse(self._api_client, headers, elem) for elem in data]
+
+    def get_stats(self, bins = None):
+        """
+        :calls: GET /courses/:course/assignments/:assignment/stats
+        :param bins: number of bins in the histogram of total grades
+        :rtype: :class:`chisubmit.client.assignment.AssignmentStats`
+        """
+        if bins is None:
+            params = None
+        else:
+            params = {"bins": bins}
+        
+        headers, data = self._api_client._requester.request(
+            "GET",
+            self.url + "/stats",
+            params = params
+        )
+        return AssignmentStats(self._api_client, headers, data)
+    
   
     
 class RegistrationResponse(ChisubmitAPIObject):
@@ -171,6 +207,115 @@ class RegistrationResponse(ChisubmitAPIObject):
                       }
     
     _api_relationships = { }
+
+
+class RegistrationUpdateResponse(ChisubmitAPIObject):
+    
+    _api_attributes = {
+
+                       "team_id": Attribute(name="team_id", 
+                                            attrtype=APIStringType, 
+                                            editable=False),  
+                       
+                       "updated": Attribute(name="updated", 
+                                            attrtype=APIBooleanType, 
+                                            editable=False),  
+                      }
+    
+    _api_relationships = { }
+
+
+class RubricComponentStats(ChisubmitAPIObject):
+    
+    _api_attributes = {
+
+                       "rubric_component_id": Attribute(name="rubric_component_id", 
+                                                        attrtype=APIIntegerType, 
+                                                        editable=False),  
+
+                       "description": Attribute(name="description", 
+                                                attrtype=APIStringType, 
+                                                editable=False),  
+
+                       "points": Attribute(name="points", 
+                                           attrtype=APIDecimalType, 
+                                           editable=False),  
+
+                       "count": Attribute(name="count", 
+                                          attrtype=APIIntegerType, 
+                                          editable=False),  
+
+                       "average": Attribute(name="average", 
+                                            attrtype=APIDecimalType, 
+                                            editable=False),  
+
+                       "stddev": Attribute(name="stddev", 
+                                           attrtype=APIDecimalType, 
+                                           editable=False),  
+
+                       "min": Attribute(name="min", 
+                                        attrtype=APIDecimalType, 
+                                        editable=False),  
+
+                       "max": Attribute(name="max", 
+                                        attrtype=APIDecimalType, 
+                                        editable=False),  
+                      }
+    
+    _api_relationships = { }
+
+
+class GraderStats(ChisubmitAPIObject):
+    
+    _api_attributes = {
+
+                       "grader_username": Attribute(name="grader_username", 
+                                                    attrtype=APIStringType, 
+                                                    editable=False),  
+
+                       "registrations": Attribute(name="registrations", 
+                                                  attrtype=APIDictType(APIIntegerType), 
+                                                  editable=False),  
+
+                       "total": Attribute(name="total", 
+                                          attrtype=APIDictType(APIDecimalType), 
+                                          editable=False),  
+                      }
+    
+    _api_relationships = { }
+
+
+class AssignmentStats(ChisubmitAPIObject):
     
+    _api_attributes = {
+
+                       "assignment_id": Attribute(name="assignment_id", 
+                                                  attrtype=APIStringType, 
+                                                  editable=False),  
+
+                       "points_possible": Attribute(name="points_possible", 
+                                                    attrtype=APIDecimalType, 
+                                                    editable=False),  
+
+                       "registrations": Attribute(name="registrations", 
+                                                  attrtype=APIDictType(APIIntegerType), 
+                                                  editable=False),  
+
+                       "total": Attribute(name="total", 
+                                          attrtype=APIDictType(APIDecimalType), 
+                                          editable=False),  
+
+                       "histogram": Attribute(name="histogram", 
+                                              attrtype=APIDictType(APIListType(APIDecimalType)), 
+                                              editable=False),  
+
+                       "rubric_components": Attribute(name="rubric_components", 
+                                                      attrtype=APIListType(APIObjectType(RubricComponentStats)), 
+                                                      editable=False),  
+
+                       "graders": Attribute(name="graders", 
+                                            attrtype=APIListType(APIObjectType(GraderStats)), 
+                                            editable=False),  
+                      }
     
-        
\ No newline at end of file
+    _api_relationships = { }
@@ -0,0 +1,169 @@
+#  Copyright (c) 2013-2014, The University of Chicago
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions are met:
+#
+#  - Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+#  - Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+#  - Neither the name of The University of Chicago nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+#  AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+#  IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+#  ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+#  LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+#  CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+#  SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+#  INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+#  CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+#  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+
+from multiprocessing.pool import ThreadPool
+from chisubmit.client import Chisubmit
+from chisubmit.client.types import ChisubmitAPIObject
+
+DEFAULT_MAX_CONCURRENCY = 8
+
+class AsyncChisubmit(object):
+    """
+    Concurrent version of the Chisubmit client. It has the same methods
+    as Chisubmit (and the objects it returns have the same methods as 
+    Course, Team, Registration, etc.) but, instead of blocking on the 
+    request, each method returns a future (an AsyncResult; its result is
+    obtained with get()). At most max_concurrency requests are in flight 
+    at any given time.
+    
+        c = AsyncChisubmit(api_key, base_url = api_url)
+        course = c.get_course("cmsc40100").get()
+        teams = c.gather(*[course.get_team(team_id) for team_id in team_ids])
+        
+    The returned objects are proxies around the regular API objects (from 
+    chisubmit.client.types), which can be obtained with the sync attribute.
+    Setting attributes on a proxy is synchronous.
+    """
+    
+    def __init__(self, login_or_token, base_url, password = None, max_concurrency = DEFAULT_MAX_CONCURRENCY):
+        self._init(Chisubmit(login_or_token, base_url, password = password), max_concurrency)
+    
+    @classmethod
+    def from_client(cls, client, max_concurrency = DEFAULT_MAX_CONCURRENCY):
+        """
+        Creates an AsyncChisubmit that shares the connection settings and
+        the identity map of an existing (synchronous) Chisubmit client.
+        """
+        async_client = cls.__new__(cls)
+        async_client._init(client, max_concurrency)
+        return async_client
+        
+    def _init(self, client, max_concurrency):
+        assert max_concurrency > 0, max_concurrency
+        self.sync = client
+        self.max_concurrency = max_concurrency
+        self._pool = ThreadPool(max_concurrency)
+        
+    def __getattr__(self, name):
+        return _wrap(getattr(self.sync, name), self)
+    
+    def run(self, fn, *args, **kwargs):
+        """
+        Runs any function (e.g., one that talks to the git server) 
+        subject to this client's concurrency limit, and returns a future
+        for its result.
+        """
+        return self._pool.apply_async(fn, args, kwargs)
+    
+    def gather(self, *futures):
+        """
+        Waits for all the futures, and returns a list with their
+        results. If any of them raised an exception, it is re-raised.
+        """
+        return [f.get() for f in futures]
+        
+    def close(self):
+        self._pool.close()
+        self._pool.join()
+        
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class AsyncAPIObject(object):
+    """
+    Proxy around a ChisubmitAPIObject, where all methods return futures.
+    """
+    
+    def __init__(self, obj, async_client):
+        object.__setattr__(self, "sync", obj)
+        object.__setattr__(self, "_async_client", async_client)
+        
+    def __getattr__(self, name):
+        return _wrap(getattr(self.sync, name), self._async_client)
+    
+    def __setattr__(self, name, value):
+        setattr(self.sync, name, value)
+        
+    def __eq__(self, other):
+        if isinstance(other, AsyncAPIObject):
+            other = other.sync
+        return self.sync is other
+    
+    def __ne__(self, other):
+        return not self == other
+    
+    def __hash__(self):
+        return id(self.sync)
+        
+    def __repr__(self):
+        return "<Async %r>" % (self.sync,)
+    
+
+def _wrap(value, async_client):
+    if isinstance(value, ChisubmitAPIObject):
+        return AsyncAPIObject(value, async_client)
+    elif isinstance(value, list):
+        return [_wrap(v, async_client) for v in value]
+    elif callable(value) and not isinstance(value, type):
+        def async_method(*args, **kwargs):
+            args = [_unwrap(a) for a in args]
+            kwargs = dict([(k, _unwrap(v)) for k, v in kwargs.items()])
+            return _AsyncResult(async_client.run(value, *args, **kwargs), async_client)
+        return async_method
+    else:
+        return value
+    
+def _unwrap(value):
+    if isinstance(value, AsyncAPIObject):
+        return value.sync
+    else:
+        return value
+    
+
+class _AsyncResult(object):
+    """
+    Future whose result is wrapped in AsyncAPIObject proxies.
+    """
+    
+    def __init__(self, result, async_client):
+        self._result = result
+        self._async_client = async_client
+        
+    def get(self, timeout = None):
+        return _wrap(self._result.get(timeout), self._async_client)
+    
+    def wait(self, timeout = None):
+        self._result.wait(timeout)
+        
+    def ready(self):
+        return self._result.ready()
@@ -31,7 +31,8 @@ import chisubmit.client.users
 import chisubmit.client.assignment
 import chisubmit.client.team
 from chisubmit.client.types import ChisubmitAPIObject, Attribute, AttributeType,\
-    APIStringType, APIIntegerType, Relationship, APIObjectType
+    APIStringType, APIIntegerType, Relationship, APIObjectType, APIBooleanType,\
+    APIListType, APIDictType
 from chisubmit.client.users import User
 import datetime
 
@@ -92,27 +93,24 @@ class Course(ChisubmitAPIObject):
                        
 
 
-    def get_instructors(self):
+    def get_instructors(self, fields = None):
         """
         :calls: GET /courses/:course/instructors/
         :rtype: List of :class:`chisubmit.client.users.Instructor`
         """
         
-        instructors = self.get_related("instructors")
+        instructors = self.get_related("instructors", fields = fields)
         
         return instructors     
 
-    def get_instructor(self, username):
+    def get_instructor(self, username, fields = None):
         """
         :calls: GET /courses/:course/instructors/:instructor
         :rtype: :class:`chisubmit.client.users.Instructor`
         """
         
-        headers, data = self._api_client._requester.request(
-            "GET",
-            "/courses/" + self.course_id + "/instructors/" + username
-        )
-        return chisubmit.client.users.Instructor(self._api_client, headers, data)
+        return self._api_client._get_object(chisubmit.client.users.Instructor,
+                                            "/courses/" + self.course_id + "/instructors/" + username, fields = fields)
     
     def add_instructor(self, user_or_username, git_username = None, git_staging_username = None):
         """
@@ -162,27 +160,24 @@ class Course(ChisubmitAPIObject):
         )
         return None
     
-    def get_graders(self):
+    def get_graders(self, fields = None):
         """
         :calls: GET /courses/:course/graders/
         :rtype: List of :class:`chisubmit.client.users.Grader`
         """
         
-        graders = self.get_related("graders")
+        graders = self.get_related("graders", fields = fields)
         
         return graders     
 
-    def get_grader(self, username):
+    def get_grader(self, username, fields = None):
         """
         :calls: GET /courses/:course/graders/:grader
         :rtype: :class:`chisubmit.client.users.Grader`
         """
         
-        headers, data = self._api_client._requester.request(
-            "GET",
-            "/courses/" + self.course_id + "/graders/" + username
-        )
-        return chisubmit.client.users.Grader(self._api_client, headers, data)    
+        return self._api_client._get_object(chisubmit.client.users.Grader,
+                                            "/courses/" + self.course_id + "/graders/" + username, fields = fields)    
     
     def add_grader(self, user_or_username, git_username = None, git_staging_username = None):
         """
@@ -233,27 +228,24 @@ class Course(ChisubmitAPIObject):
         return None
         
     
-    def get_students(self):
+    def get_students(self, fields = None):
         """
         :calls: GET /courses/:course/students/
         :rtype: List of :class:`chisubmit.client.users.Student`
         """
         
-        students = self.get_related("students")
+        students = self.get_related("students", fields = fields)
         
         return students     
     
-    def get_student(self, username):
+    def get_student(self, username, fields = None):
         """
         :calls: GET /courses/:course/students/:grader
         :rtype: :class:`chisubmit.client.users.Student`
         """
         
-        headers, data = self._api_client._requester.request(
-            "GET",
-            "/courses/" + self.course_id + "/students/" + username
-        )
-        return chisubmit.client.users.Student(self._api_client, headers, data)        
+        return self._api_client._get_object(chisubmit.client.users.Student,
+                                            "/courses/" + self.course_id + "/students/" + username, fields = fields)        
     
     def add_student(self, user_or_username, git_username = None, extensions = None, dropped = None):
         """
@@ -305,7 +297,32 @@ class Course(ChisubmitAPIObject):
         )
         return None      
     
-    def get_assignments(self, include_rubric = False):
+    def sync_roster(self, users, drop_missing = False, update_users = False, dry_run = False):
+        """
+        :calls: POST /courses/:course/roster:sync
+        :param users: list of dicts, each with a "username", "first_name",
+                      "last_name", "email", and "user_type" ("student",
+                      "instructor", or "grader")
+        :param drop_missing: bool
+        :param update_users: bool
+        :param dry_run: bool
+        :rtype: :class:`chisubmit.client.course.RosterSyncResponse`
+        """
+        assert isinstance(users, (list, tuple)), users
+        
+        post_data = {"users": list(users),
+                     "drop_missing": drop_missing,
+                     "update_users": update_users,
+                     "dry_run": dry_run}
+        
+        headers, data = self._api_client._requester.request(
+            "POST",
+            "/courses/" + self.course_id + "/roster:sync",
+            data = post_data
+        )
+        return RosterSyncResponse(self._api_client, headers, data)
+    
+    def get_assignments(self, include_rubric = False, fields = None):
         """
         :calls: GET /courses/:course/assignments/
         :rtype: List of :class:`chisubmit.client.assignment.Assignment`
@@ -321,11 +338,11 @@ class Course(ChisubmitAPIObject):
         else:
             params = None
         
-        assignments = self.get_related("assignments", params = params)
+        assignments = self.get_related("assignments", params = params, fields = fields)
         
         return assignments             
     
-    def get_assignment(self, assignment_id, include_rubric = False):
+    def get_assignment(self, assignment_id, include_rubric = False, fields = None):
         """
         :calls: GET /courses/:course/assignments/:assignment/
         :rtype: List of :class:`chisubmit.client.assignment.Assignment`
@@ -341,12 +358,9 @@ class Course(ChisubmitAPIObject):
         else:
             params = None        
         
-        headers, data = self._api_client._requester.request(
-            "GET",
-            "/courses/" + self.course_id + "/assignments/" + assignment_id,
-            params = params
-        )
-        return chisubmit.client.assignment.Assignment(self._api_client, headers, data)
+        return self._api_client._get_object(chisubmit.client.assignment.Assignment,
+                                            "/courses/" + self.course_id + "/assignments/" + assignment_id,
+                                            params, fields = fields)
     
     def create_assignment(self, assignment_id, name, deadline, min_students = None, max_students = None):
         """
@@ -384,7 +398,7 @@ class Course(ChisubmitAPIObject):
         )
         return chisubmit.client.assignment.Assignment(self._api_client, headers, data)    
     
-    def get_teams(self, include_students=False, include_assignments=False, include_grades = False):
+    def get_teams(self, include_students=False, include_assignments=False, include_grades = False, fields = None):
         """
         :calls: GET /courses/:course/teams/
         :rtype: List of :class:`chisubmit.client.team.Team`
@@ -406,12 +420,39 @@ class Course(ChisubmitAPIObject):
         else:
             params = None
         
-        teams = self.get_related("teams", params = params)
+        teams = self.get_related("teams", params = params, fields = fields)
         
         return teams             
+    
+    def iter_teams(self, include_students=False, include_assignments=False, include_grades = False, fields = None):
+        """
+        Like get_teams, but returns a generator that creates each team
+        as it is read from the response.
+        
+        :calls: GET /courses/:course/teams/
+        :rtype: Generator of :class:`chisubmit.client.team.Team`
+        """
+        
+        include = []
+        
+        if include_students:
+            include.append("students")
+
+        if include_assignments:
+            include.append("assignments")
+            
+        if include_grades:
+            include.append("assignments__grades")            
+            
+        if len(include) > 0:
+            params = {"include": include}
+        else:
+            params = None
+        
+        return self.iter_related("teams", params = params, fields = fields)
         
     
-    def get_team(self, team_id, include_students=False, include_assignments=False, include_grades = False):
+    def get_team(self, team_id, include_students=False, include_assignments=False, include_grades = False, fields = None):
         """
         :calls: GET /courses/:course/teams/
         :rtype: :class:`chisubmit.client.team.Team`
@@ -435,12 +476,28 @@ class Course(ChisubmitAPIObject):
         else:
             params = None        
         
+        return self._api_client._get_object(chisubmit.client.team.Team, self.teams_url + team_id, params, fields = fields)
+    
+    def import_teams(self, teams, dry_run = False):
+        """
+        :calls: POST /courses/:course/teams:import
+        :param teams: list of dicts, each with a "team_id", a list of
+                      "students" and, optionally, a list of "assignments"
+                      to register the team for and a number of "extensions"
+        :param dry_run: bool
+        :rtype: :class:`chisubmit.client.course.TeamImportResponse`
+        """
+        assert isinstance(teams, (list, tuple)), teams
+        
+        post_data = {"teams": list(teams),
+                     "dry_run": dry_run}
+        
         headers, data = self._api_client._requester.request(
-            "GET",
-            self.teams_url + team_id,
-            params = params
+            "POST",
+            "/courses/" + self.course_id + "/teams:import",
+            data = post_data
         )
-        return chisubmit.client.team.Team(self._api_client, headers, data)    
+        return TeamImportResponse(self._api_client, headers, data)
     
     def create_team(self, team_id, extensions = None, active = None):
         """
@@ -464,5 +521,74 @@ class Course(ChisubmitAPIObject):
             self.teams_url,
             data = post_data
         )
-        return chisubmit.client.team.Team(self._api_client, headers, data)        
+        return chisubmit.client.team.Team(self._api_client, headers, data)
+
+
+class RosterSyncResponse(ChisubmitAPIObject):
+    
+    _api_attributes = {
+                       "dry_run": Attribute(name="dry_run", 
+                                            attrtype=APIBooleanType, 
+                                            editable=False),  
+
+                       "users_created": Attribute(name="users_created", 
+                                                  attrtype=APIListType(APIStringType), 
+                                                  editable=False),  
+
+                       "users_updated": Attribute(name="users_updated", 
+                                                  attrtype=APIListType(APIStringType), 
+                                                  editable=False),  
+
+                       "students_added": Attribute(name="students_added", 
+                                                   attrtype=APIListType(APIStringType), 
+                                                   editable=False),  
+
+                       "students_undropped": Attribute(name="students_undropped", 
+                                                       attrtype=APIListType(APIStringType), 
+                                                       editable=False),  
+
+                       "students_dropped": Attribute(name="students_dropped", 
+                                                     attrtype=APIListType(APIStringType), 
+                                                     editable=False),  
+
+                       "instructors_added": Attribute(name="instructors_added", 
+                                                      attrtype=APIListType(APIStringType), 
+                                                      editable=False),  
+
+                       "graders_added": Attribute(name="graders_added", 
+                                                  attrtype=APIListType(APIStringType), 
+                                                  editable=False),  
+
+                       "invalid_users": Attribute(name="invalid_users", 
+                                                  attrtype=APIDictType(APIListType(APIStringType)), 
+                                                  editable=False),  
+                      }
+    
+    _api_relationships = { }
+
+
+class TeamImportResponse(ChisubmitAPIObject):
+    
+    _api_attributes = {
+                       "dry_run": Attribute(name="dry_run", 
+                                            attrtype=APIBooleanType, 
+                                            editable=False),  
+
+                       "teams_created": Attribute(name="teams_created", 
+                                                  attrtype=APIListType(APIStringType), 
+                                                  editable=False),  
+
+                       "teams_updated": Attribute(name="teams_updated", 
+                                                  attrtype=APIListType(APIStringType), 
+                                                  editable=False),  
+
+                       "teams_unchanged": Attribute(name="teams_unchanged", 
+                                                    attrtype=APIListType(APIStringType), 
+                                                    editable=False),  
+
+                       "conflicts": Attribute(name="conflicts", 
+                                              attrtype=APIDictType(APIListType(APIStringType)), 
+                                              editable=False),  
+                      }
     
+    _api_relationships = { }
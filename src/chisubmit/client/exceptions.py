@@ -1,4 +1,5 @@
 from pprint import pprint
+from chisubmit.common.wire import is_msgpack, msgpack_loads
 
 class ChisubmitRequestException(Exception):
 
@@ -42,9 +43,15 @@ class ChisubmitRequestException(Exception):
     @property
     def json(self):    
         try:
-            return self.__response.json()
+            return self.__decode_response()
         except ValueError:
             return {"data": self.__response.text}  
+        
+    def __decode_response(self):
+        if is_msgpack(self.__response.headers.get("content-type")):
+            return msgpack_loads(self.__response.content)
+        else:
+            return self.__response.json()
 
     @property
     def response_data(self):
@@ -90,7 +97,7 @@ class ChisubmitRequestException(Exception):
         print "Response body"
         print "-------------"        
         try:
-            response_data = self.__response.json()
+            response_data = self.__decode_response()
             pprint(response_data)
         except ValueError:
             response_data = self.__response.text
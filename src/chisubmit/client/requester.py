@@ -28,15 +28,19 @@
 #  POSSIBILITY OF SUCH DAMAGE.
 
 from requests import exceptions, Session
-from urlparse import urlparse
+from urlparse import urlparse, urlsplit
 from pprint import pprint
 import json
 import sys
 from requests.exceptions import HTTPError
 from chisubmit.client.exceptions import UnknownObjectException,\
     ChisubmitRequestException, BadRequestException, UnauthorizedException
+from chisubmit.common.wire import JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE,\
+    msgpack_available, msgpack_dumps, msgpack_loads, is_msgpack
 import base64
 import datetime
+import threading
+import codecs
 
 def json_serial(obj):
     if isinstance(obj, datetime.timedelta):
@@ -46,42 +50,173 @@ def json_serial(obj):
     
     raise TypeError("Type not serializable")
 
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_json_decoder = json.JSONDecoder()
+
+def iter_json_array(chunks):
+    """
+    Incrementally decodes a JSON array, given as an iterable of chunks 
+    of UTF-8 encoded bytes, yielding each element of the array as soon
+    as it has been read. Only the element being decoded is kept in memory.
+    
+    If the JSON value is not an array, it is yielded as a single element.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    chunks = iter(chunks)
+    buf = u""
+    pos = 0
+    eof = False
+    in_array = False
+    
+    while True:
+        while pos < len(buf) and buf[pos] in u" \t\n\r":
+            pos += 1
+        
+        if pos < len(buf):
+            c = buf[pos]
+            if not in_array:
+                if c != u"[":
+                    rest = buf[pos:] + u"".join([decoder.decode(chunk) for chunk in chunks]) + decoder.decode(b"", True)
+                    yield json.loads(rest)
+                    return
+                in_array = True
+                pos += 1
+                continue
+            elif c == u"]":
+                return
+            elif c == u",":
+                pos += 1
+                continue
+            
+            try:
+                value, end = _json_decoder.raw_decode(buf, pos)
+            except ValueError:
+                end = None
+
+            # A value at the end of the buffer (e.g., a number) might have
+            # been cut off, so we only accept it if it is followed by the
+            # next element or the end of the array (or if there is no more
+            # data)
+            if end is not None:
+                next_pos = end
+                while next_pos < len(buf) and buf[next_pos] in u" \t\n\r":
+                    next_pos += 1
+                if eof or (next_pos < len(buf) and buf[next_pos] in u",]"):
+                    yield value
+                    pos = end
+                    continue
+            
+        if eof:
+            if in_array or pos < len(buf):
+                raise ValueError("Truncated JSON array")
+            return
+        
+        # Read more data, dropping what we have already decoded 
+        try:
+            chunk = decoder.decode(next(chunks))
+        except StopIteration:
+            chunk = decoder.decode(b"", True)
+            eof = True
+        buf = buf[pos:] + chunk
+        pos = 0
+
+
 class Requester(object):
     
-    def __init__(self, login_or_token, password, base_url):
+    def __init__(self, login_or_token, password, base_url, use_msgpack = None):
         
         self.__base_url = base_url
         
+        # With ?urls=relative, the server returns URLs as absolute paths
+        # (e.g., /api/v1/courses/foo/), which we resolve against the
+        # scheme and host of the base URL
+        url = urlsplit(base_url)
+        self.__base_origin = "%s://%s" % (url.scheme, url.netloc)
+        self.__base_path = url.path.rstrip("/")
+        
+        # By default, we ask for MessagePack if it's available (if the 
+        # server doesn't support it, it will ignore our Accept header and
+        # answer with JSON). Request bodies are sent as JSON until the
+        # server has answered with MessagePack, since a server without
+        # MessagePack support would reject them.
+        if use_msgpack is None:
+            use_msgpack = msgpack_available()
+        self.__use_msgpack = use_msgpack
+        self.__server_msgpack = False
+        
         self.__headers = {}
-        self.__headers['content-type'] = 'application/json'
+        if use_msgpack:
+            self.__headers['accept'] = MSGPACK_MEDIA_TYPE
+        else:
+            self.__headers['accept'] = JSON_MEDIA_TYPE
         if login_or_token is not None and password is not None:
             self.__headers["Authorization"] = "Basic " + base64.b64encode('%s:%s' % (login_or_token, password))
         elif login_or_token is not None:
             self.__headers["Authorization"] = "Token %s" % login_or_token
         
-        self.__session = Session()
-
-    def request(self, method, resource, data=None, headers=None, params=None):
+        # requests sessions are not thread-safe, so each thread
+        # gets its own (see AsyncChisubmit)
+        self.__local = threading.local()
+        
+        # Number of requests that could have modified something
+        # on the server (i.e., anything other than a GET)
+        self.write_count = 0
+        self.__write_count_lock = threading.Lock()
+        
+    @property
+    def __session(self):
+        session = getattr(self.__local, "session", None)
+        if session is None:
+            session = Session()
+            self.__local.session = session
+        return session
+        
+    def absolute_url(self, resource):
         if resource.startswith("/"):
-            url = self.__base_url + resource
+            if self.__base_path and resource.startswith(self.__base_path + "/"):
+                return self.__base_origin + resource
+            return self.__base_url + resource
         else:
             # TODO: Validate the URL is valid given base_url
-            url = resource
+            return resource
+
+    def request(self, method, resource, data=None, headers=None, params=None, stream=False):
+        """
+        Makes a request to the API, and returns the response headers and 
+        the decoded response data. If stream is True, the response must be
+        a JSON array, and the data is returned as a generator that decodes
+        the elements of the array as they are read from the response.
+        """
+        url = self.absolute_url(resource)
+        
+        if method != "GET":
+            with self.__write_count_lock:
+                self.write_count += 1
 
         all_headers = {}
         all_headers.update(self.__headers)
+        if stream:
+            # We can only decode JSON incrementally
+            all_headers['accept'] = JSON_MEDIA_TYPE
         if headers is not None:
             all_headers.update(headers)
 
         if data is not None:
-            data = json.dumps(data, default=json_serial)
+            if self.__use_msgpack and self.__server_msgpack:
+                all_headers.setdefault('content-type', MSGPACK_MEDIA_TYPE)
+                data = msgpack_dumps(data)
+            else:
+                all_headers.setdefault('content-type', JSON_MEDIA_TYPE)
+                data = json.dumps(data, default=json_serial, separators=(",", ":"))
             
         # TODO: try..except
         response = self.__session.request(url = url,
                                   method = method,
                                   params = params,
                                   data = data,
-                                  headers = all_headers)
+                                  headers = all_headers,
+                                  stream = stream)
         
         if response.status_code == 400:
             raise BadRequestException(method, url, params, data, all_headers, response)        
@@ -95,9 +230,23 @@ class Requester(object):
         elif 500 <= response.status_code < 600:
             raise ChisubmitRequestException(method, url, params, data, all_headers, response)
 
+        if stream:
+            return response.headers, self.__iter_response(response)
+
         try:
-            response_data = response.json()
+            if is_msgpack(response.headers.get("content-type")):
+                self.__server_msgpack = True
+                response_data = msgpack_loads(response.content)
+            else:
+                response_data = response.json()
         except ValueError:
             response_data = {"data": response.text}
 
         return response.headers, response_data
+    
+    def __iter_response(self, response):
+        try:
+            for elem in iter_json_array(response.iter_content(STREAM_CHUNK_SIZE)):
+                yield elem
+        finally:
+            response.close()
@@ -0,0 +1,138 @@
+#  Copyright (c) 2013-2014, The University of Chicago
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions are met:
+#
+#  - Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+#  - Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+#  - Neither the name of The University of Chicago nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+#  AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+#  IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+#  ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+#  LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+#  CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+#  SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+#  INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+#  CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+#  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+
+import weakref
+import threading
+
+class IdentityMap(object):
+    """
+    Keeps track of the API objects created by a client, keyed by their URL,
+    so that the same server resource is always represented by the same
+    Python object.
+    
+    The map only holds weak references to the objects. Each object records
+    the number of writes (POST, PATCH, DELETE requests) the client had made 
+    when the object was last fetched, and an object is only considered 
+    fresh (i.e., it can be returned without making a request) if the client 
+    hasn't made any writes since then, since a write could have changed 
+    any resource on the server.
+    """
+    
+    def __init__(self, requester):
+        self._requester = requester
+        self._objects = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+        
+    @staticmethod
+    def _key(url):
+        return url.rstrip("/")
+    
+    def add(self, obj):
+        if obj.url is not None:
+            with self._lock:
+                self._objects[self._key(obj.url)] = obj
+            object.__setattr__(obj, "_generation", self._requester.write_count)
+        
+    def remove(self, obj):
+        if obj.url is not None:
+            key = self._key(obj.url)
+            with self._lock:
+                if self._objects.get(key) is obj:
+                    del self._objects[key]
+        
+    def get(self, url, klass):
+        with self._lock:
+            obj = self._objects.get(self._key(url))
+        if obj is not None and type(obj) is klass:
+            return obj
+        else:
+            return None
+        
+    def get_fresh(self, url, klass):
+        obj = self.get(url, klass)
+        if obj is not None and obj._generation == self._requester.write_count:
+            return obj
+        else:
+            return None
+    
+    def clear(self):
+        with self._lock:
+            self._objects.clear()
+        
+        
+class Session(object):
+    """
+    A unit of work: while a session is active (see Chisubmit.session), 
+    edits to API objects are not sent to the server right away. Instead, 
+    the session keeps track of the edited objects, and sends all the edits 
+    in a single batch request when it is flushed.
+    """
+    
+    def __init__(self, api_client):
+        self._api_client = api_client
+        self._objects = []
+        
+    def add(self, obj):
+        if not any(o is obj for o in self._objects):
+            self._objects.append(obj)
+            
+    def flush(self):
+        """
+        :calls: POST /batch
+        """
+        objects = [obj for obj in self._objects if obj._dirty]
+        if len(objects) == 0:
+            self._objects = []
+            return
+        
+        operations = []
+        for obj in objects:
+            data = dict([(attrname, getattr(obj, attrname)) for attrname in obj._dirty])
+            operations.append({"method": "PATCH", "url": obj.url, "data": data})
+        
+        headers, results = self._api_client._requester.request(
+            "POST",
+            "/batch",
+            data = operations
+        )
+        
+        for obj, result in zip(objects, results):
+            object.__setattr__(obj, "_dirty", None)
+            obj._updateAttributes(result["data"])
+            
+        self._objects = []
+            
+    def discard(self):
+        """
+        Discards all the pending edits, restoring the edited attributes
+        to their last known values on the server.
+        """
+        for obj in self._objects:
+            obj._discard_edits()
+        self._objects = []
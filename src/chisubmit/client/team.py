@@ -154,17 +154,17 @@ class Registration(ChisubmitAPIObject):
                           
                           }        
     
-    def get_submissions(self):
+    def get_submissions(self, fields = None):
         """
         :calls: GET /courses/:course/teams/:team/assignments/:assignment/submissions
         :rtype: List of :class:`chisubmit.client.team.Submission`
         """
         
-        submissions = self.get_related("submissions")
+        submissions = self.get_related("submissions", fields = fields)
         
         return submissions        
     
-    def get_submission(self, submission):
+    def get_submission(self, submission, fields = None):
         """
         :calls: GET /courses/:course/teams/:team/assignments/:assignment/submissions/:submission
         :rtype: :class:`chisubmit.client.team.Submission`
@@ -172,11 +172,7 @@ class Registration(ChisubmitAPIObject):
         
         assert isinstance(submission, int), submission
         
-        headers, data = self._api_client._requester.request(
-            "GET",
-            self.submissions_url + str(submission)
-        )
-        return Submission(self._api_client, headers, data)      
+        return self._api_client._get_object(Submission, self.submissions_url + str(submission), fields = fields)      
     
     def add_submission(self, commit_sha, extensions_used = None, submitted_at = None):
         """
@@ -198,13 +194,13 @@ class Registration(ChisubmitAPIObject):
         )
         return Submission(self._api_client, headers, data)
 
-    def get_grades(self):
+    def get_grades(self, fields = None):
         """
         :calls: GET /courses/:course/teams/:team/assignments/:assignment/grades/
         :rtype: List of :class:`chisubmit.client.team.Grade`
         """
         
-        grades = self.get_related("grades")
+        grades = self.get_related("grades", fields = fields)
         
         return grades             
     
@@ -352,17 +348,17 @@ class Team(ChisubmitAPIObject):
                                                       reltype=APIObjectType(Registration)), 
                           }
     
-    def get_team_members(self):
+    def get_team_members(self, fields = None):
         """
         :calls: GET /courses/:course/teams/:team/students/
         :rtype: List of :class:`chisubmit.client.team.TeamMember`
         """
         
-        team_members = self.get_related("students")
+        team_members = self.get_related("students", fields = fields)
         
         return team_members
         
-    def get_team_member(self, username):
+    def get_team_member(self, username, fields = None):
         """
         :calls: GET /courses/:course/teams/:team/students/:username
         :rtype: :class:`chisubmit.client.team.TeamMember`
@@ -370,11 +366,7 @@ class Team(ChisubmitAPIObject):
         
         assert isinstance(username, (str, unicode)), username
         
-        headers, data = self._api_client._requester.request(
-            "GET",
-            self.students_url + username
-        )
-        return TeamMember(self._api_client, headers, data)      
+        return self._api_client._get_object(TeamMember, self.students_url + username, fields = fields)      
     
     def add_team_member(self, user_or_username, confirmed = None):
         """
@@ -401,17 +393,17 @@ class Team(ChisubmitAPIObject):
         )
         return TeamMember(self._api_client, headers, data)         
     
-    def get_assignment_registrations(self):
+    def get_assignment_registrations(self, fields = None):
         """
         :calls: GET /courses/:course/teams/:team/assignments/
         :rtype: List of :class:`chisubmit.client.team.Registration`
         """
         
-        registrations = self.get_related("assignments")
+        registrations = self.get_related("assignments", fields = fields)
         
         return registrations   
     
-    def get_assignment_registration(self, assignment_id):
+    def get_assignment_registration(self, assignment_id, fields = None):
         """
         :calls: GET /courses/:course/teams/:team/assignments/:assignment
         :rtype: :class:`chisubmit.client.team.Registration`
@@ -419,11 +411,7 @@ class Team(ChisubmitAPIObject):
         
         assert isinstance(assignment_id, (str, unicode)), assignment_id
         
-        headers, data = self._api_client._requester.request(
-            "GET",
-            self.assignments_url + assignment_id
-        )
-        return Registration(self._api_client, headers, data)     
+        return self._api_client._get_object(Registration, self.assignments_url + assignment_id, fields = fields)     
       
     def add_assignment_registration(self, assignment_or_assignment_id, grader_or_grader_username = None):
         """
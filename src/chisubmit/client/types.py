@@ -1,6 +1,8 @@
 import datetime
+import re
 import pytz
 from chisubmit.common.utils import parse_timedelta
+from chisubmit.common.wire import SPARSE_FIELDS_HEADER
 
 class ChisubmitAPIException(Exception):
 
@@ -52,6 +54,28 @@ class AttributeValidationException(AttributeException):
         self.expected_type = expected_type
 
 
+ISO8601_RE = re.compile(r"^(\d{4})-(\d{2})-(\d{2})T(\d{2}):(\d{2}):(\d{2})(?:\.(\d{1,6}))?Z$")
+
+def parse_iso8601_datetime(value):
+    """
+    Parses the UTC timestamps produced by the API (e.g., 2042-01-21T20:00:00Z
+    or 2042-01-21T20:00:00.123456Z) into timezone-aware datetimes.
+    
+    Considerably faster than strptime, which was the single largest cost
+    of decoding a large API response.
+    """
+    m = ISO8601_RE.match(value)
+    if m is None:
+        raise ValueError("Not an ISO 8601 UTC timestamp: %s" % value)
+    year, month, day, hour, minute, second, fraction = m.groups()
+    if fraction is None:
+        microsecond = 0
+    else:
+        microsecond = int(fraction.ljust(6, "0"))
+    return datetime.datetime(int(year), int(month), int(day),
+                             int(hour), int(minute), int(second),
+                             microsecond, pytz.utc)
+
 class AttributeType(object):
     STRING = 1
     INTEGER = 2
@@ -87,67 +111,91 @@ class AttributeType(object):
         self.attrtype = attrtype
         self.subtype = subtype
         
-    def to_python(self, value, headers, api_client):
-        if self.attrtype == AttributeType.STRING:
-            if not isinstance(value, basestring):
-                raise AttributeTypeException(value, self)
-            return value
-        elif self.attrtype == AttributeType.INTEGER:
-            if not isinstance(value, (int, long)):
-                raise AttributeTypeException(value, self)
-            return value
-        elif self.attrtype == AttributeType.DECIMAL:
-            try:
-                return float(value)
-            except ValueError:
-                raise AttributeTypeException(value, self)
-        elif self.attrtype == AttributeType.BOOLEAN:
-            if not isinstance(value, bool):
-                raise AttributeTypeException(value, self)
-            return value
-        elif self.attrtype == AttributeType.DATETIME:
-            if not isinstance(value, basestring):
-                raise AttributeTypeException(value, self)
-            try:
-                if value[19] == ".":
-                    dt = datetime.datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%fZ")
-                else:
-                    dt = datetime.datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ")
-                dt = pytz.utc.localize(dt)
-            except ValueError, ve:
-                raise AttributeTypeException(value, self)
-                
-            return dt        
-        elif self.attrtype == AttributeType.TIMEDELTA:
-            if not isinstance(value, basestring):
-                raise AttributeTypeException(value, self)
-            try:
-                return parse_timedelta(value)
-            except ValueError, ve:
-                raise AttributeTypeException(value, self)
-                
-            return dt        
-        elif self.attrtype == AttributeType.LIST:
-            if not isinstance(value, (list, tuple)):
-                raise AttributeTypeException(value, self)
-            rvalue = []
-            for item in value:
-                rvalue.append(self.subtype.to_python(item, headers, api_client))
-            return rvalue
-        elif self.attrtype == AttributeType.DICT:
-            if not isinstance(value, dict):
-                raise AttributeTypeException(value, self)
-            rvalue = {}
-            for k, item in value.items():
-                rvalue[k] = self.subtype.to_python(item, headers, api_client)
-            return rvalue
-        elif self.attrtype == AttributeType.OBJECT:
-            if not isinstance(value, dict):
+        self._converter = None
+        
+    @property
+    def converter(self):
+        """
+        A function (value, headers, api_client) -> Python value specialized
+        for this type. It is built the first time it is needed, so we don't
+        have to go through all the type checks on every value we decode.
+        """
+        if self._converter is None:
+            self._converter = self._compile()
+        return self._converter
+        
+    def _compile(self):
+        attrtype = self.attrtype
+        
+        if attrtype == AttributeType.STRING:
+            def convert(value, headers, api_client):
+                if not isinstance(value, basestring):
+                    raise AttributeTypeException(value, self)
+                return value
+        elif attrtype == AttributeType.INTEGER:
+            def convert(value, headers, api_client):
+                if not isinstance(value, (int, long)):
+                    raise AttributeTypeException(value, self)
+                return value
+        elif attrtype == AttributeType.DECIMAL:
+            def convert(value, headers, api_client):
+                try:
+                    return float(value)
+                except (TypeError, ValueError):
+                    raise AttributeTypeException(value, self)
+        elif attrtype == AttributeType.BOOLEAN:
+            def convert(value, headers, api_client):
+                if not isinstance(value, bool):
+                    raise AttributeTypeException(value, self)
+                return value
+        elif attrtype == AttributeType.DATETIME:
+            def convert(value, headers, api_client):
+                if isinstance(value, datetime.datetime):
+                    return value
+                if not isinstance(value, basestring):
+                    raise AttributeTypeException(value, self)
+                try:
+                    return parse_iso8601_datetime(value)
+                except ValueError:
+                    raise AttributeTypeException(value, self)
+        elif attrtype == AttributeType.TIMEDELTA:
+            def convert(value, headers, api_client):
+                if isinstance(value, datetime.timedelta):
+                    return value
+                if not isinstance(value, basestring):
+                    raise AttributeTypeException(value, self)
+                try:
+                    return parse_timedelta(value)
+                except ValueError:
+                    raise AttributeTypeException(value, self)
+        elif attrtype == AttributeType.LIST:
+            subconvert = self.subtype.converter
+            def convert(value, headers, api_client):
+                if not isinstance(value, (list, tuple)):
+                    raise AttributeTypeException(value, self)
+                return [None if item is None else subconvert(item, headers, api_client) 
+                        for item in value]
+        elif attrtype == AttributeType.DICT:
+            subconvert = self.subtype.converter
+            def convert(value, headers, api_client):
+                if not isinstance(value, dict):
+                    raise AttributeTypeException(value, self)
+                return dict([(k, None if item is None else subconvert(item, headers, api_client)) 
+                             for k, item in value.iteritems()])
+        elif attrtype == AttributeType.OBJECT:
+            klass = self.subtype
+            def convert(value, headers, api_client):
+                if not isinstance(value, dict):
+                    raise AttributeTypeException(value, self)
+                return klass(api_client, headers, value)
+        else:
+            def convert(value, headers, api_client):
                 raise AttributeTypeException(value, self)
-            rvalue = self.subtype(api_client, headers, value)
-            return rvalue
-                
-        raise AttributeTypeException(value, self)
+            
+        return convert
+        
+    def to_python(self, value, headers, api_client):
+        return self.converter(value, headers, api_client)
     
     def to_json(self, value):
         # TODO
@@ -170,6 +218,21 @@ def APIObjectType(subtype):
     return AttributeType(AttributeType.OBJECT, subtype)
         
 
+def fields_params(params, fields):
+    """
+    Adds the "fields" query parameter to a request's parameters, to only
+    request the given fields (a list of field names, where fields of
+    included objects are specified with a dotted path, e.g.,
+    "assignments.grader_username")
+    """
+    if fields is None:
+        return params
+    
+    params = dict(params) if params is not None else {}
+    params["fields"] = ",".join(fields)
+    return params
+    
+
 class Attribute(object):
     
     def __init__(self, name, attrtype, editable):        
@@ -194,18 +257,156 @@ class Relationship(object):
         self.reltype = reltype
         
 
+class LazyField(object):
+    """
+    Descriptor for a field of a ChisubmitAPIObject. The value is stored
+    in a slot, and is only converted from the object's raw JSON data
+    (and stored in the slot) the first time it is accessed.
+    
+    If the object was only partially populated (because only some of its
+    fields were requested), accessing a field that is not in the raw data
+    fetches the rest of the object's fields, unless load is False (as is
+    the case with the lists of related objects, which are only included
+    in a response when explicitly requested).
+    """
+    
+    __slots__ = ("key", "slot", "attrtype", "load")
+    
+    def __init__(self, key, slot, attrtype, load = True):
+        self.key = key
+        self.slot = slot
+        self.attrtype = attrtype
+        self.load = load
+        
+    def __get__(self, obj, objtype = None):
+        if obj is None:
+            return self
+        try:
+            return self.slot.__get__(obj, objtype)
+        except AttributeError:
+            if obj._partial and self.load and self.key not in obj._rawData:
+                obj._load()
+            value = obj._rawData.get(self.key)
+            if value is not None and self.attrtype is not None:
+                value = self.attrtype.converter(value, obj._headers, obj._api_client)
+            self.slot.__set__(obj, value)
+            return value
+            
+    def __set__(self, obj, value):
+        self.slot.__set__(obj, value)
+        
+    def reset(self, obj):
+        try:
+            self.slot.__delete__(obj)
+        except AttributeError:
+            pass
+
+
+class ChisubmitAPIObjectMeta(type):
+    """
+    Compiles the _api_attributes and _api_relationships of a 
+    ChisubmitAPIObject subclass into a slot and a LazyField for each
+    field that can appear in the API's representation of the object:
+    
+    - Each attribute X is stored in attribute X.
+    - Each relationship X is stored in attribute _rel_X (the list of
+      related objects, if they were included in the response) and in
+      attribute X_url.
+      
+    The fields are also stored in the class's _fields dictionary, which
+    maps the name of the field in the JSON data to its LazyField.
+    """
+    
+    def __new__(mcs, name, bases, namespace):
+        api_attributes = namespace.get("_api_attributes")
+        api_relationships = namespace.get("_api_relationships")
+
+        if api_attributes is None and api_relationships is None:
+            return type.__new__(mcs, name, bases, namespace)
+        
+        # (attribute name, JSON field name, type, load if missing)
+        fields = []
+        for attrname, api_attr in (api_attributes or {}).items():
+            if attrname != "url" and not attrname.endswith("_url"):
+                fields.append((attrname, attrname, api_attr.type, True))
+        for relname, rel in (api_relationships or {}).items():
+            fields.append((relname + "_url", relname + "_url", None, True))
+            fields.append(("_rel_" + relname, relname, APIListType(rel.reltype), False))
+        
+        inherited = set()
+        for base in bases:
+            inherited.update(getattr(base, "_fields", {}).keys())
+        fields = [f for f in fields if f[1] not in inherited]
+            
+        for attrname, _, _, _ in fields:
+            assert attrname not in namespace, "%s.%s is already defined" % (name, attrname)
+
+        namespace["__slots__"] = tuple(["_v_" + attrname for attrname, _, _, _ in fields])
+        cls = type.__new__(mcs, name, bases, namespace)
+        
+        cls_fields = {}
+        for base in bases:
+            cls_fields.update(getattr(base, "_fields", {}))
+        for attrname, key, attrtype, load in fields:
+            field = LazyField(key, cls.__dict__["_v_" + attrname], attrtype, load)
+            setattr(cls, attrname, field)
+            cls_fields[key] = field
+        cls._fields = cls_fields
+        
+        return cls
+
+
 class ChisubmitAPIObject(object):
+    
+    __metaclass__ = ChisubmitAPIObjectMeta
+    
+    __slots__ = ("_api_client", "_headers", "_rawData", "_dirty", "_partial", "_generation", "url", "__weakref__")
+    
+    _fields = {}
+    
+    def __new__(cls, api_client, headers, attributes):
+        # If we already have an object for this resource, we reuse it
+        # (and __init__ will update it with the new attributes)
+        url = attributes.get("url")
+        if url is not None and api_client._identity_map is not None:
+            obj = api_client._identity_map.get(url, cls)
+            if obj is not None:
+                return obj
+        return object.__new__(cls)
         
     def __init__(self, api_client, headers, attributes):
-        self._api_client = api_client
-        self._headers = headers
-        self._rawData = attributes
+        self._check_fields(attributes)
         
-        if self._api_client._deferred_save:
-            self.dirty = {api_attr: False for api_attr in self._api_attributes}
-
-        self._initAttributes()
-        self._updateAttributes(attributes)
+        # True if the response only includes some of the object's fields
+        partial = headers is not None and SPARSE_FIELDS_HEADER in headers
+        
+        try:
+            self._rawData
+        except AttributeError:
+            object.__setattr__(self, "_api_client", api_client)
+            object.__setattr__(self, "_dirty", None)
+            object.__setattr__(self, "_partial", partial)
+        else:
+            # Object from the identity map. Fields that have been edited
+            # (but not saved yet) keep their values. If we only got some
+            # of the fields, we keep the values of the other ones.
+            fields = self._fields
+            if partial:
+                raw_data = dict(self._rawData)
+                raw_data.update(attributes)
+                attributes = raw_data
+            else:
+                object.__setattr__(self, "_partial", False)
+            for attrname in fields:
+                if not self._is_dirty(attrname):
+                    fields[attrname].reset(self)
+        
+        object.__setattr__(self, "_headers", headers)
+        object.__setattr__(self, "_rawData", attributes)
+        object.__setattr__(self, "url", attributes.get("url"))
+        
+        if api_client._identity_map is not None:
+            api_client._identity_map.add(self)
 
     def __has_api_attr(self, attrname):
         return self._api_attributes.has_key(attrname)
@@ -220,36 +421,49 @@ class ChisubmitAPIObject(object):
             rel_name = attrname
             
         return rel_name in self._api_relationships
-        
-    def _initAttributes(self):
-        for api_attr in self._api_attributes.keys():
-            object.__setattr__(self, api_attr, None)
-
-    def _updateAttributes(self, attributes):
-        for attrname, attrvalue in attributes.items():
-            if attrname == "url":
-                object.__setattr__(self, attrname, attrvalue)
-            elif self.__is_relationship_attr(attrname):
+    
+    def _check_fields(self, attributes):
+        fields = self._fields
+        for attrname in attributes:
+            if attrname not in fields and attrname != "url":
                 if attrname.endswith("_url"):
-                    object.__setattr__(self, attrname, attrvalue)
+                    raise UnexpectedRelationshipURLException(attrname, attributes[attrname])
                 else:
-                    rel = self._api_relationships[attrname]
-                    rel_values = [rel.reltype.to_python(elem, self._headers, self._api_client) for elem in attrvalue]
-                    setattr(self, "_rel_" + attrname, rel_values)
-            else:
-                if attrname.endswith("_url"):
-                    raise UnexpectedRelationshipURLException(attrname, attrvalue)
-                    
-                api_attr = self.__get_api_attr(attrname)
+                    raise NoSuchAttributeException(attrname, attributes[attrname])
+
+    def _updateAttributes(self, attributes):
+        self._check_fields(attributes)
+        
+        raw_data = dict(self._rawData)
+        raw_data.update(attributes)
+        object.__setattr__(self, "_rawData", raw_data)
+        
+        if "url" in attributes:
+            object.__setattr__(self, "url", attributes["url"])
+        
+        fields = self._fields
+        for attrname in attributes:
+            if attrname in fields and not self._is_dirty(attrname):
+                fields[attrname].reset(self)
+                
+    def _load(self):
+        """
+        Fetches all the fields of a partially populated object
+        """
+        object.__setattr__(self, "_partial", False)
+        if self.url is not None:
+            _, data = self._api_client._requester.request("GET", self.url)
+            self._updateAttributes(data)
+                
+    def _is_dirty(self, attrname):
+        return self._dirty is not None and attrname in self._dirty
     
-                if api_attr is None:
-                    raise NoSuchAttributeException(attrname, attrvalue)
-                else:
-                    if attrvalue is None:
-                        checked_value = None
-                    else:
-                        checked_value = api_attr.to_python(attrvalue, self._headers, self._api_client)
-                    object.__setattr__(self, attrname, checked_value)       
+    def _discard_edits(self):
+        if self._dirty:
+            fields = self._fields
+            for attrname in self._dirty:
+                fields[attrname].reset(self)
+            object.__setattr__(self, "_dirty", None)
 
     def __setattr__(self, name, value):
         if self.__is_relationship_attr("_rel_" + name):
@@ -262,18 +476,25 @@ class ChisubmitAPIObject(object):
             if not api_attr.editable:
                 raise AttributeNotEditableException(name, value)
             else:
-                if self._api_client._deferred_save:
-                    self.dirty[name] = True
+                session = self._api_client._session
+                if session is not None or self._api_client._deferred_save:
+                    if self._dirty is None:
+                        object.__setattr__(self, "_dirty", set())
+                    self._dirty.add(name)
+                    if session is not None:
+                        session.add(self)
                 else:
                     self.edit(**{name: value})                
                 object.__setattr__(self, name, value)
                     
-    def get_related(self, name, force_request=False, params = None):
+    def get_related(self, name, force_request=False, params = None, fields = None):
         rel = self._api_relationships.get(name, None)
 
         if rel is None:
             raise
         
+        params = fields_params(params, fields)
+        
         if not force_request and params is None:
             if hasattr(self, "_rel_" + name):
                 cached_rel = getattr(self, "_rel_" + name)
@@ -288,15 +509,36 @@ class ChisubmitAPIObject(object):
         )
         
         return [rel.reltype.to_python(elem, headers, self._api_client) for elem in data]                
+    
+    def iter_related(self, name, params = None, fields = None):
+        """
+        Like get_related, but always makes a request, and returns a 
+        generator that creates each object as it is read from the response
+        (instead of reading the entire response into memory)
+        """
+        rel = self._api_relationships[name]
+        
+        params = fields_params(params, fields)
+        
+        rel_url = getattr(self, name + "_url")
+        headers, data = self._api_client._requester.request(
+            "GET",
+            rel_url,
+            params = params,
+            stream = True
+        )
+        
+        for elem in data:
+            yield rel.reltype.to_python(elem, headers, self._api_client)
                     
     def save(self):
-        if self._api_client._deferred_save:
-            attrs = {}
-            for attrname, dirty in self.dirty.items():
-                if dirty:
-                    attrs[attrname] = getattr(self, attrname)
-                    self.dirty[attrname] = False
-            if len(attrs) > 0:
+        if self._api_client._session is not None:
+            # The edits will be sent when the session is flushed
+            pass
+        elif self._api_client._deferred_save:
+            if self._dirty:
+                attrs = dict([(attrname, getattr(self, attrname)) for attrname in self._dirty])
+                object.__setattr__(self, "_dirty", None)
                 self.edit(**attrs)            
         else:
             # TODO: Log a warning?
@@ -331,4 +573,6 @@ class ChisubmitAPIObject(object):
             "DELETE",
             self.url 
         )
+        if self._api_client._identity_map is not None:
+            self._api_client._identity_map.remove(self)
         return None           
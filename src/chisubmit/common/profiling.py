@@ -0,0 +1,305 @@
+
+#  Copyright (c) 2013-2014, The University of Chicago
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions are met:
+#
+#  - Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+#  - Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+#  - Neither the name of The University of Chicago nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+#  AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+#  IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+#  ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+#  LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+#  CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+#  SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+#  INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+#  CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+#  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+
+# Client-side profiling (chisubmit --profile): counts the requests made
+# to the chisubmit server and the git operations (local and remote), and
+# how long they took, so we can tell whether a command is bound by the
+# network, by git, or by the CPU.
+
+import cProfile
+import functools
+import os
+import re
+import threading
+import time
+import types
+from urlparse import urlsplit
+
+import requests
+
+CATEGORY_HTTP = "http"
+CATEGORY_GIT = "git"
+
+# Name of the ID that follows each collection in an API URL
+# (e.g., /courses/cmsc40100/teams/ -> /courses/{course_id}/teams/)
+API_COLLECTION_IDS = {"courses": "course_id",
+                      "instructors": "username",
+                      "graders": "username",
+                      "students": "username",
+                      "users": "username",
+                      "assignments": "assignment_id",
+                      "rubric": "rubric_component_id",
+                      "registrations": "registration_id",
+                      "teams": "team_id",
+                      "submissions": "submission_id",
+                      "grades": "grade_id"}
+
+API_PREFIX_RE = re.compile(r"^.*?/api/v[0-9]+/")
+
+
+def get_endpoint_pattern(url):
+    """
+    Returns the API endpoint of a URL, with the IDs replaced by
+    their names (e.g., /courses/{course_id}/teams/{team_id})
+    """
+    path = urlsplit(url).path
+    m = API_PREFIX_RE.match(path)
+    if m is not None:
+        path = path[m.end():]
+    else:
+        path = path.lstrip("/")
+        
+    segments = path.split("/")
+    for i in range(1, len(segments)):
+        if segments[i] and segments[i-1] in API_COLLECTION_IDS:
+            segments[i] = "{%s}" % API_COLLECTION_IDS[segments[i-1]]
+    return "/" + "/".join(segments)
+
+
+class OperationStats(object):
+    
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.time = 0.0
+        self.max_time = 0.0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        
+        
+class Profiler(object):
+    """
+    Collects the statistics for the operations (HTTP requests and git
+    operations) made while it is running. Starting the profiler wraps
+    the methods of the instrumented classes (see instrument); stopping it
+    restores the original methods.
+    
+    If pstats_file is not None, the whole run is also profiled with
+    cProfile, and its statistics are written to that file.
+    """
+    
+    def __init__(self, pstats_file = None):
+        self.pstats_file = pstats_file
+        self.operations = {}
+        self.category_time = {CATEGORY_HTTP: 0.0, CATEGORY_GIT: 0.0}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.patched = []
+        self.cprofile = None
+        self.start_time = None
+        self.start_cpu = None
+        self.wall_time = None
+        self.cpu_time = None
+        
+    def record(self, category, name, elapsed, error = False, bytes_sent = 0, bytes_received = 0, outermost = True):
+        with self.lock:
+            op = self.operations.get((category, name))
+            if op is None:
+                op = self.operations[(category, name)] = OperationStats()
+            op.count += 1
+            op.time += elapsed
+            op.max_time = max(op.max_time, elapsed)
+            op.bytes_sent += bytes_sent
+            op.bytes_received += bytes_received
+            if error:
+                op.errors += 1
+            # Operations can call other operations (e.g., creating a 
+            # repository opens it), so we only add up the time of the
+            # outermost one.
+            if outermost:
+                self.category_time[category] += elapsed
+                
+    def __enter_operation(self):
+        depth = getattr(self.local, "depth", 0)
+        self.local.depth = depth + 1
+        return depth == 0
+    
+    def __exit_operation(self):
+        self.local.depth -= 1
+    
+    def wrap_request(self, request):
+        profiler = self
+        
+        @functools.wraps(request)
+        def wrapper(requester, method, resource, data=None, headers=None, params=None, stream=False):
+            name = "%s %s" % (method, get_endpoint_pattern(resource))
+            outermost = profiler.__enter_operation()
+            profiler.local.bytes_sent = profiler.local.bytes_received = 0
+            start = time.time()
+            error = True
+            try:
+                rv = request(requester, method, resource, data, headers, params, stream)
+                error = False
+                return rv
+            finally:
+                profiler.__exit_operation()
+                profiler.record(CATEGORY_HTTP, name, time.time() - start,
+                                error = error,
+                                bytes_sent = profiler.local.bytes_sent,
+                                bytes_received = profiler.local.bytes_received,
+                                outermost = outermost)
+            
+        return wrapper
+    
+    def wrap_send(self, send):
+        profiler = self
+        
+        @functools.wraps(send)
+        def wrapper(session, request, **kwargs):
+            response = send(session, request, **kwargs)
+            body = request.body
+            if isinstance(body, basestring):
+                profiler.local.bytes_sent = getattr(profiler.local, "bytes_sent", 0) + len(body)
+            # The length of the response body, as received (i.e., if
+            # it was compressed, the compressed length). This is not
+            # available for streamed (chunked) responses.
+            length = response.headers.get("content-length")
+            if length is not None and length.isdigit():
+                profiler.local.bytes_received = getattr(profiler.local, "bytes_received", 0) + int(length)
+            return response
+        
+        return wrapper
+    
+    def wrap_operation(self, category, name, f):
+        profiler = self
+        
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            outermost = profiler.__enter_operation()
+            start = time.time()
+            error = True
+            try:
+                rv = f(*args, **kwargs)
+                error = False
+                return rv
+            finally:
+                profiler.__exit_operation()
+                profiler.record(category, name, time.time() - start, error = error, outermost = outermost)
+            
+        return wrapper
+    
+    def patch(self, cls, attr, wrapped):
+        self.patched.append((cls, attr, cls.__dict__[attr]))
+        setattr(cls, attr, wrapped)
+        
+    def instrument_class(self, category, cls):
+        """
+        Wraps all the public methods (including class methods, but not
+        static methods) defined in a class.
+        """
+        for attr, value in sorted(cls.__dict__.items()):
+            if attr.startswith("_"):
+                continue
+            name = "%s.%s" % (cls.__name__, attr)
+            if isinstance(value, types.FunctionType):
+                self.patch(cls, attr, self.wrap_operation(category, name, value))
+            elif isinstance(value, classmethod):
+                self.patch(cls, attr, classmethod(self.wrap_operation(category, name, value.__func__)))
+    
+    def instrument(self):
+        from chisubmit.client.requester import Requester
+        from chisubmit.repos import RemoteRepositoryConnectionBase
+        from chisubmit.repos.local import LocalGitRepo
+        # Imports all the remote repository connection classes
+        import chisubmit.repos.factory
+        
+        self.patch(Requester, "request", self.wrap_request(Requester.__dict__["request"]))
+        self.patch(requests.Session, "send", self.wrap_send(requests.Session.__dict__["send"]))
+        
+        self.instrument_class(CATEGORY_GIT, LocalGitRepo)
+        
+        classes = [RemoteRepositoryConnectionBase]
+        seen = set()
+        while classes:
+            cls = classes.pop()
+            if cls not in seen:
+                seen.add(cls)
+                self.instrument_class(CATEGORY_GIT, cls)
+                classes += cls.__subclasses__()
+    
+    def start(self):
+        self.instrument()
+        self.start_time = time.time()
+        self.start_cpu = sum(os.times()[:2])
+        if self.pstats_file is not None:
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+        
+    def stop(self):
+        if self.cprofile is not None:
+            self.cprofile.disable()
+            self.cprofile.dump_stats(self.pstats_file)
+        self.wall_time = time.time() - self.start_time
+        self.cpu_time = sum(os.times()[:2]) - self.start_cpu
+        for cls, attr, value in reversed(self.patched):
+            setattr(cls, attr, value)
+        self.patched = []
+        
+    def get_summary(self):
+        """
+        Returns the summary of the run, as a list of lines
+        """
+        lines = []
+        
+        http_time = self.category_time[CATEGORY_HTTP]
+        git_time = self.category_time[CATEGORY_GIT]
+        
+        def pct(t):
+            return (100.0 * t / self.wall_time) if self.wall_time > 0 else 0.0
+        
+        lines.append("%-10s %10s %7s" % ("", "Time (s)", "%"))
+        lines.append("%-10s %10.3f %6.1f%%" % ("Wall", self.wall_time, 100.0))
+        lines.append("%-10s %10.3f %6.1f%%" % ("HTTP", http_time, pct(http_time)))
+        lines.append("%-10s %10.3f %6.1f%%" % ("Git", git_time, pct(git_time)))
+        lines.append("%-10s %10.3f %6.1f%%" % ("CPU", self.cpu_time, pct(self.cpu_time)))
+        
+        for category, title in ((CATEGORY_HTTP, "HTTP requests"), (CATEGORY_GIT, "Git operations")):
+            ops = sorted([(name, op) for (c, name), op in self.operations.items() if c == category],
+                         key = lambda (name, op): op.time, reverse = True)
+            if not ops:
+                continue
+            width = max([len(name) for name, _ in ops] + [len(title)])
+            lines.append("")
+            header = "%-*s %6s %6s %10s %10s %10s" % (width, title, "Count", "Errors", "Total (s)", "Avg (ms)", "Max (ms)")
+            if category == CATEGORY_HTTP:
+                header += " %10s %10s" % ("Sent (B)", "Recv (B)")
+            lines.append(header)
+            for name, op in ops:
+                line = "%-*s %6i %6i %10.3f %10.1f %10.1f" % (width, name, op.count, op.errors, op.time,
+                                                           1000.0 * op.time / op.count, 1000.0 * op.max_time)
+                if category == CATEGORY_HTTP:
+                    line += " %10i %10i" % (op.bytes_sent, op.bytes_received)
+                lines.append(line)
+        
+        if self.pstats_file is not None:
+            lines.append("")
+            lines.append("cProfile statistics written to %s" % self.pstats_file)
+        
+        return lines
@@ -96,6 +96,52 @@ def is_submission_ready_for_grading(assignment_deadline, submission_date, extens
     else:
         return False
     
+# Grading status of a registration (used by the assignment statistics
+# and by show-grading-status, so they classify registrations the same way)
+GRADING_STATUS_NOT_SUBMITTED = "not_submitted"
+GRADING_STATUS_NOT_READY = "not_ready"
+GRADING_STATUS_UNGRADED = "ungraded"
+GRADING_STATUS_PARTIALLY_GRADED = "partially_graded"
+GRADING_STATUS_GRADED = "graded"
+
+GRADING_STATUSES = [GRADING_STATUS_NOT_SUBMITTED, GRADING_STATUS_NOT_READY, GRADING_STATUS_UNGRADED, 
+                    GRADING_STATUS_PARTIALLY_GRADED, GRADING_STATUS_GRADED]
+
+def get_grading_status(submitted, ready_for_grading, n_grades, n_rubric_components):
+    if not submitted:
+        return GRADING_STATUS_NOT_SUBMITTED
+    elif not ready_for_grading:
+        return GRADING_STATUS_NOT_READY
+    elif n_grades == 0:
+        return GRADING_STATUS_UNGRADED
+    elif n_grades < n_rubric_components:
+        return GRADING_STATUS_PARTIALLY_GRADED
+    else:
+        return GRADING_STATUS_GRADED
+    
+def compute_grade_stats(grades):
+    """
+    Summary statistics for a list of grades. The quartiles are computed
+    by indexing into the sorted list (no interpolation).
+    """
+    grades = sorted(grades)
+    n = len(grades)
+    if n == 0:
+        return {"count": 0, "average": None, "stddev": None, "min": None, "max": None,
+                "lower_quartile": None, "median": None, "upper_quartile": None}
+
+    avg = sum(grades) / n
+    stddev = math.sqrt(sum([(x - avg) ** 2 for x in grades]) / n)
+
+    return {"count": n,
+            "average": avg,
+            "stddev": stddev,
+            "min": grades[0],
+            "max": grades[-1],
+            "lower_quartile": grades[int(n * 0.25)],
+            "median": grades[int(n * 0.5)],
+            "upper_quartile": grades[int(n * 0.75)]}
+
 def create_connection(course, config, staging = False):
     if not staging:
         connstr = course.git_server_connstr
@@ -0,0 +1,96 @@
+
+#  Copyright (c) 2013-2014, The University of Chicago
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions are met:
+#
+#  - Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+#  - Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+#  - Neither the name of The University of Chicago nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+#  AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+#  IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+#  ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+#  LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+#  CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+#  SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+#  INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+#  CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+#  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+
+# Wire formats used between the chisubmit client and the API. JSON is 
+# always available, and is what the API returns by default. If the msgpack 
+# package is installed on both ends, the client asks for MessagePack instead, 
+# which is smaller and faster to encode/decode, and also sends datetimes 
+# and timedeltas in a native (binary) encoding.
+
+import datetime
+import decimal
+import struct
+import pytz
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+# MessagePack extension types
+EXT_DATETIME = 1
+EXT_TIMEDELTA = 2
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=pytz.utc)
+
+def msgpack_available():
+    return msgpack is not None
+
+def _total_microseconds(td):
+    return (td.days * 86400 + td.seconds) * 1000000 + td.microseconds
+
+def _msgpack_default(obj):
+    if isinstance(obj, datetime.datetime):
+        if obj.tzinfo is None:
+            obj = pytz.utc.localize(obj)
+        return msgpack.ExtType(EXT_DATETIME, struct.pack(">q", _total_microseconds(obj - EPOCH)))
+    elif isinstance(obj, datetime.timedelta):
+        return msgpack.ExtType(EXT_TIMEDELTA, struct.pack(">q", _total_microseconds(obj)))
+    elif isinstance(obj, decimal.Decimal):
+        return str(obj)
+    
+    raise TypeError("Type not serializable: %s" % type(obj))
+
+def _msgpack_ext_hook(code, data):
+    if code == EXT_DATETIME:
+        return EPOCH + datetime.timedelta(microseconds = struct.unpack(">q", data)[0])
+    elif code == EXT_TIMEDELTA:
+        return datetime.timedelta(microseconds = struct.unpack(">q", data)[0])
+    else:
+        return msgpack.ExtType(code, data)
+
+def msgpack_dumps(data):
+    return msgpack.packb(data, default=_msgpack_default, use_bin_type=True)
+
+def msgpack_loads(data):
+    try:
+        return msgpack.unpackb(data, ext_hook=_msgpack_ext_hook, raw=False)
+    except Exception, e:
+        raise ValueError("Invalid MessagePack data: %s" % e)
+
+def is_msgpack(content_type):
+    return content_type is not None and content_type.split(";")[0].strip() == MSGPACK_MEDIA_TYPE
+
+# Response header included when only some of the fields of the returned
+# objects were requested (with the "fields" query parameter)
+SPARSE_FIELDS_HEADER = "X-Chisubmit-Fields"
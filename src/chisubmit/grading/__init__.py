@@ -0,0 +1,259 @@
+
+#  Copyright (c) 2013-2014, The University of Chicago
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions are met:
+#
+#  - Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+#  - Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+#  - Neither the name of The University of Chicago nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+#  AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+#  IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+#  ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+#  LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+#  CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+#  SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+#  INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+#  CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+#  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+
+import heapq
+import random
+
+WORKLOAD_REMAINDER = "remainder"
+
+# Cost of assigning a team to a grader. Continuity (the grader that graded
+# the team in a previous assignment) is preferred, and a grader we are
+# asked to avoid is only used when no other grader is available.
+COST_CONTINUITY = 0
+COST_DEFAULT = 1
+COST_AVOID = 1000
+
+
+class GraderAssignmentException(Exception):
+    pass
+
+
+def compute_workloads(grader_workload, n_teams, seed=None):
+    """
+    Given a dictionary mapping grader usernames to either a fixed number
+    of teams or WORKLOAD_REMAINDER, return a dictionary mapping each grader
+    to the number of teams they should grade. The teams that are not
+    assigned to graders with a fixed workload are split evenly among the
+    "remainder" graders. If the split is not exact, the extra teams are
+    given to a (seeded) random subset of those graders.
+    """
+    workloads = {}
+    remainder_graders = []
+    assigned = 0
+
+    for username in sorted(grader_workload):
+        workload = grader_workload[username]
+        if workload == WORKLOAD_REMAINDER:
+            remainder_graders.append(username)
+        elif isinstance(workload, bool) or not isinstance(workload, (int, long)) or workload <= 0:
+            raise GraderAssignmentException("Invalid workload for grader '%s': %s" % (username, workload))
+        else:
+            workloads[username] = workload
+            assigned += workload
+
+    if len(remainder_graders) > 0:
+        n_remainder = max(0, n_teams - assigned)
+        min_teams_per_grader = n_remainder / len(remainder_graders)
+        extra_teams = n_remainder % len(remainder_graders)
+
+        for username in remainder_graders:
+            workloads[username] = min_teams_per_grader
+
+        random.Random(seed).shuffle(remainder_graders)
+        for username in remainder_graders[:extra_teams]:
+            workloads[username] += 1
+
+    return workloads
+
+
+class GraderAssignment(object):
+    """
+    Assigns teams to graders by solving a min-cost flow problem:
+
+        source -> team (capacity 1) -> grader (capacity 1, cost) -> sink (capacity: workload)
+
+    The flow is computed with the successive shortest path algorithm
+    (using node potentials, so Dijkstra can be used). Since an augmenting
+    path can only "reshuffle" teams between graders, the residual graph is
+    collapsed to the graders themselves: the edge a -> b represents moving
+    the cheapest team currently assigned to a over to b, and the edge
+    source -> b represents the cheapest unassigned team for b. Each of
+    those edges is backed by a heap, so a single augmentation costs
+    O(G^2) on the number of graders, regardless of the number of teams.
+
+    If there is not enough capacity (or there are conflicts), as many
+    teams as possible are assigned, and the rest are left without a grader.
+
+    The result is deterministic: teams and graders are processed in sorted
+    order and, among equally cheap graders, the one with the fewest teams
+    is preferred (which spreads teams round-robin across graders).
+    """
+
+    def __init__(self, team_ids, workloads, team_members=None, conflicts=None,
+                 continuity=None, avoid=None):
+        """
+        :param team_ids: Teams that need a grader
+        :param workloads: Dictionary mapping grader usernames to the
+                          number of teams they can still be assigned.
+        :param team_members: Dictionary mapping team ids to the usernames
+                             of the team's members.
+        :param conflicts: Dictionary mapping grader usernames to the
+                          usernames of students they cannot grade.
+        :param continuity: Dictionary mapping team ids to the grader they
+                           should preferably be assigned to.
+        :param avoid: Dictionary mapping team ids to a grader they should
+                      not be assigned to, if at all possible.
+        """
+        self.team_ids = sorted(set(team_ids))
+        self.graders = sorted(workloads)
+        self.workloads = dict(workloads)
+
+        team_members = team_members or {}
+        conflicts = conflicts or {}
+        continuity = continuity or {}
+        avoid = avoid or {}
+
+        conflicts = dict((g, set(students)) for g, students in conflicts.items() if len(students) > 0)
+
+        # Build the cost matrix (None means the team cannot be assigned
+        # to that grader)
+        self._costs = []
+        for team_id in self.team_ids:
+            members = set(team_members.get(team_id, []))
+            costs = []
+            for grader in self.graders:
+                if members and grader in conflicts and not members.isdisjoint(conflicts[grader]):
+                    costs.append(None)
+                elif continuity.get(team_id) == grader:
+                    costs.append(COST_CONTINUITY)
+                elif avoid.get(team_id) == grader:
+                    costs.append(COST_AVOID)
+                else:
+                    costs.append(COST_DEFAULT)
+            self._costs.append(costs)
+
+    def solve(self):
+        """
+        Returns a dictionary mapping each team id to a grader username,
+        or to None if the team could not be assigned a grader (because
+        there was not enough capacity, or because of conflicts).
+        """
+        n_graders = len(self.graders)
+        sink = n_graders
+        costs = self._costs
+
+        remaining = [max(0, self.workloads[g]) for g in self.graders]
+        load = [0] * n_graders
+        potential = [0] * (n_graders + 1)
+        assignment = [None] * len(self.team_ids)
+
+        # unassigned[g] is a heap of (cost(t,g), t) for the teams t that
+        # have not been assigned yet, and moves[a][b] is a heap of
+        # (cost(t,b) - cost(t,a), t) for the teams t assigned to a. Entries
+        # that no longer apply are discarded lazily.
+        unassigned = [[] for _ in range(n_graders)]
+        moves = [[[] for _ in range(n_graders)] for _ in range(n_graders)]
+
+        for t, team_costs in enumerate(costs):
+            for g, cost in enumerate(team_costs):
+                if cost is not None:
+                    unassigned[g].append((cost, t))
+        for heap in unassigned:
+            heapq.heapify(heap)
+
+        def assign(t, g):
+            assignment[t] = g
+            cost_g = costs[t][g]
+            for b in range(n_graders):
+                cost_b = costs[t][b]
+                if b != g and cost_b is not None:
+                    heapq.heappush(moves[g][b], (cost_b - cost_g, t))
+
+        def cheapest(heap, g):
+            while heap and assignment[heap[0][1]] != g:
+                heapq.heappop(heap)
+            if heap:
+                return heap[0]
+            else:
+                return None
+
+        while True:
+            dist = [None] * (n_graders + 1)
+            prev = [None] * (n_graders + 1)
+            done = [False] * (n_graders + 1)
+
+            for g in range(n_graders):
+                entry = cheapest(unassigned[g], None)
+                if entry is not None:
+                    dist[g] = entry[0] - potential[g]
+                    prev[g] = entry[1]
+
+            while True:
+                u = None
+                for v in range(n_graders + 1):
+                    if done[v] or dist[v] is None:
+                        continue
+                    if u is None or dist[v] < dist[u] or \
+                       (dist[v] == dist[u] and u != sink and (v == sink or load[v] < load[u])):
+                        u = v
+
+                if u is None or u == sink:
+                    break
+
+                done[u] = True
+
+                if remaining[u] > 0:
+                    d = dist[u] + potential[u] - potential[sink]
+                    if dist[sink] is None or d < dist[sink]:
+                        dist[sink] = d
+                        prev[sink] = u
+
+                for v in range(n_graders):
+                    if done[v]:
+                        continue
+                    move = cheapest(moves[u][v], u)
+                    if move is not None:
+                        d = dist[u] + move[0] + potential[u] - potential[v]
+                        if dist[v] is None or d < dist[v]:
+                            dist[v] = d
+                            prev[v] = (u, move[1])
+
+            if dist[sink] is None:
+                # No more augmenting paths: any team that is still
+                # unassigned cannot be assigned a grader.
+                break
+
+            for v in range(n_graders + 1):
+                if dist[v] is None or dist[v] > dist[sink]:
+                    potential[v] += dist[sink]
+                else:
+                    potential[v] += dist[v]
+
+            g = prev[sink]
+            remaining[g] -= 1
+            load[g] += 1
+            while isinstance(prev[g], tuple):
+                from_g, moved_t = prev[g]
+                assign(moved_t, g)
+                g = from_g
+            assign(prev[g], g)
+
+        return dict((team_id, self.graders[g] if g is not None else None)
+                    for team_id, g in zip(self.team_ids, assignment))
@@ -0,0 +1,283 @@
+import csv
+import os
+import os.path
+import shutil
+import stat
+import tarfile
+import tempfile
+import threading
+import time
+import zipfile
+from Queue import Queue
+from StringIO import StringIO
+
+from chisubmit.common import ChisubmitException
+from chisubmit.repos.local import LocalGitRepo
+from chisubmit.repos.grading import GradingGitRepo
+
+EXPORT_FORMAT_TARGZ = "tar.gz"
+EXPORT_FORMAT_ZIP = "zip"
+EXPORT_FORMATS = [EXPORT_FORMAT_TARGZ, EXPORT_FORMAT_ZIP]
+
+EXPORT_EXPORTED = "exported"
+EXPORT_UNCHANGED = "unchanged"
+EXPORT_NOT_SUBMITTED = "not submitted"
+EXPORT_FAILED = "failed"
+
+DEFAULT_EXPORT_WORKERS = 4
+
+MANIFEST_FILE = "manifest.csv"
+MANIFEST_FIELDS = ["team", "sha", "submitted_at", "extensions_used"]
+
+
+def get_export_format(filename):
+    if filename.endswith(".zip"):
+        return EXPORT_FORMAT_ZIP
+    elif filename.endswith(".tar.gz") or filename.endswith(".tgz"):
+        return EXPORT_FORMAT_TARGZ
+    else:
+        return None
+
+
+class SubmissionExporter(object):
+    """
+    Exports the files in the final submissions of an assignment to a
+    single zip or tar.gz archive, with a directory per team and a
+    manifest (MANIFEST_FILE) with the team, commit SHA, submission date,
+    and extensions used of every submission in the archive.
+
+    The files in each submission are first written (by git archive) to
+    a tar file in the work directory, using several threads. If an
+    export is interrupted, or a later export of the same assignment
+    finds that a team's submission hasn't changed, that tar file is
+    reused. The submissions are taken from the grading repositories, if
+    they have the submitted commit, or otherwise from bare "mirror"
+    repositories (in the work directory) where only the submitted
+    commits are fetched.
+
+    Only one submission is read into memory at a time, and only one file
+    at a time when writing the archive.
+    """
+
+    def __init__(self, config, course, assignment, workers = DEFAULT_EXPORT_WORKERS):
+        if workers < 1:
+            raise ChisubmitException("The number of export workers must be at least 1 (got %i)" % workers)
+        
+        self.config = config
+        self.course = course
+        self.assignment = assignment
+        self.workers = workers
+
+        self.parts_dir = "%s/exports/%s/%s" % (config.work_dir, course.course_id, assignment.assignment_id)
+        self.mirrors_dir = "%s/mirrors/%s" % (config.work_dir, course.course_id)
+
+    def get_part_path(self, team, commit_sha):
+        return "%s/%s/%s.tar" % (self.parts_dir, team.team_id, commit_sha)
+
+    def get_mirror_path(self, team):
+        return "%s/%s.git" % (self.mirrors_dir, team.team_id)
+
+    def export_submissions(self, teams_registrations, conn):
+        """
+        Writes the tar files of the submissions that haven't been
+        exported yet. Yields a (team, registration, status, error) tuple
+        for each team as soon as its submission has been exported.
+        """
+        tasks = Queue()
+        results = Queue()
+
+        n_tasks = 0
+        for team in sorted(teams_registrations.keys(), key = lambda t: t.team_id):
+            registration = teams_registrations[team]
+
+            if registration.final_submission is None:
+                yield team, registration, EXPORT_NOT_SUBMITTED, None
+            elif os.path.exists(self.get_part_path(team, registration.final_submission.commit_sha)):
+                yield team, registration, EXPORT_UNCHANGED, None
+            else:
+                # The connection may not be thread-safe, so we get the
+                # URLs here
+                url = conn.get_repository_git_url(self.course, team)
+                tasks.put((team, registration, url))
+                n_tasks += 1
+
+        if n_tasks > 0 and not os.path.exists(self.parts_dir):
+            os.makedirs(self.parts_dir)
+
+        threads = []
+        for i in range(min(self.workers, n_tasks)):
+            tasks.put(None)
+            t = threading.Thread(target = self.__export_worker, args = (tasks, results))
+            t.daemon = True
+            t.start()
+            threads.append(t)
+
+        for i in range(n_tasks):
+            yield results.get()
+
+        for t in threads:
+            t.join()
+
+    def write_archive(self, teams_registrations, output, export_format):
+        """
+        Writes the archive with the exported submissions (and the manifest)
+        to output. The archive is written to a temporary file first, so
+        output is never left incomplete.
+        """
+        if export_format not in EXPORT_FORMATS:
+            raise ChisubmitException("Unknown export format: %s" % export_format)
+
+        exported = []
+        for team in sorted(teams_registrations.keys(), key = lambda t: t.team_id):
+            registration = teams_registrations[team]
+            if registration.final_submission is not None:
+                part_path = self.get_part_path(team, registration.final_submission.commit_sha)
+                if os.path.exists(part_path):
+                    exported.append((team, registration, part_path))
+
+        output_dir = os.path.dirname(os.path.abspath(output))
+        fd, tmp_output = tempfile.mkstemp(dir = output_dir, prefix = ".%s-" % os.path.basename(output))
+        os.close(fd)
+
+        try:
+            if export_format == EXPORT_FORMAT_ZIP:
+                archive = ZipArchiveWriter(tmp_output)
+            else:
+                archive = TarArchiveWriter(tmp_output)
+
+            try:
+                archive.add_file(MANIFEST_FILE, self.get_manifest(exported))
+                for team, registration, part_path in exported:
+                    archive.add_tar(part_path)
+            finally:
+                archive.close()
+
+            os.rename(tmp_output, output)
+        except:
+            if os.path.exists(tmp_output):
+                os.remove(tmp_output)
+            raise
+
+        return len(exported)
+
+    def get_manifest(self, exported):
+        manifest = StringIO()
+
+        writer = csv.writer(manifest)
+        writer.writerow(MANIFEST_FIELDS)
+        for team, registration, part_path in exported:
+            submission = registration.final_submission
+            writer.writerow([team.team_id, submission.commit_sha,
+                             submission.submitted_at.isoformat(), submission.extensions_used])
+
+        return manifest.getvalue()
+
+    def __export_worker(self, tasks, results):
+        while True:
+            task = tasks.get()
+            if task is None:
+                return
+
+            team, registration, url = task
+            try:
+                self.__export_submission(team, registration, url)
+                results.put((team, registration, EXPORT_EXPORTED, None))
+            except Exception, e:
+                results.put((team, registration, EXPORT_FAILED, str(e)))
+
+    def __export_submission(self, team, registration, url):
+        commit_sha = registration.final_submission.commit_sha
+
+        repo = self.__get_source_repo(team, registration, commit_sha, url)
+
+        part_path = self.get_part_path(team, commit_sha)
+        team_parts_dir = os.path.dirname(part_path)
+        if not os.path.exists(team_parts_dir):
+            os.makedirs(team_parts_dir)
+            
+        tmp_part_path = part_path + ".tmp"
+        repo.archive(commit_sha, tmp_part_path, prefix = "%s/" % team.team_id)
+        os.rename(tmp_part_path, part_path)
+
+        # Remove the submissions previously exported for this team
+        for filename in os.listdir(team_parts_dir):
+            if filename != os.path.basename(part_path):
+                os.remove(os.path.join(team_parts_dir, filename))
+
+    def __get_source_repo(self, team, registration, commit_sha, url):
+        grading_repo = GradingGitRepo.get_grading_repo(self.config, self.course, team, registration)
+        if grading_repo is not None and grading_repo.repo.get_commit(commit_sha) is not None:
+            return grading_repo.repo
+
+        mirror_path = self.get_mirror_path(team)
+        if os.path.exists(mirror_path):
+            repo = LocalGitRepo.open(mirror_path)
+        else:
+            repo = LocalGitRepo.create_repo(mirror_path, bare = True, remotes = [("origin", url)])
+
+        if repo.get_commit(commit_sha) is None:
+            if repo.fetch_commit("origin", commit_sha, shallow = True) is None:
+                raise ChisubmitException("%s repository does not have a commit %s" % (team.team_id, commit_sha))
+
+        return repo
+
+
+class TarArchiveWriter(object):
+
+    def __init__(self, filename):
+        self.tar = tarfile.open(filename, "w:gz")
+
+    def add_file(self, name, data):
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        self.tar.addfile(info, StringIO(data))
+
+    def add_tar(self, tar_path):
+        with tarfile.open(tar_path) as part:
+            for member in part:
+                if member.isfile():
+                    self.tar.addfile(member, part.extractfile(member))
+                else:
+                    self.tar.addfile(member)
+
+    def close(self):
+        self.tar.close()
+
+
+class ZipArchiveWriter(object):
+
+    def __init__(self, filename):
+        self.zip = zipfile.ZipFile(filename, "w", zipfile.ZIP_DEFLATED, allowZip64 = True)
+
+    def add_file(self, name, data):
+        self.zip.writestr(name, data)
+
+    def add_tar(self, tar_path):
+        with tarfile.open(tar_path) as part:
+            for member in part:
+                if member.isdir():
+                    info = zipfile.ZipInfo(member.name + "/", time.localtime(member.mtime)[:6])
+                    info.external_attr = (stat.S_IFDIR | member.mode) << 16
+                    self.zip.writestr(info, "")
+                elif member.issym():
+                    info = zipfile.ZipInfo(member.name, time.localtime(member.mtime)[:6])
+                    info.external_attr = (stat.S_IFLNK | 0777) << 16
+                    self.zip.writestr(info, member.linkname)
+                elif member.isfile():
+                    self.__add_member(part, member)
+
+    def __add_member(self, part, member):
+        # ZipFile can only write files from a string or from a file, so we
+        # copy the file to a temporary file instead of reading it into memory
+        fd, tmp_file = tempfile.mkstemp()
+        try:
+            with os.fdopen(fd, "wb") as f:
+                shutil.copyfileobj(part.extractfile(member), f)
+            os.chmod(tmp_file, member.mode)
+            os.utime(tmp_file, (member.mtime, member.mtime))
+            self.zip.write(tmp_file, member.name)
+        finally:
+            os.remove(tmp_file)
+
+    def close(self):
+        self.zip.close()
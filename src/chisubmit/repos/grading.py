@@ -1,7 +1,7 @@
 import os.path
 
 from chisubmit.common import ChisubmitException
-from chisubmit.repos.local import LocalGitRepo
+from chisubmit.repos.local import LocalGitRepo, CLONE_FULL
 from chisubmit.common.utils import create_connection
 
 
@@ -22,7 +22,7 @@ class GradingGitRepo(object):
         if not os.path.exists(repo_path):
             return None
         else:
-            repo = LocalGitRepo(repo_path)
+            repo = LocalGitRepo.open(repo_path)
             if registration.final_submission is None:
                 commit_sha = None
             else:
@@ -40,7 +40,7 @@ class GradingGitRepo(object):
             return cls(team, registration, repo, repo_path, commit_sha, staging_only)
 
     @classmethod
-    def create_grading_repo(cls, config, course, team, registration, staging_only):
+    def create_grading_repo(cls, config, course, team, registration, staging_only, clone_mode = CLONE_FULL):
         base_dir = config.work_dir
         
         if not staging_only:
@@ -55,16 +55,21 @@ class GradingGitRepo(object):
         repo_path = cls.get_grading_repo_path(base_dir, course, team, registration)
         staging_url = conn_staging.get_repository_git_url(course, team)
 
-        if staging_only:
-            repo = LocalGitRepo.create_repo(repo_path, clone_from_url = staging_url)
-        else:
-            server_url = conn_server.get_repository_git_url(course, team)
-            repo = LocalGitRepo.create_repo(repo_path, clone_from_url = server_url, remotes = [("staging", staging_url)])
-
         if registration.final_submission is None:
             commit_sha = None
+            shallow_commits = []
         else:
             commit_sha = registration.final_submission.commit_sha        
+            shallow_commits = [commit_sha]
+
+        if staging_only:
+            repo = LocalGitRepo.create_repo(repo_path, clone_from_url = staging_url, clone_mode = clone_mode,
+                                            shallow_commits = shallow_commits)
+        else:
+            server_url = conn_server.get_repository_git_url(course, team)
+            repo = LocalGitRepo.create_repo(repo_path, clone_from_url = server_url, remotes = [("staging", staging_url)],
+                                            clone_mode = clone_mode, shallow_commits = shallow_commits)
+
         return cls(team, registration, repo, repo_path, commit_sha, staging_only)
 
     def sync(self):
@@ -72,6 +77,12 @@ class GradingGitRepo(object):
         if not self.staging_only:
             self.repo.fetch("staging")
         self.repo.reset_branch("origin", "master")
+        
+        # Shallow clones won't have the submission commit if the server 
+        # didn't let us fetch it when cloning, and the students pushed 
+        # more commits after submitting
+        if self.commit_sha is not None and self.repo.get_commit(self.commit_sha) is None:
+            self.repo.fetch_commit("origin", self.commit_sha)
 
     def create_grading_branch(self):
         branch_name = self.registration.get_grading_branch_name()
@@ -140,6 +151,10 @@ class GradingGitRepo(object):
         if not self.repo.has_branch(branch_name):
             raise ChisubmitException("%s repository does not have a %s branch" % (self.team.id, branch_name))
 
+        # A shallow grading repository (see create-grading-repos --shallow)
+        # has to get the full history from the students' repository first
+        self.repo.unshallow("origin")
+
         if push_master:
             self.repo.push(remote_name, "master")
 
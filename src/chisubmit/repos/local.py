@@ -1,27 +1,250 @@
 import git
 from git.exc import GitCommandError
 from chisubmit.common import ChisubmitException
-from gitdb.exc import BadObject
+from gitdb import GitDB
+from gitdb.exc import BadObject, BadName
+from gitdb.util import hex_to_bin
 from chisubmit.repos import GitCommit, GitTag
+from collections import OrderedDict
+import atexit
 import datetime
+import os.path
+import thread
+import threading
+
+# Maximum number of repositories kept open by LocalGitRepo.open
+MAX_OPEN_REPOS = 32
+
+# Maximum number of symbolic refs followed when resolving a ref
+MAX_SYMREF_DEPTH = 5
+
+# How LocalGitRepo.create_repo clones a repository: with all its history
+# (full), with all its commits and trees but fetching blobs only when 
+# they're needed (partial), or with just the latest commit (shallow)
+CLONE_FULL = "full"
+CLONE_PARTIAL = "partial"
+CLONE_SHALLOW = "shallow"
+CLONE_MODES = [CLONE_FULL, CLONE_PARTIAL, CLONE_SHALLOW]
+
+
+class GitReadBackend(object):
+    """
+    Reads commits, tags, and refs through GitPython, which runs git
+    (cat-file) to read objects.
+    """
+    
+    def __init__(self, repo):
+        self.repo = repo
+        
+    def get_commit(self, rev):
+        try:
+            commit = self.repo.commit(rev)
+            # Objects are read lazily, so make sure it exists
+            self.repo.odb.info(commit.binsha)
+            return commit
+        except (BadObject, ValueError):
+            # git cat-file reports missing objects with a ValueError
+            return None
+
+    def get_tag_commit(self, tag_name):
+        tags = [t for t in self.repo.tags if t.name == tag_name]
+
+        if len(tags) == 0:
+            return None
+        else:
+            return tags[0].commit
+        
+    def has_ref(self, path):
+        return len([r for r in self.repo.refs if r.path == path]) > 0
+        
+
+class ObjectReadBackend(GitReadBackend):
+    """
+    Reads commits, tags, and refs directly from the repository's files
+    (loose and packed objects are read with gitdb) without running git.
+    """
+    
+    def __init__(self, repo):
+        GitReadBackend.__init__(self, git.Repo(repo.git_dir, odbt = GitDB))
+        self.git_dir = repo.git_dir
+        self.packed_refs = None
+        self.packed_refs_mtime = None
+        
+    def get_commit(self, rev):
+        return self.__read_object(lambda: self.__get_commit(rev))
+
+    def get_tag_commit(self, tag_name):
+        sha = self.get_ref("refs/tags/%s" % tag_name)
+        
+        if sha is None:
+            return None
+        else:
+            return self.__read_object(lambda: self.__get_peeled_object(sha))
+    
+    def has_ref(self, path):
+        return (self.get_ref(path) is not None)
+    
+    def get_ref(self, path):
+        """
+        Returns the SHA of the object a ref points to (following
+        symbolic refs), or None if there is no such ref.
+        """
+        for i in range(MAX_SYMREF_DEPTH):
+            ref_file = os.path.join(self.git_dir, path)
+            
+            if not os.path.isfile(ref_file):
+                return self.__get_packed_refs().get(path)
+            
+            with open(ref_file) as f:
+                value = f.read().strip()
+
+            if value.startswith("ref: "):
+                path = value[5:]
+            else:
+                return value
+            
+        return None
+    
+    def __get_commit(self, rev):
+        commit = self.repo.commit(rev)
+        self.repo.odb.info(commit.binsha)
+        return commit
+    
+    def __get_peeled_object(self, sha):
+        obj = git.Object.new_from_sha(self.repo, hex_to_bin(sha))
+        
+        while obj.type == "tag":
+            obj = obj.object
+            
+        return obj
+    
+    def __read_object(self, read):
+        try:
+            return read()
+        except BadObject:
+            # The object may be in a pack that was created after we 
+            # listed the packs (e.g., by a push or a fetch)
+            if not self.repo.odb.update_cache(force = True):
+                return None
+            
+        try:
+            return read()
+        except BadObject:
+            return None
+            
+    def __get_packed_refs(self):
+        packed_refs_file = os.path.join(self.git_dir, "packed-refs")
+        
+        if not os.path.isfile(packed_refs_file):
+            return {}
+
+        mtime = os.stat(packed_refs_file).st_mtime
+        if self.packed_refs is None or mtime != self.packed_refs_mtime:
+            self.packed_refs = {}
+            with open(packed_refs_file) as f:
+                for line in f:
+                    # Skip the header and peeled tags
+                    if line.startswith("#") or line.startswith("^"):
+                        continue
+                    sha, ref = line.split()
+                    self.packed_refs[ref] = sha
+            self.packed_refs_mtime = mtime
+            
+        return self.packed_refs
+
+# Backend used to read commits, tags and refs (when it fails to read 
+# something, LocalGitRepo falls back on GitReadBackend)
+DEFAULT_READ_BACKEND = ObjectReadBackend
+
 
 class LocalGitRepo(object):
-    def __init__(self, directory):
+    def __init__(self, directory, read_backend = None):
         self.repo = git.Repo(directory)
 
         self.remotes = dict([(r.name, r) for r in self.repo.remotes])
+        
+        if read_backend is None:
+            read_backend = DEFAULT_READ_BACKEND
+        self.read_backend = read_backend(self.repo)
+        if read_backend is GitReadBackend:
+            self.fallback_read_backend = None
+        else:
+            self.fallback_read_backend = GitReadBackend(self.repo)
+
+    @classmethod
+    def open(cls, directory):
+        """
+        Returns an open repository from the pool of open repositories
+        (see LocalGitRepoPool), opening it if necessary. Should be used 
+        instead of the constructor when the same repository is likely 
+        to be accessed several times.
+        """
+        return repo_pool.get(directory)
+
+    def close(self):
+        """
+        Stops the git processes kept alive by the repository.
+        """
+        self.repo.close()
+        self.read_backend.repo.close()
 
     @classmethod
-    def create_repo(cls, directory, bare = False, clone_from_url = None, remotes = []):
+    def create_repo(cls, directory, bare = False, clone_from_url = None, remotes = [], clone_mode = CLONE_FULL,
+                    shallow_commits = []):
+        """
+        Creates a repository, cloning it from clone_from_url (if given).
+        A shallow clone only has the latest commit of each branch, plus 
+        the commits in shallow_commits (e.g., the commit of a submission).
+        """
+        # A repository that was previously at this path may still be open
+        repo_pool.discard(directory)
+        
         if clone_from_url is None:
-            git.Repo.init(directory, bare = bare)
+            repo = git.Repo.init(directory, bare = bare)
         else:
-            repo = git.Repo.clone_from(clone_from_url, directory)
-
-            for remote_name, remote_url in remotes:
-                repo.create_remote(remote_name, remote_url)
-
-            return cls(directory)
+            if clone_mode not in CLONE_MODES:
+                raise ChisubmitException("Unknown clone mode: %s" % clone_mode)
+            
+            # git ignores the partial/shallow options when cloning from 
+            # a local path
+            if clone_mode != CLONE_FULL and os.path.isdir(clone_from_url):
+                clone_from_url = "file://" + os.path.abspath(clone_from_url)
+            
+            if clone_mode == CLONE_SHALLOW and len(shallow_commits) > 0:
+                repo = cls.__shallow_clone(directory, clone_from_url, shallow_commits)
+            else:
+                clone_options = {}
+                if clone_mode == CLONE_PARTIAL:
+                    clone_options["filter"] = "blob:none"
+                elif clone_mode == CLONE_SHALLOW:
+                    clone_options["depth"] = 1
+                
+                repo = git.Repo.clone_from(clone_from_url, directory, **clone_options)
+
+        for remote_name, remote_url in remotes:
+            repo.create_remote(remote_name, remote_url)
+
+        return cls(directory)
+
+    @staticmethod
+    def __shallow_clone(directory, url, commits):
+        # git clone can only get the latest commits of the branches, so we 
+        # fetch the branches and the commits we need (with depth 1) into a
+        # new repository, and then check out master (like git clone does)
+        repo = git.Repo.init(directory)
+        repo.create_remote("origin", url)
+        
+        try:
+            repo.git.fetch("origin", "+refs/heads/*:refs/remotes/origin/*", *commits, depth = 1)
+        except GitCommandError:
+            # The remote may not allow fetching commits by their SHA
+            # (they can be fetched later with fetch_commit)
+            repo.git.fetch("origin", depth = 1)
+        
+        if "master" in [ref.remote_head for ref in repo.remotes.origin.refs]:
+            repo.git.checkout("master")
+        
+        return repo
 
     def fetch(self, remote_name, branch = None):
         if branch is None:
@@ -29,6 +252,57 @@ class LocalGitRepo(object):
         else:
             self.remotes[remote_name].fetch("%s:%s" % (branch, branch))
 
+    def fetch_commit(self, remote_name, commit_sha, shallow = None):
+        """
+        Fetches a commit that is not in the repository (e.g., because the
+        repository is a shallow clone) from a remote. Returns the commit,
+        or None if the remote doesn't have it either.
+        
+        If shallow is true, only the commit is fetched (by default, only
+        in shallow repositories)
+        """
+        if shallow is None:
+            shallow = self.is_shallow()
+        
+        try:
+            if shallow:
+                # Fetch just that commit, instead of all the history 
+                # leading up to it
+                self.repo.git.fetch(remote_name, commit_sha, depth = 1)
+            else:
+                self.repo.git.fetch(remote_name, commit_sha)
+        except GitCommandError:
+            # The remote may not allow fetching commits by their SHA, 
+            # so we fetch all the history instead
+            try:
+                self.repo.git.fetch(remote_name, unshallow = self.is_shallow())
+            except GitCommandError:
+                pass
+            
+        return self.get_commit(commit_sha)
+    
+    def archive(self, commit_sha, output_file, prefix = None):
+        """
+        Writes the files in a commit to a tar file (with git archive, 
+        which writes them straight to the file)
+        """
+        try:
+            # git runs in the repository's directory
+            self.repo.git.archive(commit_sha, format = "tar", output = os.path.abspath(output_file), prefix = prefix)
+        except GitCommandError:
+            raise ChisubmitException("Could not create an archive of commit %s" % commit_sha)
+    
+    def is_shallow(self):
+        return os.path.exists(os.path.join(self.repo.git_dir, "shallow"))
+
+    def unshallow(self, remote_name):
+        """
+        Fetches the history that is missing from a shallow repository
+        (remotes will not accept pushes from a shallow repository)
+        """
+        if self.is_shallow():
+            self.repo.git.fetch(remote_name, unshallow = True)
+
     def reset_branch(self, remote_name, branch):
         branch_refpath = "refs/heads/%s" % branch
         remote_branch_refpath = "refs/remotes/%s/%s" % (remote_name, branch)
@@ -52,10 +326,10 @@ class LocalGitRepo(object):
         self.repo.head.reset(remote_branch.commit, index=True, working_tree=True)
 
     def has_branch(self, branch):
-        return (self.__get_branch(branch) is not None)
+        return self.__read("has_ref", "refs/heads/%s" % branch)
 
     def has_remote_branch(self, remote_name, branch):
-        return (self.__get_ref("refs/remotes/%s/%s" % (remote_name, branch)) is not None)
+        return self.__read("has_ref", "refs/remotes/%s/%s" % (remote_name, branch))
 
     def checkout_branch(self, branch):
         branch_refpath = "refs/heads/%s" % branch
@@ -82,21 +356,22 @@ class LocalGitRepo(object):
         
 
     def get_commit(self, commit_sha):
-        try:
-            commit = self.repo.commit(commit_sha)
-            commit_obj = self.__create_commit_object(commit)
-            return commit_obj
-        except BadObject, bo:
+        commit = self.__read("get_commit", commit_sha)
+        
+        if commit is None:
             return None
+        else:
+            return self.__create_commit_object(commit)
               
 
     def get_tag(self, tag):
-        tags = [t for t in self.repo.tags if t.name == tag]
+        commit = self.__read("get_tag_commit", tag)
 
-        if len(tags) == 0:
+        if commit is None:
             return None
         else:
-            return self.__create_tag_object(tags[0])
+            return GitTag(name = tag,
+                          commit = self.__create_commit_object(commit))
 
     def has_tag(self, tag):
         return (self.get_tag(tag) is not None)
@@ -124,10 +399,16 @@ class LocalGitRepo(object):
     def is_dirty(self):
         return self.repo.is_dirty() 
 
-    def __create_tag_object(self, tag):
-        return GitTag(name = tag.name,
-                      commit = self.__create_commit_object(tag.commit))            
-
+    def __read(self, method, *args):
+        try:
+            return getattr(self.read_backend, method)(*args)
+        except BadName:
+            # Not something the fallback backend could read either
+            raise
+        except Exception:
+            if self.fallback_read_backend is None:
+                raise
+            return getattr(self.fallback_read_backend, method)(*args)
 
     def __create_commit_object(self, commit):
         authored_date = datetime.datetime.fromtimestamp(commit.authored_date)
@@ -146,14 +427,6 @@ class LocalGitRepo(object):
         else:
             return heads[0]
 
-    def __get_branch(self, branch):
-        branches = [b for b in self.repo.branches if b.name == branch]
-
-        if len(branches) == 0:
-            return None
-        else:
-            return branches[0]
-
     def __get_ref(self, path):
         refs = [r for r in self.repo.refs if r.path == path]
 
@@ -161,3 +434,73 @@ class LocalGitRepo(object):
             return None
         else:
             return refs[0]
+
+
+class LocalGitRepoPool(object):
+    """
+    LRU pool of open repositories, keyed by path.
+    
+    Every repository keeps a few git processes (to read objects) alive 
+    while it is open, so reusing open repositories saves spawning those 
+    processes every time a repository is accessed. Repositories are 
+    closed when they are evicted from the pool, and when the program
+    exits.
+    
+    Those processes can't be shared by several threads, so each thread
+    gets its own repositories. 
+    """
+    
+    def __init__(self, max_size = MAX_OPEN_REPOS):
+        self.max_size = max_size
+        self.repos = OrderedDict()
+        self.lock = threading.Lock()
+        
+    def get(self, directory):
+        key = (thread.get_ident(), os.path.realpath(directory))
+        
+        with self.lock:
+            repo = self.repos.pop(key, None)
+            if repo is not None and os.path.isdir(repo.repo.git_dir):
+                self.repos[key] = repo
+                return repo
+            
+        if repo is not None:
+            # The repository was removed
+            repo.close()
+            
+        repo = LocalGitRepo(directory)
+        
+        with self.lock:
+            self.repos[key] = repo
+            evicted = []
+            while len(self.repos) > self.max_size:
+                evicted.append(self.repos.popitem(last = False)[1])
+        
+        for evicted_repo in evicted:
+            evicted_repo.close()
+            
+        return repo
+    
+    def discard(self, directory):
+        path = os.path.realpath(directory)
+        
+        with self.lock:
+            discarded = [self.repos.pop(key) for key in self.repos.keys() if key[1] == path]
+            
+        for repo in discarded:
+            repo.close()
+    
+    def close_all(self):
+        with self.lock:
+            repos = self.repos.values()
+            self.repos.clear()
+            
+        for repo in repos:
+            repo.close()
+            
+    def __len__(self):
+        return len(self.repos)
+        
+
+repo_pool = LocalGitRepoPool()
+atexit.register(repo_pool.close_all)
@@ -68,6 +68,13 @@ class TestingConnection(RemoteRepositoryConnectionBase):
         
         repo = LocalGitRepo.create_repo(repo_path, bare=True)
         
+        # Like actual Git servers, allow partial clones and fetching
+        # commits by their SHA
+        config = git.Repo(repo_path).config_writer()
+        config.set_value("uploadpack", "allowFilter", "true")
+        config.set_value("uploadpack", "allowAnySHA1InWant", "true")
+        config.release()
+        
     def update_team_repository(self, course, team):
         pass
     
@@ -85,7 +92,7 @@ class TestingConnection(RemoteRepositoryConnectionBase):
     
     def get_commit(self, course, team, commit_sha):
         repo_path = self.__get_team_path(course, team)
-        repo = LocalGitRepo(repo_path)
+        repo = LocalGitRepo.open(repo_path)
         
         return repo.get_commit(commit_sha)    
     
@@ -94,19 +101,19 @@ class TestingConnection(RemoteRepositoryConnectionBase):
     
     def create_submission_tag(self, course, team, tag_name, tag_message, commit_sha):
         repo_path = self.__get_team_path(course, team)
-        repo = LocalGitRepo(repo_path)
+        repo = LocalGitRepo.open(repo_path)
         
         tag = repo.create_tag(tag_name, commit_sha, tag_message)
     
     def update_submission_tag(self, course, team, tag_name, tag_message, commit_sha):
         repo_path = self.__get_team_path(course, team)
-        repo = LocalGitRepo(repo_path)
+        repo = LocalGitRepo.open(repo_path)
                 
         tag = repo.create_tag(tag_name, commit_sha, tag_message, force=True)
             
     def get_submission_tag(self, course, team, tag_name):
         repo_path = self.__get_team_path(course, team)
-        repo = LocalGitRepo(repo_path)
+        repo = LocalGitRepo.open(repo_path)
         
         tag = repo.get_tag(tag_name)
         
@@ -0,0 +1,100 @@
+"""
+Micro-benchmarks for the CPU-heavy parts of chisubmit (decoding API
+responses in the client, serializing objects in the server, parsing
+and generating rubric files, and computing extensions).
+
+Run them with "runtests.py benchmarks". The results are written to a
+JSON file, and can be compared against the results of a previous run
+(e.g., of the previous release) with --benchmark-baseline.
+
+Each benchmark is a function, decorated with @benchmark, that takes the
+size of its input and returns the function to time. Everything done
+before returning that function (e.g., creating the input) is not timed.
+Inputs are generated with fixed seeds, so every run times the same work.
+"""
+
+import datetime
+import json
+import platform
+import sys
+import timeit
+
+from chisubmit import RELEASE
+
+benchmarks = []
+
+# Each benchmark is repeated REPEAT times, each time calling the function
+# enough times to take at least MIN_TIME seconds
+REPEAT = 5
+MIN_TIME = 0.2
+
+
+def benchmark(name, sizes):
+    def register(f):
+        benchmarks.append((name, sizes, f))
+        return f
+    return register
+
+
+def time_function(f, repeat = REPEAT, min_time = MIN_TIME):
+    """
+    Returns the number of calls made in each repetition, and the time
+    per call (in seconds) of each repetition
+    """
+    timer = timeit.Timer(f)
+    loops = 1
+    while True:
+        t = timer.timeit(loops)
+        if t >= min_time:
+            break
+        loops *= 2 if t == 0 else max(2, min(10, int(min_time / t) + 1))
+
+    times = [t] + timer.repeat(repeat - 1, loops)
+    return loops, [x / loops for x in times]
+
+
+def run_benchmarks(names = None, repeat = REPEAT, min_time = MIN_TIME, out = sys.stdout):
+    # Importing the modules registers their benchmarks
+    import chisubmit.tests.benchmarks.bench_client
+    import chisubmit.tests.benchmarks.bench_rubric
+    import chisubmit.tests.benchmarks.bench_serializers
+    import chisubmit.tests.benchmarks.bench_submissions
+
+    results = []
+    for name, sizes, f in benchmarks:
+        if names is not None and name not in names:
+            continue
+        for size in sizes:
+            loops, times = time_function(f(size), repeat, min_time)
+            times.sort()
+            result = {"benchmark": name,
+                      "size": size,
+                      "loops": loops,
+                      "min": times[0],
+                      "median": times[len(times) // 2]}
+            results.append(result)
+            print >> out, "%-36s %6i %12.3f ms (min) %12.3f ms (median)" % (name, size, 1000 * result["min"], 1000 * result["median"])
+
+    return {"release": RELEASE,
+            "python": platform.python_version(),
+            "date": datetime.datetime.utcnow().isoformat(),
+            "results": results}
+
+
+def compare_results(results, baseline, out = sys.stdout):
+    """
+    Prints the ratio between the (minimum) times of two runs
+    """
+    baseline_times = dict([((r["benchmark"], r["size"]), r["min"]) for r in baseline["results"]])
+
+    print >> out, "Compared to release %s (%s):" % (baseline["release"], baseline["date"])
+    for r in results["results"]:
+        base = baseline_times.get((r["benchmark"], r["size"]))
+        if base is None:
+            continue
+        print >> out, "%-36s %6i %8.2fx" % (r["benchmark"], r["size"], r["min"] / base if base else float("inf"))
+
+
+def save_results(results, filename):
+    with open(filename, "w") as f:
+        json.dump(results, f, indent = 2, sort_keys = True)
@@ -0,0 +1,70 @@
+import datetime
+import random
+
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+
+from chisubmit.backend.api.seed import seed_course
+from chisubmit.client import Chisubmit
+from chisubmit.client.team import Team
+from chisubmit.client.types import APIDateTimeType, APIDecimalType, APIObjectType
+from chisubmit.tests.benchmarks import benchmark
+
+BASE_URL = "http://localhost:8000/api/v1"
+
+
+def get_api_response(course_id, n_teams, url, params):
+    """
+    Returns the (decoded JSON) response to a GET request on a course
+    seeded with n_teams teams, made by the course's instructor
+    """
+    seed_course(course_id, n_teams, realistic = True)
+    client = APIClient()
+    client.force_authenticate(user = User.objects.get(username = "%s_instructor" % course_id.replace("-", "_")))
+    response = client.get(url % course_id, params, HTTP_ACCEPT = "application/json")
+    assert response.status_code == 200, response.status_code
+    return dict(response.items()), response.json()
+
+
+@benchmark("client.to_python.datetime", sizes = [100, 1000, 10000])
+def to_python_datetime(size):
+    rng = random.Random(0)
+    start = datetime.datetime(2017, 1, 1)
+    values = [(start + datetime.timedelta(seconds = rng.randint(0, 10**7))).isoformat() + "Z"
+              for _ in range(size)]
+
+    def f():
+        for v in values:
+            APIDateTimeType.to_python(v, None, None)
+    return f
+
+
+@benchmark("client.to_python.decimal", sizes = [100, 1000, 10000])
+def to_python_decimal(size):
+    rng = random.Random(0)
+    values = ["%.2f" % rng.uniform(0, 100) for _ in range(size)]
+
+    def f():
+        for v in values:
+            APIDecimalType.to_python(v, None, None)
+    return f
+
+
+@benchmark("client.team_list", sizes = [10, 100, 400])
+def team_list(size):
+    headers, data = get_api_response("bench-client-%i" % size, size, "/api/v1/courses/%s/teams/",
+                                     {"include": ["students", "assignments"]})
+    team_type = APIObjectType(Team)
+
+    def f():
+        # A new client every time, so objects are not reused from the
+        # identity map
+        api_client = Chisubmit("token", base_url = BASE_URL)
+        for elem in data:
+            team = team_type.to_python(elem, headers, api_client)
+            team.team_id, team.extensions, team.active
+            for member in team.get_team_members():
+                member.username, member.confirmed
+            for registration in team.get_assignment_registrations():
+                registration.assignment_id, registration.final_submission_id
+    return f
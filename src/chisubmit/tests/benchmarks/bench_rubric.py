@@ -0,0 +1,58 @@
+import random
+
+from chisubmit.rubric import RubricFile
+from chisubmit.tests.benchmarks import benchmark
+
+
+class RubricComponent(object):
+
+    def __init__(self, description, points):
+        self.description = description
+        self.points = points
+
+
+class Assignment(object):
+    """
+    Stands in for a client Assignment (so the benchmarks don't make
+    any requests)
+    """
+
+    def __init__(self, rubric_components):
+        self.rubric_components = rubric_components
+
+    def get_rubric_components(self):
+        return self.rubric_components
+
+
+def get_rubric(size):
+    """
+    A graded rubric with size rubric components
+    """
+    rng = random.Random(0)
+    rubric_components = [RubricComponent("Task %i" % (i+1), float(rng.choice([5, 10, 20, 25])))
+                         for i in range(size)]
+    assignment = Assignment(rubric_components)
+    points = dict([(rc.description, min(rng.randint(0, int(rc.points)) + rng.choice([0, 0.5]), rc.points))
+                   for rc in rubric_components])
+    comments = "\n".join(["Task %i was mostly correct, but could be improved." % (i+1)
+                          for i in range(size)])
+    return RubricFile(assignment, rubric_components, points, None, None, comments)
+
+
+@benchmark("rubric.to_yaml", sizes = [3, 10, 50])
+def to_yaml(size):
+    rubric = get_rubric(size)
+
+    def f():
+        rubric.to_yaml()
+    return f
+
+
+@benchmark("rubric.from_file", sizes = [3, 10, 50])
+def from_file(size):
+    rubric = get_rubric(size)
+    s = rubric.to_yaml()
+
+    def f():
+        RubricFile.from_file(s, rubric.assignment)
+    return f
@@ -0,0 +1,40 @@
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from chisubmit.backend.api.models import CourseRoles, Team, Registration
+from chisubmit.backend.api.seed import seed_course
+from chisubmit.backend.api.serializers import TeamSerializer,\
+    RegistrationSerializer
+from chisubmit.tests.benchmarks import benchmark
+
+ROLES = {"instructor": set([CourseRoles.INSTRUCTOR]),
+         "student": set([CourseRoles.STUDENT])}
+
+
+def get_context(course_obj, role):
+    request = Request(APIRequestFactory().get("/api/v1/courses/%s/teams/" % course_obj.course_id))
+    return {"request": request, "course": course_obj, "roles": ROLES[role]}
+
+
+def serializer_benchmark(serializer_class, get_objects, role):
+    def setup(size):
+        course_obj = seed_course("bench-ser-%s-%s-%i" % (serializer_class.__name__.lower(), role, size), size,
+                                 realistic = True)
+        objects = list(get_objects(course_obj))
+
+        def f():
+            serializer_class(objects, many = True, context = get_context(course_obj, role)).data
+        return f
+    return setup
+
+
+for role in ROLES:
+    benchmark("serializer.team.%s" % role, sizes = [10, 100, 400])(
+        serializer_benchmark(TeamSerializer,
+                             lambda course_obj: Team.objects.filter(course = course_obj), role))
+    benchmark("serializer.registration.%s" % role, sizes = [10, 100, 400])(
+        serializer_benchmark(RegistrationSerializer,
+                             lambda course_obj: Registration.objects.filter(assignment__course = course_obj)
+                                                                    .select_related("assignment__course", "grader__user",
+                                                                                    "team__course", "final_submission"),
+                             role))
@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from chisubmit.backend.api.models import Registration, Student, Team, Submission
+from chisubmit.backend.api.seed import seed_course
+from chisubmit.tests.benchmarks import benchmark
+
+
+@benchmark("submission.create", sizes = [2, 10, 30])
+def submission_create(size):
+    """
+    Computes the extensions needed by a late submission, for a team that
+    has already submitted size - 1 assignments
+    """
+    course_obj = seed_course("bench-submission-%i" % size, 10, n_assignments = size, realistic = True)
+    # Enough extensions for all the assignments
+    Student.objects.filter(course = course_obj).update(extensions = 2 * size)
+    Team.objects.filter(course = course_obj).update(extensions = 2 * size)
+
+    registration = Registration.objects.filter(assignment__course = course_obj,
+                                               assignment__assignment_id = "pa%i" % size)\
+                                       .select_related("assignment", "team__course", "final_submission")\
+                                       .order_by("pk")[0]
+    submitted_at = registration.assignment.deadline + timedelta(hours = 12)
+
+    def f():
+        Submission.create(registration, "0" * 40, submitted_at, None)
+    return f
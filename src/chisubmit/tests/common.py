@@ -14,6 +14,7 @@ from chisubmit.backend.api.models import Course, Student
 from django.contrib.auth.models import User
 from rest_framework.authtoken.models import Token
 from django.conf import settings
+from chisubmit.backend.api.authentication import get_token_cache
 
 cli_verbose = False
 
@@ -167,6 +168,11 @@ class ChisubmitCLITestCase(APILiveServerTestCase):
         self.git_server_user = None
         self.git_staging_user = None
         self.git_api_keys = {}
+        
+    def setUp(self):
+        # Tokens (and the users they map to) are cached across requests,
+        # but the database is recreated for each test
+        get_token_cache().clear()
     
     def set_git_server_connstr(self, connstr):
         self.git_server_connstr = connstr
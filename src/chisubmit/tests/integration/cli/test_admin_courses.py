@@ -42,6 +42,17 @@ class CLIAdminCourseExisting(ChisubmitCLITestCase):
         for val in [COURSE1_ID, COURSE1_NAME, COURSE2_ID, COURSE2_NAME]:            
             self.assertIn(val, result.output)
 
+    @cli_test
+    def test_admin_course_list_profile(self, runner):
+        admin, _, _, _ = self.create_clients(runner, "admin")
+        
+        result = admin.run("--profile admin course list")
+
+        self.assertEquals(result.exit_code, 0)
+        self.assertIn(COURSE1_ID, result.output)
+        self.assertIn("HTTP requests", result.output)
+        self.assertIn("GET /courses/", result.output)
+
 class CLIAdminCourseLoadUsers(ChisubmitCLITestCase):
     
     fixtures = ['admin_user', 'course1',  'course2']
@@ -106,6 +117,37 @@ class CLIAdminCourseLoadUsers(ChisubmitCLITestCase):
         self.assertEquals(len(user_objs), len(students) + 1)
         self.assertEquals(len(student_objs), len(students))
                 
+    @cli_test
+    def test_admin_course_load_students_invalid_and_update(self, runner):
+        admin, _, _, _ = self.create_clients(runner, "admin")
+        
+        students = self.gen_students(["student1", "student2", "student3", "student4"])
+        students["student3"] = ("fstudent3", "lstudent3", "not an email")
+        csv_file = "students.csv"
+        self.gen_csv(students, csv_file)
+        
+        result = admin.run("admin course load-users",
+                           [COURSE1_ID, csv_file, "username", "first", "last", "email", "--user-type", "student"])        
+        self.assertEquals(result.exit_code, 0)
+        self.assertIn("User student3 is not valid", result.output)
+
+        student_objs = Student.objects.filter(course__course_id = COURSE1_ID)
+        self.assertItemsEqual([s.user.username for s in student_objs], ["student1", "student2", "student4"])
+
+        students["student1"] = ("fstudent1", "lstudent1", "new-email@example.org")
+        self.gen_csv(students, csv_file)
+
+        result = admin.run("admin course load-users",
+                           [COURSE1_ID, csv_file, "username", "first", "last", "email", "--user-type", "student"])        
+        self.assertEquals(result.exit_code, 0)
+        self.assertEquals(User.objects.get(username = "student1").email, "student1@example.org")
+
+        result = admin.run("admin course load-users",
+                           [COURSE1_ID, csv_file, "username", "first", "last", "email", "--user-type", "student", "--update-users"])        
+        self.assertEquals(result.exit_code, 0)
+        self.assertIn("Updated user student1", result.output)
+        self.assertEquals(User.objects.get(username = "student1").email, "new-email@example.org")
+                
     @cli_test
     def test_admin_course_load_students_and_add(self, runner):
         admin, _, _, _ = self.create_clients(runner, "admin")
@@ -169,6 +211,74 @@ class CLIAdminCourseLoadUsers(ChisubmitCLITestCase):
         self.assertEquals(len(student_objs), len(students))        
         
         
+    @cli_test
+    def test_admin_course_load_students_dry_run(self, runner):
+        admin, _, _, _ = self.create_clients(runner, "admin")
+        
+        students = self.gen_students(["student1", "student2", "student3", "student4"])
+        csv_file = "students.csv"
+        self.gen_csv(students, csv_file)
+        
+        result = admin.run("admin course load-users",
+                           [COURSE1_ID, csv_file, "username", "first", "last", "email", "--user-type", "student", "--dry-run"])        
+        self.assertEquals(result.exit_code, 0)
+        
+        for username in students:
+            self.assertIn("Added student %s" % username, result.output)
+
+        user_objs = User.objects.all()
+        student_objs = Student.objects.filter(course__course_id = COURSE1_ID)
+
+        self.assertEquals(len(user_objs), 1)
+        self.assertEquals(len(student_objs), 0)
+        
+        
+    @cli_test
+    def test_admin_course_create_individual_teams(self, runner):
+        admin, _, _, _ = self.create_clients(runner, "admin")
+        
+        students = self.gen_students(["student1", "student2", "student3", "student4"])
+        csv_file = "students.csv"
+        self.gen_csv(students, csv_file)
+        
+        result = admin.run("admin course load-users",
+                           [COURSE1_ID, csv_file, "username", "first", "last", "email", "--user-type", "student"])        
+        self.assertEquals(result.exit_code, 0)
+
+        result = admin.run("admin course create-individual-teams", [COURSE1_ID])        
+        self.assertEquals(result.exit_code, 0)
+        
+        for username in students:
+            self.assertEquals([tm.team.team_id for tm in TeamMember.objects.filter(student__user__username = username)], [username])
+
+        result = admin.run("admin course create-individual-teams", [COURSE1_ID])        
+        self.assertEquals(result.exit_code, 0)
+        self.assertEquals(TeamMember.objects.filter(team__course__course_id = COURSE1_ID).count(), len(students))
+
+    @cli_test
+    def test_admin_course_load_teams(self, runner):
+        admin, _, _, _ = self.create_clients(runner, "admin")
+        
+        students = self.gen_students(["student1", "student2", "student3", "student4"])
+        csv_file = "students.csv"
+        self.gen_csv(students, csv_file)
+        
+        result = admin.run("admin course load-users",
+                           [COURSE1_ID, csv_file, "username", "first", "last", "email", "--user-type", "student"])        
+        self.assertEquals(result.exit_code, 0)
+        
+        with open("teams.csv", "w") as f:
+            f.write("team,student\n")
+            f.write("team-a,student1\nteam-a,student2\nteam-b,student3\nteam-b,student4\n")
+
+        result = admin.run("admin course load-teams", [COURSE1_ID, "teams.csv", "team", "student"])        
+        self.assertEquals(result.exit_code, 0)
+        
+        team_members = TeamMember.objects.filter(team__course__course_id = COURSE1_ID)
+        self.assertItemsEqual([(tm.team.team_id, tm.student.user.username) for tm in team_members],
+                              [("team-a", "student1"), ("team-a", "student2"), ("team-b", "student3"), ("team-b", "student4")])
+        
+        
     @cli_test
     def test_admin_course_load_students_two(self, runner):
         admin, _, _, _ = self.create_clients(runner, "admin")
@@ -1,4 +1,10 @@
+from datetime import datetime
+import pytz
+
 from chisubmit.tests.common import cli_test, ChisubmitCLITestCase
+from chisubmit.common.utils import set_testing_now
+from chisubmit.common import CHISUBMIT_FAIL
+from chisubmit.backend.api.models import Registration
 
 class CLIInstructorGrades(ChisubmitCLITestCase):
             
@@ -23,4 +29,40 @@ class CLIInstructorGrades(ChisubmitCLITestCase):
         instructor1 = instructors[0]
         
         result = instructor1.run("instructor grading show-grading-status --use-stored-grades --by-grader", ["pa1"])
-        self.assertEquals(result.exit_code, 0)
\ No newline at end of file
+        self.assertEquals(result.exit_code, 0)
+        
+        # The deadline hasn't passed, so the grades are not included in 
+        # the statistics, and the teams are not shown as graded either
+        self.assertIn("NOT READY", result.output)
+        self.assertNotIn("GRADED", result.output)
+        self.assertNotIn("Average grade", result.output)
+        
+        set_testing_now(datetime(2042, 2, 1, tzinfo=pytz.utc))
+        try:
+            result = instructor1.run("instructor grading show-grading-status --use-stored-grades --by-grader", ["pa1"])
+            self.assertEquals(result.exit_code, 0)
+        finally:
+            set_testing_now(None)
+            
+        self.assertNotIn("NOT READY", result.output)
+        self.assertEquals(result.output.count(" GRADED "), 2)
+        self.assertIn("Average grade: 86.25", result.output)
+
+    @cli_test
+    def test_instructor_assign_grader(self, runner):
+        _, instructors, _, _ = self.create_clients(runner, "admin", instructor_ids=["instructor1"], course_id="cmsc40100")
+        
+        instructor1 = instructors[0]
+        
+        result = instructor1.run("instructor grading assign-grader", ["pa1", "student1-student2", "grader1"])
+        self.assertEquals(result.exit_code, 0)
+        registration = Registration.objects.get(team__team_id="student1-student2", assignment__assignment_id="pa1")
+        self.assertEquals(registration.grader.user.username, "grader1")
+        
+        result = instructor1.run("instructor grading assign-grader", ["pa1", "student1-student2", "student3"])
+        self.assertEquals(result.exit_code, CHISUBMIT_FAIL)
+        self.assertIn("not a grader", result.output)
+        
+        result = instructor1.run("instructor grading assign-grader", ["pa1", "no-such-team", "grader1"])
+        self.assertEquals(result.exit_code, CHISUBMIT_FAIL)
+        self.assertIn("not registered", result.output)
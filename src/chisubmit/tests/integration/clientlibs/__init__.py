@@ -1,7 +1,13 @@
 from rest_framework.test import APILiveServerTestCase
 from chisubmit import client
+from chisubmit.backend.api.authentication import get_token_cache
     
 class ChisubmitClientLibsTestCase(APILiveServerTestCase):
+    
+    def setUp(self):
+        # Tokens (and the users they map to) are cached across requests,
+        # but the database is recreated for each test
+        get_token_cache().clear()
         
     def get_api_client(self, api_token, password=None, deferred_save = False):
         base_url = self.live_server_url + "/api/v1"
@@ -145,4 +145,26 @@ class AssignmentValidationTests(ChisubmitClientLibsTestCase):
         
         self.assertEquals(len(assignments2), len(COURSE2_ASSIGNMENTS) + 1)
         self.assertItemsEqual([a.assignment_id for a in assignments2], COURSE2_ASSIGNMENTS + ["pa1"])        
-                  
\ No newline at end of file
+                  
+
+class AssignmentStatsTests(ChisubmitClientLibsTestCase):
+    
+    fixtures = ['users', 'course1', 'course1_users', 'course1_teams', 
+                'course1_pa1', 'course1_pa1_registrations_with_submissions', 'course1_pa1_grades']
+    
+    def test_get_stats(self):
+        c = self.get_api_client("instructor1token")
+        
+        course = c.get_course("cmsc40100")
+        assignment = course.get_assignment("pa1")
+        
+        stats = assignment.get_stats(bins = 5)
+        
+        self.assertEquals(stats.assignment_id, "pa1")
+        self.assertEquals(stats.points_possible, 100.0)
+        self.assertEquals(stats.registrations["total"], 2)
+        self.assertEquals(stats.total["count"], 0)
+        self.assertIsNone(stats.total["average"])
+        self.assertEquals(len(stats.histogram["counts"]), 5)
+        self.assertEquals([rc.description for rc in stats.rubric_components], ["First Task", "Second Task"])
+        self.assertEquals(stats.rubric_components[1].max, 50.0)
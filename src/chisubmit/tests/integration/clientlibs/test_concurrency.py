@@ -0,0 +1,56 @@
+import threading
+import time
+
+from chisubmit.tests.integration.clientlibs import ChisubmitClientLibsTestCase
+from chisubmit.tests.common import COURSE1_TEAMS
+from chisubmit.client.concurrency import AsyncChisubmit
+from chisubmit.client.exceptions import UnknownObjectException
+from chisubmit.client.team import Team
+
+class AsyncClientTests(ChisubmitClientLibsTestCase):
+    
+    fixtures = ['users', 'course1', 'course1_users', 'course1_teams',
+                'course1_pa1', 'course1_pa1_registrations']
+    
+    def get_async_api_client(self, api_token, max_concurrency = 4):
+        return AsyncChisubmit.from_client(self.get_api_client(api_token), max_concurrency = max_concurrency)
+    
+    def test_gather(self):
+        with self.get_async_api_client("admintoken") as c:
+            course = c.get_course("cmsc40100").get()
+            self.assertEquals(course.course_id, "cmsc40100")
+            
+            teams = c.gather(*[course.get_team(team_id) for team_id in COURSE1_TEAMS])
+            self.assertEquals([t.team_id for t in teams], COURSE1_TEAMS)
+            self.assertTrue(all([isinstance(t.sync, Team) for t in teams]))
+            
+            registrations = c.gather(*[t.get_assignment_registrations() for t in teams])
+            for team_registrations in registrations:
+                self.assertEquals([r.assignment_id for r in team_registrations], ["pa1"])
+            
+    def test_exception(self):
+        with self.get_async_api_client("admintoken") as c:
+            course = c.get_course("cmsc40100").get()
+            
+            futures = [course.get_team(COURSE1_TEAMS[0]), course.get_team("no-such-team")]
+            self.assertRaises(UnknownObjectException, c.gather, *futures)
+            
+    def test_concurrency_limit(self):
+        in_flight = [0]
+        max_in_flight = [0]
+        lock = threading.Lock()
+        
+        def slow(x):
+            with lock:
+                in_flight[0] += 1
+                max_in_flight[0] = max(max_in_flight[0], in_flight[0])
+            time.sleep(0.05)
+            with lock:
+                in_flight[0] -= 1
+            return x
+        
+        with self.get_async_api_client("admintoken", max_concurrency = 2) as c:
+            results = c.gather(*[c.run(slow, i) for i in range(8)])
+        
+        self.assertEquals(results, range(8))
+        self.assertLessEqual(max_in_flight[0], 2)
@@ -0,0 +1,48 @@
+from django.core.management import call_command
+from django.utils.six import StringIO
+
+from chisubmit.backend.api.loadtest import get_load_users, run_load_test,\
+    get_percentile
+from chisubmit.backend.api.models import Submission
+from chisubmit.backend.api.seed import seed_course
+from chisubmit.tests.integration.clientlibs import ChisubmitClientLibsTestCase
+
+
+class LoadTestTests(ChisubmitClientLibsTestCase):
+    
+    def test_percentile(self):
+        values = range(1, 101)
+        self.assertEquals(get_percentile(values, 50), 50)
+        self.assertEquals(get_percentile(values, 95), 95)
+        self.assertEquals(get_percentile(values, 99), 99)
+        self.assertEquals(get_percentile([7], 99), 7)
+        self.assertEquals(get_percentile([], 50), None)
+    
+    def test_load(self):
+        course = seed_course("load", 10, submitted = False, realistic = True)
+        users = get_load_users(course)
+        self.assertEquals(len(users), 20)
+        
+        results = run_load_test(self.live_server_url + "/api/v1", "load", "pa1", users,
+                                workers = 2, n_requests = 60)
+
+        total = results.get_stats()
+        self.assertEquals(total["count"], 60)
+        self.assertEquals(total["errors"], 0)
+        self.assertLessEqual(total["p50"], total["p95"])
+        self.assertLessEqual(total["p95"], total["p99"])
+        
+        self.assertEquals(Submission.objects.filter(registration__assignment__course = course).count(),
+                          results.get_stats("submit")["count"])
+        
+        summary = "\n".join(results.get_summary())
+        self.assertIn("show-deadline", summary)
+        self.assertIn("TOTAL", summary)
+
+    def test_command(self):
+        seed_course("load", 5, submitted = False)
+        
+        out = StringIO()
+        call_command("load_test", "load", url = self.live_server_url + "/api/v1",
+                     workers = 2, requests = 20, stdout = out)
+        self.assertIn("20 requests in", out.getvalue())
@@ -169,4 +169,41 @@ class RegistrationErrorTests(ChisubmitClientLibsTestCase):
 
         with self.assertRaises(BadRequestException) as cm:
             r = assignment.register(students = students)               
-        
\ No newline at end of file
+        
+
+class RegistrationBulkUpdateTests(ChisubmitClientLibsTestCase):
+    
+    fixtures = ['users', 'course1', 'course1_users', 'course1_teams', 
+                         'course1_pa1', 'course1_pa1_registrations']
+    
+    def test_bulk_update_registrations(self):
+        c = self.get_api_client("instructor1token")
+        
+        course = c.get_course("cmsc40100")
+        assignment = course.get_assignment("pa1")
+
+        updates = [{"team_id": "student1-student2", "grader_username": "grader1"},
+                   {"team_id": "student3-student4", "grader_username": "grader2"}]
+
+        results = assignment.bulk_update_registrations(updates)
+        
+        self.assertItemsEqual([(r.team_id, r.updated) for r in results], 
+                              [("student1-student2", True), ("student3-student4", True)])
+        
+        team = course.get_team("student1-student2")
+        registration = team.get_assignment_registration("pa1")
+        self.assertEquals(registration.grader_username, "grader1")
+        
+    def test_bulk_update_registrations_errors(self):
+        c = self.get_api_client("instructor1token")
+        
+        course = c.get_course("cmsc40100")
+        assignment = course.get_assignment("pa1")
+
+        updates = [{"team_id": "student1-student2", "grader_username": "student1"}]
+
+        with self.assertRaises(BadRequestException) as cm:
+            assignment.bulk_update_registrations(updates)
+            
+        bre = cm.exception
+        self.assertItemsEqual(bre.errors.keys(), ["student1-student2"])
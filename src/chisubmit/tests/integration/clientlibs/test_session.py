@@ -0,0 +1,111 @@
+from chisubmit.tests.integration.clientlibs import ChisubmitClientLibsTestCase
+from chisubmit.tests.common import COURSE1_TEAMS
+from chisubmit.client.exceptions import BadRequestException
+from chisubmit.backend.api.models import Team
+
+class IdentityMapTests(ChisubmitClientLibsTestCase):
+    
+    fixtures = ['users', 'course1', 'course1_users', 'course1_teams']
+    
+    def count_requests(self, c):
+        requests = []
+        request = c._requester.request
+        def counting_request(method, resource, *args, **kwargs):
+            requests.append((method, resource))
+            return request(method, resource, *args, **kwargs)
+        c._requester.request = counting_request
+        return requests
+    
+    def test_same_object(self):
+        c = self.get_api_client("admintoken")
+        requests = self.count_requests(c)
+        
+        course = c.get_course("cmsc40100")
+        self.assertIs(c.get_course("cmsc40100"), course)
+        
+        team = course.get_team("student1-student2")
+        self.assertIs(course.get_team("student1-student2"), team)
+        self.assertEquals(len(requests), 2)
+        
+        # Objects obtained through other requests are also the same
+        teams = course.get_teams()
+        self.assertIn(team, teams)
+        self.assertEquals(len(requests), 3)
+
+    def test_write_invalidates(self):
+        c = self.get_api_client("admintoken")
+        requests = self.count_requests(c)
+        
+        course = c.get_course("cmsc40100")
+        team1 = course.get_team("student1-student2")
+        team2 = course.get_team("student3-student4")
+        
+        team1.extensions = 5
+        self.assertEquals(len(requests), 4)
+        
+        # The PATCH could have changed other teams, so we go back to the server 
+        # (but still get the same object)
+        Team.objects.filter(team_id="student3-student4").update(extensions=7)
+        self.assertIs(course.get_team("student3-student4"), team2)
+        self.assertEquals(len(requests), 5)
+        self.assertEquals(team2.extensions, 7)
+
+
+class SessionTests(ChisubmitClientLibsTestCase):
+    
+    fixtures = ['users', 'course1', 'course1_users', 'course1_teams']
+    
+    def test_session(self):
+        c = self.get_api_client("admintoken")
+        
+        course = c.get_course("cmsc40100")
+        teams = course.get_teams()
+        
+        write_count = c._requester.write_count
+        with c.session():
+            for team in teams:
+                team.extensions = 4
+                team.active = False
+            self.assertEquals(c._requester.write_count, write_count)
+        self.assertEquals(c._requester.write_count, write_count + 1)
+        
+        for team_id in COURSE1_TEAMS:
+            team_obj = Team.objects.get(team_id = team_id)
+            self.assertEquals(team_obj.extensions, 4)
+            self.assertEquals(team_obj.active, False)
+        
+        for team in teams:
+            self.assertEquals(team.extensions, 4)
+            self.assertIsNone(team._dirty)
+
+    def test_session_exception(self):
+        c = self.get_api_client("admintoken")
+        
+        course = c.get_course("cmsc40100")
+        team = course.get_team("student1-student2")
+        extensions = team.extensions
+        
+        try:
+            with c.session():
+                team.extensions = extensions + 10
+                raise ValueError
+        except ValueError:
+            pass
+        
+        self.assertEquals(team.extensions, extensions)
+        self.assertEquals(Team.objects.get(team_id = "student1-student2").extensions, extensions)
+
+    def test_session_error(self):
+        c = self.get_api_client("admintoken")
+        
+        course = c.get_course("cmsc40100")
+        team1 = course.get_team("student1-student2")
+        team2 = course.get_team("student3-student4")
+        extensions = team1.extensions
+        
+        with self.assertRaises(BadRequestException):
+            with c.session():
+                team1.extensions = extensions + 10
+                team2.extensions = -1
+        
+        self.assertEquals(Team.objects.get(team_id = "student1-student2").extensions, extensions)
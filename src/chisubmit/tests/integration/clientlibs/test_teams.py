@@ -20,6 +20,44 @@ class TeamTests(ChisubmitClientLibsTestCase):
         self.assertEquals(len(teams), len(COURSE1_TEAMS))
         self.assertItemsEqual([t.team_id for t in teams], COURSE1_TEAMS)
 
+    def test_get_teams_fields(self):
+        c = self.get_api_client("admintoken")
+        
+        course = c.get_course("cmsc40100")
+        teams = course.get_teams(include_assignments = True, fields = ["team_id", "assignments.assignment_id"])
+        
+        self.assertItemsEqual([t.team_id for t in teams], COURSE1_TEAMS)
+        
+        for team in teams:
+            self.assertTrue(team._partial)
+            self.assertNotIn("extensions", team._rawData)
+            
+            registrations = team.get_assignment_registrations()
+            self.assertItemsEqual([r.assignment_id for r in registrations], ["pa1"])
+            self.assertTrue(team._partial)
+
+    def test_get_team_fields_load(self):
+        c = self.get_api_client("admintoken")
+        
+        course = c.get_course("cmsc40100")
+        team = course.get_team("student1-student2", fields = ["team_id"])
+        self.assertTrue(team._partial)
+        self.assertEquals(team.team_id, "student1-student2")
+        
+        # Accessing a field we don't have fetches the rest of them
+        team_obj = Course.objects.get(course_id="cmsc40100").get_team("student1-student2")
+        self.assertEquals(team.extensions, team_obj.extensions)
+        self.assertFalse(team._partial)
+        self.assertTrue(team.active)
+        
+        # Getting only some of the fields of an object we already have 
+        # doesn't lose the other fields
+        teams = course.get_teams(fields = ["team_id"])
+        team2 = [t for t in teams if t.team_id == "student1-student2"][0]
+        self.assertIs(team2, team)
+        self.assertIn("extensions", team._rawData)
+        self.assertTrue(team.active)
+
     def test_get_teams_include_students(self):
         c = self.get_api_client("admintoken")
         
@@ -53,6 +91,20 @@ class TeamTests(ChisubmitClientLibsTestCase):
             self.assertTrue(hasattr(team, "_rel_assignments"))
 
 
+    def test_iter_teams(self):
+        c = self.get_api_client("admintoken")
+        
+        course = c.get_course("cmsc40100")
+        teams = course.iter_teams(include_students = True, include_assignments = True)
+        
+        self.assertFalse(isinstance(teams, list))
+        teams = list(teams)
+        
+        self.assertItemsEqual([t.team_id for t in teams], COURSE1_TEAMS)
+        for team in teams:
+            self.assertEquals(len(team._rel_students), len(COURSE1_TEAM_MEMBERS[team.team_id]))
+
+
     def test_get_teams_include_students_and_assignments(self):
         c = self.get_api_client("admintoken")
         
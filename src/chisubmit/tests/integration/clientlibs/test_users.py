@@ -15,6 +15,12 @@ class UserTests(ChisubmitClientLibsTestCase):
         users = c.get_users()
         self.assertItemsEqual([u.username for u in users], ALL_USERS)
 
+    def test_iter_users(self):
+        c = self.get_api_client("admintoken")
+        
+        users = c.iter_users()
+        self.assertItemsEqual([u.username for u in users], ALL_USERS)
+
     
     def test_get_user(self):
         c = self.get_api_client("admintoken")
@@ -5,6 +5,7 @@ from chisubmit.common import CHISUBMIT_SUCCESS, CHISUBMIT_FAIL
 
 from datetime import timedelta
 import os
+import zipfile
 
 class CLICompleteWorkflowExtensionsPerTeam(ChisubmitCLITestCase):
         
@@ -174,6 +175,8 @@ class CLICompleteWorkflowExtensionsPerTeam(ChisubmitCLITestCase):
 
         result = instructors[0].run("instructor grading list-submissions", ["pa1"])
         self.assertEquals(result.exit_code, 0)
+        self.assertIn("SUBMITTED (NOT READY for grading)", result.output)
+        self.assertNotIn("not found in repository", result.output)
 
         result = instructors[0].run("instructor team pull-repos", ["pa1", "repos/all/"])
         self.assertEquals(result.exit_code, 0)
@@ -200,6 +203,14 @@ class CLICompleteWorkflowExtensionsPerTeam(ChisubmitCLITestCase):
                 
         result = instructors[0].run("instructor grading create-grading-repos", ["--master", "pa1"])
         self.assertEquals(result.exit_code, 0)        
+        
+        result = instructors[0].run("instructor assignment export-submissions", ["pa1", "pa1.zip"])
+        self.assertEquals(result.exit_code, 0)
+        self.assertIn("manifest.csv", zipfile.ZipFile("pa1.zip").namelist())
+        
+        result = instructors[0].run("instructor assignment export-submissions", ["pa1", "pa1.zip"])
+        self.assertEquals(result.exit_code, 0)
+        self.assertEquals(result.output.count("unchanged"), 2)
                         
         result = instructors[0].run("instructor grading assign-graders", ["pa1"])
         self.assertEquals(result.exit_code, 0)
@@ -0,0 +1,114 @@
+import atexit
+import os
+
+from django.core.urlresolvers import Resolver404
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+# Maximum number of queries a single request to each API endpoint (by
+# URL name) can make. These must not depend on the number of objects 
+# involved (see test_query_budgets, which checks that the number of 
+# queries doesn't grow with the size of the course). If a change makes 
+# an endpoint exceed its budget, it's probably making a query per 
+# object; if the increase is justified, update the budget (set the 
+# CHISUBMIT_PRINT_QUERY_COUNTS environment variable to print the 
+# largest number of queries made by each endpoint).
+#
+# A budget of None means the endpoint is not checked (a batch request
+# makes as many queries as the requests in the batch).
+QUERY_BUDGETS = {
+    "assignment-detail": 9,
+    "assignment-list": 13,
+    "assignment-registrations": 9,
+    "assignment-stats": 8,
+    "auth-user-detail": 2,
+    "auth-user-token": 4,
+    "batch": None,
+    "cache-stats": 0,
+    "course-detail": 5,
+    "course-list": 3,
+    "grade-list": 15,
+    "grader-list": 5,
+    "instructor-detail": 8,
+    "instructor-list": 5,
+    "metrics": 0,
+    "register": 22,
+    "registration-detail": 14,
+    "registration-list": 21,
+    "roster-sync": 13,
+    "rubric-list": 9,
+    "student-list": 5,
+    "submission-list": 9,
+    "submit": 14,
+    "team-detail": 6,
+    "team-import": 14,
+    "team-list": 8,
+    "teammember-list": 10,
+    "user-detail": 11,
+    "user-list": 2,
+    "user-token": 4,
+}
+
+_query_counts = {}
+
+def _print_query_counts():
+    print
+    print "QUERY_BUDGETS = {"
+    for url_name in sorted(_query_counts):
+        print "    %r: %i," % (url_name, _query_counts[url_name])
+    print "}"
+
+if os.environ.get("CHISUBMIT_PRINT_QUERY_COUNTS"):
+    atexit.register(_print_query_counts)
+
+
+def is_transaction_query(sql):
+    # Savepoints are only there because tests run inside a transaction
+    return sql.startswith("SAVEPOINT") or sql.startswith("RELEASE SAVEPOINT") or sql.startswith("ROLLBACK TO SAVEPOINT")
+
+
+class QueryBudgetMixin(object):
+    """
+    Test case mixin that counts the queries made by every request made
+    with the test client, and fails the test if a request exceeds the
+    query budget of its URL name (see QUERY_BUDGETS).
+    """
+    
+    query_budgets = QUERY_BUDGETS
+    
+    def _pre_setup(self):
+        super(QueryBudgetMixin, self)._pre_setup()
+        
+        request = self.client.request
+        
+        def request_with_budget(**kwargs):
+            with CaptureQueriesContext(connection) as queries:
+                response = request(**kwargs)
+            self.check_query_budget(response, [q["sql"] for q in queries.captured_queries
+                                               if not is_transaction_query(q["sql"])])
+            return response
+        
+        self.client.request = request_with_budget
+        
+    def get_url_name(self, response):
+        try:
+            return response.resolver_match.url_name
+        except Resolver404:
+            return None
+        
+    def check_query_budget(self, response, queries):
+        url_name = self.get_url_name(response)
+        if url_name is None:
+            return
+        
+        _query_counts[url_name] = max(_query_counts.get(url_name, 0), len(queries))
+        
+        if url_name not in self.query_budgets:
+            self.fail("No query budget for %s (it made %i queries)" % (url_name, len(queries)))
+            
+        budget = self.query_budgets[url_name]
+        if budget is not None and len(queries) > budget:
+            self.fail("%s %s made %i queries (budget: %i):\n%s" % (response.request["REQUEST_METHOD"], 
+                                                                   response.request["PATH_INFO"], 
+                                                                   len(queries), budget, 
+                                                                   "\n".join(queries)))
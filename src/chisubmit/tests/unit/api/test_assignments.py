@@ -1,10 +1,11 @@
 from django.core.urlresolvers import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
+from chisubmit.tests.unit.api import QueryBudgetMixin
 from django.contrib.auth.models import User
 
 
-class AssignmentTests(APITestCase):
+class AssignmentTests(QueryBudgetMixin, APITestCase):
     
     fixtures = ['users', 'course1', 'course1_users', 'course1_pa1']
     
@@ -0,0 +1,73 @@
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+from chisubmit.tests.unit.api import QueryBudgetMixin
+
+from chisubmit.backend.api.authentication import get_token_cache
+
+class CachingTokenAuthenticationTests(QueryBudgetMixin, APITestCase):
+    
+    fixtures = ['users']
+    
+    def setUp(self):
+        get_token_cache().clear()
+        
+    def get_user(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + token)
+        return self.client.get(reverse('auth-user-detail'))
+    
+    def token_queries(self, token):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get_user(token)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [q for q in queries.captured_queries if "authtoken_token" in q["sql"]]
+    
+    def test_token_cached(self):
+        self.assertEqual(len(self.token_queries("instructor1token")), 1)
+        self.assertEqual(len(self.token_queries("instructor1token")), 0)
+        
+    def test_invalid_token(self):
+        response = self.get_user("foobar")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.get_user("foobar")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        
+    def test_token_reset(self):
+        response = self.get_user("instructor1token")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.client.credentials(HTTP_AUTHORIZATION="Token instructor1token")
+        response = self.client.get(reverse('auth-user-token') + "?reset=true")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        new_token = response.data["token"]
+        
+        response = self.get_user("instructor1token")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.get_user(new_token)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+    def test_user_patch(self):
+        response = self.get_user("instructor1token")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        self.client.credentials(HTTP_AUTHORIZATION="Token admintoken")
+        response = self.client.patch(reverse('user-detail', args=["instructor1"]), 
+                                     data={"username": "instructor1b"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        response = self.get_user("instructor1token")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["username"], "instructor1b")
+        
+    def test_user_delete(self):
+        response = self.get_user("instructor1token")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        self.client.credentials(HTTP_AUTHORIZATION="Token admintoken")
+        response = self.client.delete(reverse('user-detail', args=["instructor1"]))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        
+        response = self.get_user("instructor1token")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,97 @@
+import datetime
+import unittest
+import pytz
+from django.core.urlresolvers import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from chisubmit.tests.unit.api import QueryBudgetMixin
+from django.contrib.auth.models import User
+
+from chisubmit.backend.api.models import Team, Assignment
+from chisubmit.common.wire import msgpack_available, msgpack_dumps
+
+class BatchTests(QueryBudgetMixin, APITestCase):
+    
+    fixtures = ['users', 'course1', 'course1_users', 'course1_teams', 'course1_pa1']
+    
+    def test_batch_patch(self):
+        user = User.objects.get(username='admin')
+        self.client.force_authenticate(user=user)
+        
+        team1_url = reverse('team-detail', args=["cmsc40100", "student1-student2"])
+        team2_url = reverse('team-detail', args=["cmsc40100", "student3-student4"])
+        
+        url = reverse('batch')
+        operations = [{"method": "PATCH", "url": "http://testserver" + team1_url, "data": {"extensions": 5}},
+                      {"method": "PATCH", "url": team2_url, "data": {"extensions": 7, "active": False}}]
+        response = self.client.post(url, data=operations, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        self.assertEqual(len(response.data), 2)
+        self.assertEqual(response.data[0]["status"], status.HTTP_200_OK)
+        self.assertEqual(response.data[0]["data"]["extensions"], 5)
+        self.assertEqual(response.data[1]["data"]["active"], False)
+        
+        self.assertEqual(Team.objects.get(team_id="student1-student2").extensions, 5)
+        self.assertEqual(Team.objects.get(team_id="student3-student4").extensions, 7)
+        
+    def test_batch_rollback(self):
+        user = User.objects.get(username='admin')
+        self.client.force_authenticate(user=user)
+        
+        team1_url = reverse('team-detail', args=["cmsc40100", "student1-student2"])
+        team2_url = reverse('team-detail', args=["cmsc40100", "student3-student4"])
+        
+        url = reverse('batch')
+        operations = [{"method": "PATCH", "url": team1_url, "data": {"extensions": 5}},
+                      {"method": "PATCH", "url": team2_url, "data": {"extensions": "many"}}]
+        response = self.client.post(url, data=operations, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(team2_url, response.data)
+        
+        self.assertEqual(Team.objects.get(team_id="student1-student2").extensions, 
+                         Team.objects.get(team_id="student3-student4").extensions)
+        self.assertNotEqual(Team.objects.get(team_id="student1-student2").extensions, 5)
+        
+    def test_batch_permissions(self):
+        user = User.objects.get(username='student1')
+        self.client.force_authenticate(user=user)
+        
+        team_url = reverse('team-detail', args=["cmsc40100", "student3-student4"])
+        
+        url = reverse('batch')
+        operations = [{"method": "PATCH", "url": team_url, "data": {"extensions": 5}}]
+        response = self.client.post(url, data=operations, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+    def test_batch_invalid(self):
+        user = User.objects.get(username='admin')
+        self.client.force_authenticate(user=user)
+        
+        url = reverse('batch')
+        operations = [{"method": "DELETE", "url": "/api/v1/courses/cmsc40100/", "data": {}},
+                      {"method": "PATCH", "url": "/no/such/url", "data": {}}]
+        response = self.client.post(url, data=operations, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("operation 1", response.data)
+
+        response = self.client.post(url, data=operations[1:], format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("/no/such/url", response.data)
+
+    @unittest.skipIf(not msgpack_available(), "msgpack is not installed")
+    def test_batch_msgpack(self):
+        user = User.objects.get(username='admin')
+        self.client.force_authenticate(user=user)
+        
+        assignment_url = reverse('assignment-detail', args=["cmsc40100", "pa1"])
+        deadline = datetime.datetime(2042, 2, 4, 20, 0, tzinfo=pytz.utc)
+        
+        url = reverse('batch')
+        operations = [{"method": "PATCH", "url": assignment_url, "data": {"deadline": deadline}}]
+        response = self.client.post(url, data=msgpack_dumps(operations), 
+                                    content_type="application/msgpack")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]["status"], status.HTTP_200_OK)
+        
+        self.assertEqual(Assignment.objects.get(assignment_id="pa1").deadline, deadline)
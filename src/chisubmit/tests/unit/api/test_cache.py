@@ -0,0 +1,129 @@
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+from chisubmit.tests.unit.api import QueryBudgetMixin
+from django.contrib.auth.models import User
+
+from chisubmit.backend.api.cache import stats, get_representation_cache_ttl,\
+    DEFAULT_TTL, DEFAULT_LOCMEM_TTL
+from chisubmit.backend.api.models import Course, Assignment, RubricComponent
+
+class RepresentationCacheTests(QueryBudgetMixin, APITestCase):
+    
+    fixtures = ['users', 'course1', 'course1_users', 'course1_pa1']
+    
+    def setUp(self):
+        stats.reset()
+    
+    def get(self, username, url, **params):
+        user = User.objects.get(username=username)
+        self.client.force_authenticate(user=user)
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+    
+    def test_course_cached(self):
+        url = reverse('course-detail', args=["cmsc40100"])
+        
+        response1 = self.get("instructor1", url)
+        response2 = self.get("instructor1", url)
+        self.assertEqual(response1.data, response2.data)
+        
+        self.assertEqual(stats.misses, 1)
+        self.assertEqual(stats.hits, 1)
+        
+    def test_assignment_no_queries(self):
+        url = reverse('assignment-detail', args=["cmsc40100", "pa1"])
+        self.get("instructor1", url, include="rubric")
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get("instructor1", url, include="rubric")
+        self.assertEqual(len(response.data["rubric"]), 2)
+        self.assertFalse([q for q in queries.captured_queries if "api_assignment" in q["sql"] or "api_rubriccomponent" in q["sql"]])
+        
+    def test_roles(self):
+        url = reverse('course-detail', args=["cmsc40100"])
+        
+        response = self.get("instructor1", url)
+        self.assertIn("extension_policy", response.data)
+        response = self.get("student1", url)
+        self.assertNotIn("extension_policy", response.data)
+        
+        self.assertEqual(stats.misses, 2)
+
+    def test_params(self):
+        url = reverse('assignment-list', args=["cmsc40100"])
+        
+        response = self.get("instructor1", url)
+        self.assertNotIn("rubric", response.data[0])
+        response = self.get("instructor1", url, include="rubric")
+        self.assertIn("rubric", response.data[0])
+        response = self.get("instructor1", url, fields="name")
+        self.assertNotIn("deadline", response.data[0])
+        
+        self.assertEqual(stats.misses, 3)
+        
+    def test_invalidate_course(self):
+        url = reverse('course-detail', args=["cmsc40100"])
+        self.get("instructor1", url)
+        
+        course = Course.objects.get(course_id="cmsc40100")
+        course.name = "New name"
+        course.save()
+        
+        response = self.get("instructor1", url)
+        self.assertEqual(response.data["name"], "New name")
+        
+    def test_invalidate_assignment(self):
+        url = reverse('assignment-detail', args=["cmsc40100", "pa1"])
+        self.get("instructor1", url)
+        list_url = reverse('assignment-list', args=["cmsc40100"])
+        self.get("instructor1", list_url)
+        
+        self.client.force_authenticate(user=User.objects.get(username="instructor1"))
+        response = self.client.patch(url, data={"name": "New name"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        response = self.get("instructor1", url)
+        self.assertEqual(response.data["name"], "New name")
+        response = self.get("instructor1", list_url)
+        self.assertEqual(response.data[0]["name"], "New name")
+        
+        Assignment.objects.get(assignment_id="pa1").delete()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        
+    def test_invalidate_rubric(self):
+        url = reverse('rubric-list', args=["cmsc40100", "pa1"])
+        response = self.get("instructor1", url)
+        self.assertEqual(len(response.data), 2)
+        
+        RubricComponent.objects.filter(assignment__assignment_id="pa1")[0].delete()
+        
+        response = self.get("instructor1", url)
+        self.assertEqual(len(response.data), 1)
+        
+    def test_stats(self):
+        url = reverse('course-detail', args=["cmsc40100"])
+        self.get("instructor1", url)
+        self.get("instructor1", url)
+        
+        self.client.force_authenticate(user=User.objects.get(username="instructor1"))
+        response = self.client.get(reverse('cache-stats'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        
+        response = self.get("admin", reverse('cache-stats'))
+        self.assertEqual(response.data["hits"], 1)
+        self.assertEqual(response.data["misses"], 1)
+        self.assertEqual(response.data["hit_rate"], 0.5)
+
+    def test_default_ttl(self):
+        self.assertEqual(get_representation_cache_ttl(), DEFAULT_LOCMEM_TTL)
+        
+        with override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}):
+            self.assertEqual(get_representation_cache_ttl(), DEFAULT_TTL)
+            
+        with override_settings(CHISUBMIT_REPRESENTATION_CACHE_TTL=60):
+            self.assertEqual(get_representation_cache_ttl(), 60)
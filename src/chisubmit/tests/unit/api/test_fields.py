@@ -0,0 +1,67 @@
+from django.core.urlresolvers import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from chisubmit.tests.unit.api import QueryBudgetMixin
+from django.contrib.auth.models import User
+
+from chisubmit.backend.api.serializers import parse_fields
+from chisubmit.common.wire import SPARSE_FIELDS_HEADER
+
+class SparseFieldsetsTests(QueryBudgetMixin, APITestCase):
+    
+    fixtures = ['users', 'course1', 'course1_users', 'course1_teams', 
+                'course1_pa1', 'course1_pa1_registrations_with_submissions']
+    
+    def setUp(self):
+        user = User.objects.get(username='instructor1')
+        self.client.force_authenticate(user=user)
+    
+    def test_parse_fields(self):
+        self.assertEqual(parse_fields("team_id, assignments.grader_username,assignments.grades,"),
+                         {"team_id": {}, "assignments": {"grader_username": {}, "grades": {}}})
+    
+    def test_all_fields(self):
+        url = reverse('team-detail', args=["cmsc40100", "student1-student2"])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("extensions", response.data)
+        self.assertIn("students_url", response.data)
+        self.assertFalse(response.has_header(SPARSE_FIELDS_HEADER))
+    
+    def test_fields(self):
+        url = reverse('team-detail', args=["cmsc40100", "student1-student2"])
+        response = self.client.get(url, {"fields": "team_id,extensions"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data.keys()), set(["url", "team_id", "extensions"]))
+        self.assertEqual(response[SPARSE_FIELDS_HEADER], "team_id,extensions")
+
+    def test_fields_list(self):
+        url = reverse('assignment-list', args=["cmsc40100"])
+        response = self.client.get(url, {"fields": "name,deadline"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for assignment in response.data:
+            self.assertEqual(set(assignment.keys()), set(["url", "name", "deadline"]))
+            
+    def test_fields_nested(self):
+        url = reverse('registration-detail', args=["cmsc40100", "student1-student2", "pa1"])
+        response = self.client.get(url, {"fields": "assignment_id,final_submission.commit_sha,assignment"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data.keys()), set(["url", "assignment_id", "final_submission", "assignment"]))
+        self.assertEqual(set(response.data["final_submission"].keys()), set(["url", "commit_sha"]))
+        self.assertIn("deadline", response.data["assignment"])
+        self.assertIn("rubric_url", response.data["assignment"])
+        
+    def test_fields_include(self):
+        url = reverse('team-list', args=["cmsc40100"])
+        response = self.client.get(url, {"include": ["students", "assignments"],
+                                         "fields": "team_id,assignments.grader_username,assignments.final_submission.commit_sha"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        self.assertEqual(len(response.data), 2)
+        for team in response.data:
+            self.assertEqual(set(team.keys()), set(["url", "team_id", "students", "assignments"]))
+            # Included objects without any requested fields get all their fields
+            self.assertIn("confirmed", team["students"][0])
+            for registration in team["assignments"]:
+                self.assertEqual(set(registration.keys()), set(["url", "grader_username", "final_submission"]))
+                self.assertEqual(set(registration["final_submission"].keys()), set(["url", "commit_sha"]))
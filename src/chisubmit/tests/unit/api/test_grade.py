@@ -1,10 +1,11 @@
 from django.core.urlresolvers import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
+from chisubmit.tests.unit.api import QueryBudgetMixin
 from django.contrib.auth.models import User
 
 
-class GradeTests(APITestCase):
+class GradeTests(QueryBudgetMixin, APITestCase):
     
     fixtures = ['users', 'course1', 'course1_users', 'course1_teams', 
                          'course1_pa1', 'course1_pa1_registrations']    
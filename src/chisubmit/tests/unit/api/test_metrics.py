@@ -0,0 +1,120 @@
+import logging
+from contextlib import contextmanager
+
+from django.core.urlresolvers import reverse
+from django.test.utils import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+from chisubmit.tests.unit.api import QueryBudgetMixin
+from django.contrib.auth.models import User
+
+from chisubmit.backend.api import metrics
+
+
+class ListHandler(logging.Handler):
+    
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.messages = []
+        
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+@contextmanager
+def capture_log(handler, level = logging.WARNING):
+    logger = logging.getLogger("chisubmit.backend.requests")
+    handlers = logger.handlers
+    old_level = logger.level
+    logger.handlers = [handler]
+    logger.setLevel(level)
+    try:
+        yield
+    finally:
+        logger.handlers = handlers
+        logger.setLevel(old_level)
+
+
+class HistogramTests(APITestCase):
+    
+    def test_render(self):
+        h = metrics.Histogram("test_seconds", "Test", ("view",), (0.1, 1.0))
+        h.observe(0.05, "a")
+        h.observe(0.5, "a")
+        h.observe(5, "a")
+        
+        lines = h.render()
+        self.assertIn('test_seconds_bucket{view="a",le="0.1"} 1', lines)
+        self.assertIn('test_seconds_bucket{view="a",le="1.0"} 2', lines)
+        self.assertIn('test_seconds_bucket{view="a",le="+Inf"} 3', lines)
+        self.assertIn('test_seconds_count{view="a"} 3', lines)
+        self.assertIn('test_seconds_sum{view="a"} 5.55', lines)
+        self.assertEqual(h.get("a"), (3, 5.55))
+        self.assertEqual(h.get("b"), (0, 0))
+
+
+class RequestMetricsTests(QueryBudgetMixin, APITestCase):
+    
+    fixtures = ['users', 'course1', 'course1_users', 'course1_teams']
+    
+    def setUp(self):
+        metrics.registry.reset()
+    
+    def get(self, username, url):
+        user = User.objects.get(username=username)
+        self.client.force_authenticate(user=user)
+        return self.client.get(url)
+    
+    def test_metrics(self):
+        url = reverse('team-list', args=["cmsc40100"])
+        self.get("instructor1", url)
+        self.get("instructor1", url)
+        
+        n, _ = metrics.request_duration.get("team-list", "GET")
+        self.assertEqual(n, 2)
+        n, queries = metrics.request_queries.get("team-list", "GET")
+        self.assertEqual(n, 2)
+        self.assertGreater(queries, 0)
+        
+        response = self.get("admin", reverse('metrics'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        
+        text = response.content
+        self.assertIn('chisubmit_request_duration_seconds_count{view="team-list",method="GET"} 2', text)
+        self.assertIn('chisubmit_request_db_queries_count{view="team-list",method="GET"} 2', text)
+        self.assertIn('chisubmit_request_db_duration_seconds_bucket{view="team-list",method="GET",le="+Inf"} 2', text)
+        self.assertIn('chisubmit_response_size_bytes_sum{view="team-list",method="GET"}', text)
+        self.assertIn('chisubmit_representation_cache_hits_total', text)
+        
+    def test_metrics_not_admin(self):
+        response = self.get("instructor1", reverse('metrics'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(CHISUBMIT_SLOW_REQUEST_THRESHOLD = 0)
+    def test_slow_request_logged(self):
+        handler = ListHandler()
+        with capture_log(handler):
+            self.get("instructor1", reverse('team-list', args=["cmsc40100"]))
+            
+        self.assertEqual(len(handler.messages), 1)
+        self.assertIn("(team-list)", handler.messages[0])
+        self.assertNotIn("SELECT", handler.messages[0])
+        
+    @override_settings(CHISUBMIT_SLOW_REQUEST_THRESHOLD = 0)
+    def test_slow_request_queries_logged(self):
+        handler = ListHandler()
+        with capture_log(handler, logging.DEBUG):
+            self.get("instructor1", reverse('team-list', args=["cmsc40100"]))
+            
+        self.assertEqual(len(handler.messages), 2)
+        self.assertIn("(team-list)", handler.messages[0])
+        self.assertIn("SELECT", handler.messages[1])
+        
+    @override_settings(CHISUBMIT_SLOW_REQUEST_THRESHOLD = None)
+    def test_slow_request_disabled(self):
+        handler = ListHandler()
+        with capture_log(handler):
+            self.get("instructor1", reverse('team-list', args=["cmsc40100"]))
+            
+        self.assertEqual(handler.messages, [])
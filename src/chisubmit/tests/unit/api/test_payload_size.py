@@ -0,0 +1,139 @@
+import os
+import gzip
+import json
+from StringIO import StringIO
+
+from django.core.urlresolvers import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from chisubmit.tests.unit.api import QueryBudgetMixin
+from django.contrib.auth.models import User
+
+from chisubmit.backend.api.seed import seed_course
+from chisubmit.backend.api.serializers import URLS_MODES
+
+COURSE_ID = "seeded400"
+N_TEAMS = 400
+
+# Some of the largest list requests, as (URL name, list of includes)
+REQUESTS = {
+    "teams": ("team-list", []),
+    "teams-full": ("team-list", ["students", "assignments__grades"]),
+    "students": ("student-list", []),
+}
+
+# Maximum size (in bytes) of the responses to the above requests, in each 
+# of the ?urls= modes, in a seeded course with 400 teams. Each budget is
+# (uncompressed size, gzipped size). If a change makes the API return 
+# more data, these tests will fail; if the increase is justified, 
+# update the budgets (set the CHISUBMIT_PRINT_SIZES environment 
+# variable to print the current sizes)
+BUDGETS = {
+    ('students', 'absolute'): (260153, 13491),
+    ('students', 'none'): (195461, 11946),
+    ('students', 'relative'): (246553, 14518),
+    ('teams', 'absolute'): (115569, 4847),
+    ('teams', 'none'): (20293, 1079),
+    ('teams', 'relative'): (95169, 4765),
+    ('teams-full', 'absolute'): (2238301, 113407),
+    ('teams-full', 'none'): (1114904, 59174),
+    ('teams-full', 'relative'): (2013901, 112190),
+}
+
+# How much bigger than the budget a response can be
+BUDGET_SLACK = 1.02
+
+def gunzip(content):
+    return gzip.GzipFile(fileobj=StringIO(content)).read()
+
+
+class PayloadSizeTests(QueryBudgetMixin, APITestCase):
+    
+    @classmethod
+    def setUpTestData(cls):
+        seed_course(COURSE_ID, N_TEAMS)
+        cls.admin = User.objects.create_superuser("admin", "admin@example.org", "admin")
+        
+    def setUp(self):
+        self.client.force_authenticate(user=self.admin)
+        
+    def get(self, name, urls_mode = None, gzipped = False):
+        url_name, include = REQUESTS[name]
+        params = {}
+        if include:
+            params["include"] = include
+        if urls_mode is not None:
+            params["urls"] = urls_mode
+        headers = {}
+        if gzipped:
+            headers["HTTP_ACCEPT_ENCODING"] = "gzip"
+            
+        response = self.client.get(reverse(url_name, args=[COURSE_ID]), params, **headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        return response
+    
+    def get_sizes(self):
+        # The (uncompressed size, gzipped size, data) of every request in 
+        # every urls mode. The largest requests are slow, so we only make 
+        # them once (gzipped) and share them among the tests
+        cls = self.__class__
+        if not hasattr(cls, "_sizes"):
+            sizes = {}
+            for name in REQUESTS:
+                for urls_mode in URLS_MODES:
+                    response = self.get(name, urls_mode, gzipped = True)
+                    self.assertEqual(response["Content-Encoding"], "gzip")
+                    content = gunzip(response.content)
+                    sizes[(name, urls_mode)] = (len(content), len(response.content), json.loads(content))
+            cls._sizes = sizes
+            
+            if os.environ.has_key("CHISUBMIT_PRINT_SIZES"):
+                for k in sorted(sizes):
+                    print "    %r: %r," % (k, sizes[k][:2])
+        return cls._sizes
+    
+    def test_budgets(self):
+        for k, (size, gzip_size, _) in self.get_sizes().items():
+            budget, gzip_budget = BUDGETS[k]
+            self.assertLessEqual(size, budget * BUDGET_SLACK, 
+                                 "%s (urls=%s) is %i bytes (budget: %i)" % (k + (size, budget)))
+            self.assertLessEqual(gzip_size, gzip_budget * BUDGET_SLACK, 
+                                 "%s (urls=%s) is %i bytes gzipped (budget: %i)" % (k + (gzip_size, gzip_budget)))
+
+    def test_gzip(self):
+        response = self.get("teams")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        
+        self.assertEqual(json.loads(response.content), self.get_sizes()[("teams", "absolute")][2])
+        
+    def test_urls_modes(self):
+        sizes = self.get_sizes()
+        absolute = sizes[("teams-full", "absolute")][2]
+        relative = sizes[("teams-full", "relative")][2]
+        none = sizes[("teams-full", "none")][2]
+        
+        self.assertEqual(len(absolute), N_TEAMS)
+        
+        for name in REQUESTS:
+            self.assertLess(sizes[(name, "relative")][0], sizes[(name, "absolute")][0])
+            self.assertLess(sizes[(name, "none")][0], sizes[(name, "relative")][0])
+        
+        team = absolute[0]
+        self.assertTrue(team["url"].startswith("http://"))
+        self.assertTrue(team["students"][0]["url"].startswith("http://"))
+        self.assertTrue(team["assignments"][0]["grades_url"].startswith("http://"))
+        
+        team = relative[0]
+        self.assertTrue(team["url"].startswith("/api/v1/courses/%s/teams/" % COURSE_ID))
+        self.assertTrue(team["assignments_url"].startswith("/api/v1/"))
+        self.assertTrue(team["assignments"][0]["assignment"]["rubric_url"].startswith("/api/v1/"))
+        
+        team = none[0]
+        for f in ("url", "students_url", "assignments_url"):
+            self.assertNotIn(f, team)
+        self.assertNotIn("url", team["students"][0])
+        self.assertNotIn("grades_url", team["assignments"][0])
+        self.assertEqual(team["team_id"], absolute[0]["team_id"])
+        self.assertEqual(team["assignments"][0]["final_submission"]["commit_sha"], 
+                         absolute[0]["assignments"][0]["final_submission"]["commit_sha"])
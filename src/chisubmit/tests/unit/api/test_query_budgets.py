@@ -0,0 +1,82 @@
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+from chisubmit.tests.unit.api import QueryBudgetMixin, is_transaction_query
+from django.contrib.auth.models import User
+
+from chisubmit.backend.api.seed import seed_course
+
+SMALL_COURSE = ("small", 2)
+LARGE_COURSE = ("large", 200)
+
+# GET requests (URL name, URL arguments after the course ID, query parameters)
+# whose number of queries must not depend on the size of the course
+INSTRUCTOR_REQUESTS = [
+    ("course-detail", [], {}),
+    ("instructor-list", [], {}),
+    ("grader-list", [], {}),
+    ("student-list", [], {}),
+    ("assignment-list", [], {}),
+    ("assignment-list", [], {"include": ["rubric"]}),
+    ("assignment-detail", ["pa1"], {"include": ["rubric"]}),
+    ("assignment-stats", ["pa1"], {}),
+    ("rubric-list", ["pa1"], {}),
+    ("team-list", [], {}),
+    ("team-list", [], {"include": ["students"]}),
+    ("team-list", [], {"include": ["assignments"]}),
+    ("team-list", [], {"include": ["students", "assignments"]}),
+    ("team-list", [], {"include": ["students", "assignments__grades"]}),
+    ("team-detail", ["team1"], {}),
+    ("teammember-list", ["team1"], {}),
+    ("registration-list", ["team1"], {}),
+    ("registration-detail", ["team1", "pa1"], {}),
+    ("submission-list", ["team1", "pa1"], {}),
+    ("grade-list", ["team1", "pa1"], {}),
+]
+
+STUDENT_REQUESTS = [
+    ("course-detail", [], {}),
+    ("assignment-list", [], {}),
+    ("team-list", [], {"include": ["students", "assignments"]}),
+    ("team-detail", ["team1"], {}),
+    ("registration-list", ["team1"], {}),
+]
+
+
+class QueryBudgetScalingTests(QueryBudgetMixin, APITestCase):
+    """
+    Checks that requests make the same number of queries in a course
+    with two teams and in a course with two hundred teams.
+    """
+    
+    @classmethod
+    def setUpTestData(cls):
+        for course_id, n_teams in (SMALL_COURSE, LARGE_COURSE):
+            seed_course(course_id, n_teams)
+    
+    def count_queries(self, username, course_id, url_name, args, params):
+        self.client.force_authenticate(user=User.objects.get(username=username))
+        url = reverse(url_name, args=[course_id] + args)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, url)
+        return len([q for q in queries.captured_queries if not is_transaction_query(q["sql"])])
+    
+    def check_requests(self, username, requests):
+        failed = []
+        for url_name, args, params in requests:
+            counts = [self.count_queries(username % course_id, course_id, url_name, args, params)
+                      for course_id, _ in (SMALL_COURSE, LARGE_COURSE)]
+            if counts[0] != counts[1]:
+                failed.append("%s %r: %i queries with %i teams, %i queries with %i teams" % 
+                              (url_name, params, counts[0], SMALL_COURSE[1], counts[1], LARGE_COURSE[1]))
+        if failed:
+            self.fail("\n".join(failed))
+    
+    def test_instructor(self):
+        self.check_requests("%s_instructor", INSTRUCTOR_REQUESTS)
+        
+    def test_student(self):
+        self.check_requests("%s_student1", STUDENT_REQUESTS)
@@ -1,9 +1,10 @@
 from django.core.urlresolvers import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
+from chisubmit.tests.unit.api import QueryBudgetMixin
 from django.contrib.auth.models import User
 
-class RegisterTests(APITestCase):
+class RegisterTests(QueryBudgetMixin, APITestCase):
     
     fixtures = ['users', 'course1', 'course1_users', 'course1_pa1']
         
@@ -72,7 +73,7 @@ class RegisterTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
 
         
-class RegisterErrorTests(APITestCase):        
+class RegisterErrorTests(QueryBudgetMixin, APITestCase):        
         
     fixtures = ['users', 'course1', 'course1_users', 'course1_pa1']
                 
@@ -109,7 +110,7 @@ class RegisterErrorTests(APITestCase):
         response = self.client.post(url, data = post_data)
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)          
            
-class RegisterExistingTeamErrorTests(APITestCase):             
+class RegisterExistingTeamErrorTests(QueryBudgetMixin, APITestCase):             
                 
     fixtures = ['users', 'course1', 'course1_users', 'course1_pa1', 'course1_teams']
     
@@ -0,0 +1,96 @@
+from django.core.urlresolvers import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from chisubmit.tests.unit.api import QueryBudgetMixin
+from django.contrib.auth.models import User
+
+from chisubmit.backend.api.models import Registration
+
+class RegistrationBulkUpdateTests(QueryBudgetMixin, APITestCase):
+    
+    fixtures = ['users', 'course1', 'course1_users', 'course1_teams', 
+                'course1_pa1', 'course1_pa1_registrations_with_submissions']    
+            
+    def test_bulk_update_graders(self):
+        user = User.objects.get(username='instructor1')
+        self.client.force_authenticate(user=user)
+
+        url = reverse('assignment-registrations', args=["cmsc40100","pa1"])
+        
+        patch_data = [{"team_id": "student1-student2", "grader_username": "grader1"},
+                      {"team_id": "student3-student4", "grader_username": "grader2"}]
+        
+        response = self.client.patch(url, data = patch_data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertItemsEqual(response.data, [{"team_id": "student1-student2", "updated": True},
+                                              {"team_id": "student3-student4", "updated": True}])
+        
+        registration = Registration.objects.get(team__team_id="student1-student2", assignment__assignment_id="pa1")
+        self.assertEqual(registration.grader.user.username, "grader1")
+        registration = Registration.objects.get(team__team_id="student3-student4", assignment__assignment_id="pa1")
+        self.assertEqual(registration.grader.user.username, "grader2")
+
+        response = self.client.patch(url, data = patch_data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertItemsEqual(response.data, [{"team_id": "student1-student2", "updated": False},
+                                              {"team_id": "student3-student4", "updated": False}])
+
+    def test_bulk_update_final_submission_and_adjustments(self):
+        user = User.objects.get(username='instructor1')
+        self.client.force_authenticate(user=user)
+
+        url = reverse('assignment-registrations', args=["cmsc40100","pa1"])
+        
+        patch_data = [{"team_id": "student1-student2", 
+                       "final_submission_id": 1,
+                       "grade_adjustments": {"Penalty": -5}}]
+        
+        response = self.client.patch(url, data = patch_data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        registration = Registration.objects.get(team__team_id="student1-student2", assignment__assignment_id="pa1")
+        self.assertEqual(registration.final_submission.pk, 1)
+        self.assertIn("Penalty", registration.grade_adjustments)
+
+    def test_bulk_update_errors(self):
+        user = User.objects.get(username='instructor1')
+        self.client.force_authenticate(user=user)
+
+        url = reverse('assignment-registrations', args=["cmsc40100","pa1"])
+        
+        patch_data = [{"team_id": "student1-student2", "grader_username": "grader1"},
+                      {"team_id": "student3-student4", "grader_username": "student1"},
+                      {"team_id": "student3-student4", "final_submission_id": 1},
+                      {"team_id": "student5-student6", "grader_username": "grader1"}]
+        
+        response = self.client.patch(url, data = patch_data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertItemsEqual(response.data.keys(), ["student3-student4", "student5-student6"])
+        self.assertEqual(len(response.data["student3-student4"]), 2)
+        
+        # Nothing should have been updated
+        registration = Registration.objects.get(team__team_id="student1-student2", assignment__assignment_id="pa1")
+        self.assertIsNone(registration.grader)
+
+    def test_bulk_update_invalid_row(self):
+        user = User.objects.get(username='instructor1')
+        self.client.force_authenticate(user=user)
+
+        url = reverse('assignment-registrations', args=["cmsc40100","pa1"])
+        
+        patch_data = [{"grader_username": "grader1"}]
+        
+        response = self.client.patch(url, data = patch_data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("row 0", response.data)
+        
+    def test_bulk_update_as_grader(self):
+        user = User.objects.get(username='grader1')
+        self.client.force_authenticate(user=user)
+
+        url = reverse('assignment-registrations', args=["cmsc40100","pa1"])
+        
+        patch_data = [{"team_id": "student1-student2", "grader_username": "grader1"}]
+        
+        response = self.client.patch(url, data = patch_data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,44 @@
+import unittest
+from django.core.urlresolvers import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from chisubmit.tests.unit.api import QueryBudgetMixin
+from django.contrib.auth.models import User
+
+from chisubmit.common.wire import msgpack_available, msgpack_loads, msgpack_dumps
+
+class WireFormatTests(QueryBudgetMixin, APITestCase):
+    
+    fixtures = ['users', 'course1', 'course1_users']
+    
+    def test_json_default(self):
+        user = User.objects.get(username='admin')
+        self.client.force_authenticate(user=user)
+        
+        url = reverse('course-detail', args=["cmsc40100"])
+        response = self.client.get(url, HTTP_ACCEPT="application/json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertNotIn(b", ", response.content)
+        
+    @unittest.skipIf(not msgpack_available(), "msgpack is not installed")
+    def test_msgpack(self):
+        user = User.objects.get(username='admin')
+        self.client.force_authenticate(user=user)
+        
+        url = reverse('course-detail', args=["cmsc40100"])
+        response = self.client.get(url, HTTP_ACCEPT="application/msgpack")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        self.assertEqual(msgpack_loads(response.content)["course_id"], "cmsc40100")
+
+    @unittest.skipIf(not msgpack_available(), "msgpack is not installed")
+    def test_msgpack_request(self):
+        user = User.objects.get(username='admin')
+        self.client.force_authenticate(user=user)
+        
+        url = reverse('course-detail', args=["cmsc40100"])
+        response = self.client.patch(url, data=msgpack_dumps({"name": "Foobar"}), 
+                                     content_type="application/msgpack")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["name"], "Foobar")
@@ -0,0 +1,127 @@
+from django.core.urlresolvers import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from chisubmit.tests.unit.api import QueryBudgetMixin
+from django.contrib.auth.models import User
+
+from chisubmit.backend.api.models import Student, Grader
+
+class RosterSyncTests(QueryBudgetMixin, APITestCase):
+    
+    fixtures = ['users', 'course1', 'course1_users']
+    
+    def get_roster(self, usernames, user_type = "student"):
+        roster = []
+        for username in usernames:
+            user = User.objects.get(username=username)
+            roster.append({"username": username,
+                           "first_name": user.first_name,
+                           "last_name": user.last_name,
+                           "email": user.email,
+                           "user_type": user_type})
+        return roster
+    
+    def test_roster_sync(self):
+        user = User.objects.get(username='admin')
+        self.client.force_authenticate(user=user)
+        
+        roster = self.get_roster(["student1", "student2", "student3", "student5"])
+        roster.append({"username": "newstudent",
+                       "first_name": "New",
+                       "last_name": "Student",
+                       "email": "newstudent@example.org",
+                       "user_type": "student"})
+        roster += self.get_roster(["grader3"], "grader")
+        
+        url = reverse('roster-sync', args=["cmsc40100"])
+        response = self.client.post(url, data={"users": roster, "drop_missing": True}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        self.assertEqual(response.data["users_created"], ["newstudent"])
+        self.assertEqual(response.data["users_updated"], [])
+        self.assertEqual(response.data["students_added"], ["newstudent", "student5"])
+        self.assertEqual(response.data["students_dropped"], ["student4"])
+        self.assertEqual(response.data["graders_added"], ["grader3"])
+        self.assertEqual(response.data["instructors_added"], [])
+        
+        students = Student.objects.filter(course__course_id="cmsc40100", dropped=False)
+        self.assertItemsEqual([s.user.username for s in students], ["student1", "student2", "student3", "student5", "newstudent"])
+        self.assertTrue(Grader.objects.filter(course__course_id="cmsc40100", user__username="grader3").exists())
+        
+        # Syncing the same roster again should be a no-op
+        response = self.client.post(url, data={"users": roster, "drop_missing": True}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for k, v in response.data.items():
+            if k not in ("dry_run", "invalid_users"):
+                self.assertEqual(v, [], k)
+        self.assertEqual(response.data["invalid_users"], {})
+        
+    def test_roster_sync_dry_run(self):
+        user = User.objects.get(username='admin')
+        self.client.force_authenticate(user=user)
+        
+        roster = self.get_roster(["student1", "student5"])
+        
+        url = reverse('roster-sync', args=["cmsc40100"])
+        response = self.client.post(url, data={"users": roster, "drop_missing": True, "dry_run": True}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        self.assertEqual(response.data["students_added"], ["student5"])
+        self.assertEqual(response.data["students_dropped"], ["student2", "student3", "student4"])
+        
+        students = Student.objects.filter(course__course_id="cmsc40100", dropped=False)
+        self.assertEqual(len(students), 4)
+
+    def test_roster_sync_as_instructor(self):
+        user = User.objects.get(username='instructor1')
+        self.client.force_authenticate(user=user)
+        
+        url = reverse('roster-sync', args=["cmsc40100"])
+        response = self.client.post(url, data={"users": []}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_roster_sync_update_users(self):
+        user = User.objects.get(username='admin')
+        self.client.force_authenticate(user=user)
+        
+        roster = self.get_roster(["student1", "student2"])
+        roster[0]["email"] = "new-email@example.org"
+        
+        url = reverse('roster-sync', args=["cmsc40100"])
+        response = self.client.post(url, data={"users": roster}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["users_updated"], [])
+        self.assertNotEqual(User.objects.get(username="student1").email, "new-email@example.org")
+        
+        response = self.client.post(url, data={"users": roster, "update_users": True}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["users_updated"], ["student1"])
+        self.assertEqual(User.objects.get(username="student1").email, "new-email@example.org")
+
+    def test_roster_sync_invalid_users(self):
+        user = User.objects.get(username='admin')
+        self.client.force_authenticate(user=user)
+        
+        roster = self.get_roster(["student1", "student2", "student3", "student4"])
+        roster.append({"username": "newstudent",
+                       "first_name": "New",
+                       "last_name": "Student",
+                       "email": "not an email",
+                       "user_type": "student"})
+        roster.append({"username": "newstudent2",
+                       "first_name": "New",
+                       "last_name": "Student",
+                       "email": "newstudent2@example.org",
+                       "user_type": "student"})
+        del roster[1]["last_name"]
+        
+        url = reverse('roster-sync', args=["cmsc40100"])
+        response = self.client.post(url, data={"users": roster, "drop_missing": True}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        self.assertItemsEqual(response.data["invalid_users"].keys(), ["row 2", "row 5"])
+        self.assertIn("email", response.data["invalid_users"]["row 5"][0])
+        self.assertEqual(response.data["users_created"], ["newstudent2"])
+        self.assertEqual(response.data["students_added"], ["newstudent2"])
+        # A student with an invalid entry is not dropped
+        self.assertEqual(response.data["students_dropped"], [])
@@ -0,0 +1,58 @@
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils.six import StringIO
+
+from chisubmit.backend.api.models import Course, Registration, Grade, Submission
+from chisubmit.backend.api.seed import seed_course
+
+
+class SeedCourseTests(TestCase):
+
+    def test_uniform(self):
+        course = seed_course("uniform", 10, n_assignments = 1, n_rubric_components = 2)
+
+        self.assertEquals(course.team_set.count(), 10)
+        self.assertEquals(course.student_set.count(), 20)
+        self.assertEquals(Registration.objects.filter(final_submission__isnull = True).count(), 0)
+        self.assertEquals(Grade.objects.count(), 20)
+
+    def test_realistic(self):
+        course = seed_course("realistic", 100, n_assignments = 2, n_rubric_components = 3, realistic = True)
+
+        registrations = Registration.objects.filter(assignment__course = course)
+        self.assertEquals(registrations.count(), 200)
+        
+        submitted = registrations.filter(final_submission__isnull = False)
+        self.assertGreater(submitted.count(), 150)
+        self.assertLess(submitted.count(), 200)
+        
+        late = Submission.objects.filter(registration__assignment__course = course, extensions_used__gt = 0)
+        self.assertGreater(late.count(), 0)
+        for submission in late:
+            self.assertGreater(submission.submitted_at, submission.registration.assignment.deadline)
+            
+        for team in course.team_set.all():
+            self.assertGreaterEqual(team.get_extensions_available(), 0)
+            
+        self.assertLess(Grade.objects.count(), submitted.count() * 3)
+        for grade in Grade.objects.select_related("rubric_component"):
+            self.assertTrue(0 <= grade.points <= grade.rubric_component.points)
+            
+    def test_same_seed(self):
+        seed_course("seed1", 20, realistic = True, seed = 42)
+        seed_course("seed2", 20, realistic = True, seed = 42)
+        
+        def get_points(course_id):
+            return list(Grade.objects.filter(registration__assignment__course__course_id = course_id)
+                                     .order_by("pk").values_list("points", flat = True))
+        
+        self.assertEquals(get_points("seed1"), get_points("seed2"))
+
+    def test_command(self):
+        out = StringIO()
+        call_command("seed_course", "cmd", teams = 5, graders = 2, stdout = out)
+        self.assertIn("10 students, 5 teams, 2 graders, 2 assignments", out.getvalue())
+        self.assertTrue(Course.objects.filter(course_id = "cmd").exists())
+        
+        self.assertRaises(CommandError, call_command, "seed_course", "cmd", teams = 5, stdout = out)
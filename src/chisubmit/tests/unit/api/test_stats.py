@@ -0,0 +1,74 @@
+from django.core.urlresolvers import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from chisubmit.tests.unit.api import QueryBudgetMixin
+from django.contrib.auth.models import User
+
+from chisubmit.backend.api.models import Assignment, Registration, Grader
+from chisubmit.common.utils import get_datetime_now_utc
+from datetime import timedelta
+
+class AssignmentStatsTests(QueryBudgetMixin, APITestCase):
+    
+    fixtures = ['users', 'course1', 'course1_users', 'course1_teams', 
+                'course1_pa1', 'course1_pa1_registrations_with_submissions', 'course1_pa1_grades']
+    
+    def test_stats_not_ready(self):
+        user = User.objects.get(username='instructor1')
+        self.client.force_authenticate(user=user)
+        
+        url = reverse('assignment-stats', args=["cmsc40100", "pa1"])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        self.assertEqual(response.data["registrations"]["total"], 2)
+        self.assertEqual(response.data["registrations"]["not_ready"], 2)
+        self.assertEqual(response.data["total"]["count"], 0)
+        
+    def test_stats(self):
+        assignment = Assignment.objects.get(course__course_id="cmsc40100", assignment_id="pa1")
+        assignment.deadline = get_datetime_now_utc() - timedelta(days=7)
+        assignment.save()
+        
+        registration = Registration.objects.get(pk=1)
+        registration.grader = Grader.objects.get(course__course_id="cmsc40100", user__username="grader1")
+        registration.grade_adjustments = {"Penalty": -10}
+        registration.save()
+        
+        user = User.objects.get(username='instructor1')
+        self.client.force_authenticate(user=user)
+        
+        url = reverse('assignment-stats', args=["cmsc40100", "pa1"])
+        response = self.client.get(url, {"bins": 4})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        self.assertEqual(response.data["registrations"]["total"], 2)
+        self.assertEqual(response.data["registrations"]["graded"], 2)
+        
+        total = response.data["total"]
+        self.assertEqual(total["count"], 2)
+        self.assertAlmostEqual(total["average"], (70 + 92.5) / 2)
+        self.assertAlmostEqual(total["min"], 70)
+        self.assertAlmostEqual(total["max"], 92.5)
+        self.assertAlmostEqual(total["stddev"], 11.25)
+        
+        self.assertEqual(response.data["histogram"]["counts"], [0, 0, 1, 1])
+        
+        rcs = response.data["rubric_components"]
+        self.assertEqual([rc["description"] for rc in rcs], ["First Task", "Second Task"])
+        self.assertAlmostEqual(rcs[0]["average"], 43.75)
+        self.assertAlmostEqual(rcs[0]["stddev"], 1.25)
+        self.assertAlmostEqual(rcs[1]["max"], 50)
+        
+        graders = response.data["graders"]
+        self.assertEqual([g["grader_username"] for g in graders], ["grader1", None])
+        self.assertEqual(graders[0]["total"]["count"], 1)
+        self.assertAlmostEqual(graders[0]["total"]["average"], 70)
+        
+    def test_stats_as_student(self):
+        user = User.objects.get(username='student1')
+        self.client.force_authenticate(user=user)
+        
+        url = reverse('assignment-stats', args=["cmsc40100", "pa1"])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -1,12 +1,13 @@
 from django.core.urlresolvers import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
+from chisubmit.tests.unit.api import QueryBudgetMixin
 from django.contrib.auth.models import User
 from chisubmit.common.utils import get_datetime_now_utc
 from datetime import timedelta
 from chisubmit.backend.api.models import Assignment
 
-class SubmitTests(APITestCase):
+class SubmitTests(QueryBudgetMixin, APITestCase):
     
     fixtures = ['users', 'course1', 'course1_users', 'course1_teams', 
                          'course1_pa1', 'course1_pa1_registrations']  
@@ -147,7 +148,7 @@ class SubmitTests(APITestCase):
         self.assertEqual(response.data["extensions_before"], 2)
         self.assertEqual(response.data["extensions_after"], 0)
         
-class SubmitWithExistingSubmissionsTests(APITestCase):
+class SubmitWithExistingSubmissionsTests(QueryBudgetMixin, APITestCase):
     
     fixtures = ['users', 'course1', 'course1_users', 'course1_teams', 
                          'course1_pa1', 'course1_pa1_registrations_with_submissions']
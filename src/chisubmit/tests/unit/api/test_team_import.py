@@ -0,0 +1,82 @@
+from django.core.urlresolvers import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from chisubmit.tests.unit.api import QueryBudgetMixin
+from django.contrib.auth.models import User
+
+from chisubmit.backend.api.models import Team, Registration
+
+class TeamImportTests(QueryBudgetMixin, APITestCase):
+    
+    fixtures = ['users', 'course1', 'course1_users', 'course1_teams', 
+                'course1_pa1', 'course1_pa1_registrations', 'course1_pa2']
+    
+    def test_import_individual_teams(self):
+        user = User.objects.get(username='admin')
+        self.client.force_authenticate(user=user)
+        
+        teams = [{"team_id": s, "students": [s]} for s in ["student1", "student2", "student3", "student4"]]
+        
+        url = reverse('team-import', args=["cmsc40100"])
+        response = self.client.post(url, data={"teams": teams}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["teams_created"], ["student1", "student2", "student3", "student4"])
+        self.assertEqual(response.data["conflicts"], {})
+        
+        for s in ["student1", "student2", "student3", "student4"]:
+            team = Team.objects.get(course__course_id="cmsc40100", team_id=s)
+            self.assertEqual([tm.student.user.username for tm in team.get_team_members()], [s])
+        
+        response = self.client.post(url, data={"teams": teams}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["teams_created"], [])
+        self.assertEqual(response.data["teams_unchanged"], ["student1", "student2", "student3", "student4"])
+
+    def test_import_teams_with_registrations(self):
+        user = User.objects.get(username='instructor1')
+        self.client.force_authenticate(user=user)
+        
+        teams = [{"team_id": "student1-student2", "students": ["student1", "student2"], "assignments": ["pa1"]},
+                 {"team_id": "student1-student3", "students": ["student1", "student3"], "assignments": ["pa1"]},
+                 {"team_id": "student3-student4", "students": ["student3", "student1"]},
+                 {"team_id": "student5", "students": ["student5"]},
+                 {"team_id": "student4", "students": ["student4"], "assignments": ["pa2"], "extensions": 2}]
+        
+        url = reverse('team-import', args=["cmsc40100"])
+        response = self.client.post(url, data={"teams": teams}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        self.assertEqual(response.data["teams_unchanged"], ["student1-student2"])
+        self.assertItemsEqual(response.data["conflicts"].keys(), ["student1-student3", "student3-student4", "student5"])
+        self.assertEqual(response.data["teams_created"], ["student4"])
+        
+        self.assertFalse(Team.objects.filter(course__course_id="cmsc40100", team_id="student1-student3").exists())
+        
+        team = Team.objects.get(course__course_id="cmsc40100", team_id="student4")
+        self.assertEqual(team.extensions, 2)
+        self.assertTrue(Registration.objects.filter(team=team, assignment__assignment_id="pa2").exists())
+
+    def test_import_teams_dry_run(self):
+        user = User.objects.get(username='admin')
+        self.client.force_authenticate(user=user)
+        
+        teams = [{"team_id": "student1", "students": ["student1"], "assignments": ["pa1"]}]
+        
+        url = reverse('team-import', args=["cmsc40100"])
+        response = self.client.post(url, data={"teams": teams, "dry_run": True}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["teams_created"], [])
+        self.assertIn("student1", response.data["conflicts"])
+        
+        teams = [{"team_id": "student1-student2-new", "students": ["student1", "student2"]}]
+        response = self.client.post(url, data={"teams": teams, "dry_run": True}, format="json")
+        self.assertEqual(response.data["teams_created"], ["student1-student2-new"])
+        self.assertFalse(Team.objects.filter(course__course_id="cmsc40100", team_id="student1-student2-new").exists())
+        
+    def test_import_teams_as_student(self):
+        user = User.objects.get(username='student1')
+        self.client.force_authenticate(user=user)
+        
+        url = reverse('team-import', args=["cmsc40100"])
+        response = self.client.post(url, data={"teams": []}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -1,12 +1,13 @@
 from django.core.urlresolvers import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
+from chisubmit.tests.unit.api import QueryBudgetMixin
 from django.contrib.auth.models import User
 
 from pprint import pprint
 from chisubmit.backend.api.models import Course
 
-class TeamTests(APITestCase):
+class TeamTests(QueryBudgetMixin, APITestCase):
     
     fixtures = ['users', 'course1', 'course1_users', 'course1_teams']
     
@@ -1,6 +1,7 @@
 from django.core.urlresolvers import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
+from chisubmit.tests.unit.api import QueryBudgetMixin
 from django.contrib.auth.models import User
 
 from pprint import pprint
@@ -8,7 +9,7 @@ from chisubmit.backend.api.models import Course
 import base64
 from rest_framework.authtoken.models import Token
 
-class UserTests(APITestCase):
+class UserTests(QueryBudgetMixin, APITestCase):
     
     fixtures = ['users', 'course1', 'course1_users']
     
@@ -42,7 +43,7 @@ class UserTests(APITestCase):
         response = self.client.post(url, data = post_data)
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         
-class UserTokenTests(APITestCase):        
+class UserTokenTests(QueryBudgetMixin, APITestCase):        
         
     fixtures = ['users']        
         
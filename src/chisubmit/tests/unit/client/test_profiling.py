@@ -0,0 +1,74 @@
+import unittest
+
+from chisubmit.client.requester import Requester
+from chisubmit.common.profiling import get_endpoint_pattern, Profiler,\
+    CATEGORY_GIT, CATEGORY_HTTP
+from chisubmit.repos.local import LocalGitRepo
+
+
+class EndpointPatternTests(unittest.TestCase):
+    
+    def test_patterns(self):
+        self.assertEquals(get_endpoint_pattern("http://localhost:8000/api/v1/courses/"), "/courses/")
+        self.assertEquals(get_endpoint_pattern("http://localhost:8000/api/v1/courses/cmsc40100/"), "/courses/{course_id}/")
+        self.assertEquals(get_endpoint_pattern("/api/v1/courses/cmsc40100/teams/team1/assignments/pa1/submit"),
+                          "/courses/{course_id}/teams/{team_id}/assignments/{assignment_id}/submit")
+        self.assertEquals(get_endpoint_pattern("/api/v1/courses/cmsc40100/teams:import"), "/courses/{course_id}/teams:import")
+        self.assertEquals(get_endpoint_pattern("/api/v1/user/token/"), "/user/token/")
+        self.assertEquals(get_endpoint_pattern("/courses/cmsc40100/graders/jdoe"), "/courses/{course_id}/graders/{username}")
+        
+
+class ProfilerTests(unittest.TestCase):
+    
+    def test_instrument(self):
+        request = Requester.__dict__["request"]
+        get_commit = LocalGitRepo.__dict__["get_commit"]
+        
+        profiler = Profiler()
+        profiler.start()
+        try:
+            self.assertIsNot(Requester.__dict__["request"], request)
+            self.assertIsNot(LocalGitRepo.__dict__["get_commit"], get_commit)
+        finally:
+            profiler.stop()
+            
+        self.assertIs(Requester.__dict__["request"], request)
+        self.assertIs(LocalGitRepo.__dict__["get_commit"], get_commit)
+        
+    def test_nested(self):
+        profiler = Profiler()
+        
+        def inner():
+            pass
+        
+        def outer():
+            inner()
+            
+        inner = profiler.wrap_operation(CATEGORY_GIT, "inner", inner)
+        outer = profiler.wrap_operation(CATEGORY_GIT, "outer", outer)
+        outer()
+        
+        self.assertEquals(profiler.operations[(CATEGORY_GIT, "inner")].count, 1)
+        self.assertEquals(profiler.operations[(CATEGORY_GIT, "outer")].count, 1)
+        self.assertEquals(profiler.category_time[CATEGORY_GIT], profiler.operations[(CATEGORY_GIT, "outer")].time)
+        
+    def test_errors(self):
+        profiler = Profiler()
+        
+        def fail():
+            raise ValueError()
+        
+        fail = profiler.wrap_operation(CATEGORY_GIT, "fail", fail)
+        self.assertRaises(ValueError, fail)
+        self.assertEquals(profiler.operations[(CATEGORY_GIT, "fail")].errors, 1)
+        
+    def test_summary(self):
+        profiler = Profiler()
+        profiler.start()
+        profiler.record(CATEGORY_HTTP, "GET /courses/", 0.5, bytes_sent = 10, bytes_received = 100)
+        profiler.stop()
+        
+        summary = "\n".join(profiler.get_summary())
+        self.assertIn("HTTP requests", summary)
+        self.assertIn("GET /courses/", summary)
+        self.assertNotIn("Git operations", summary)
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+import unittest
+import json
+
+from chisubmit.client.requester import iter_json_array, Requester
+from chisubmit.common import wire
+
+def split(s, n):
+    return [s[i:i+n] for i in range(0, len(s), n)]
+
+class StreamingDecoderTests(unittest.TestCase):
+
+    def test_array(self):
+        value = [{"team_id": "team%i" % i, "students": [{"username": u"álvaro"}], "extensions": i}
+                 for i in range(50)]
+        s = json.dumps(value, indent=2).encode("utf-8")
+        
+        for n in [1, 2, 3, 7, 64, len(s)]:
+            self.assertEquals(list(iter_json_array(split(s, n))), value)
+            
+    def test_scalars(self):
+        s = b'[1, 23, 456, -7.5e3, "foo", true, null, [], {}]'
+        for n in [1, 2, 5, len(s)]:
+            self.assertEquals(list(iter_json_array(split(s, n))), [1, 23, 456, -7500.0, "foo", True, None, [], {}])
+            
+    def test_empty(self):
+        self.assertEquals(list(iter_json_array([b"[", b"  ", b"]"])), [])
+        self.assertEquals(list(iter_json_array([])), [])
+        
+    def test_not_array(self):
+        self.assertEquals(list(iter_json_array([b'{"token": ', b'"abc"}'])), [{"token": "abc"}])
+        
+    def test_lazy(self):
+        def chunks():
+            yield b'[{"a": 1}, '
+            yield b'{"a": 2}'
+            raise AssertionError("Read too much")
+        
+        elems = iter_json_array(chunks())
+        self.assertEquals(next(elems), {"a": 1})
+        
+    def test_truncated(self):
+        self.assertRaises(ValueError, list, iter_json_array([b'[{"a": 1}, {"a": ']))
+        self.assertRaises(ValueError, list, iter_json_array([b'[1, 2']))
+
+
+class AbsoluteURLTests(unittest.TestCase):
+
+    def test_absolute_url(self):
+        requester = Requester("token", None, "http://localhost:8000/api/v1")
+        
+        self.assertEquals(requester.absolute_url("/courses/"), "http://localhost:8000/api/v1/courses/")
+        self.assertEquals(requester.absolute_url("/api/v1/courses/foo/"), "http://localhost:8000/api/v1/courses/foo/")
+        self.assertEquals(requester.absolute_url("http://localhost:8000/api/v1/users/"), "http://localhost:8000/api/v1/users/")
+
+
+class FakeResponse(object):
+    
+    def __init__(self, content_type, content):
+        self.status_code = 200
+        self.headers = {"content-type": content_type}
+        self.content = content
+        
+    def json(self):
+        return json.loads(self.content)
+
+
+class FakeSession(object):
+    
+    def __init__(self, response):
+        self.response = response
+        self.requests = []
+        
+    def request(self, **kwargs):
+        self.requests.append(kwargs)
+        return self.response
+
+
+@unittest.skipIf(not wire.msgpack_available(), "msgpack is not installed")
+class WireFormatTests(unittest.TestCase):
+    
+    def get_requester(self, response):
+        requester = Requester("token", None, "http://localhost:8000/api/v1")
+        session = FakeSession(response)
+        requester._Requester__local.session = session
+        return requester, session
+
+    def test_json_server(self):
+        requester, session = self.get_requester(FakeResponse("application/json", '{"name": "Foo"}'))
+        
+        for i in range(2):
+            headers, data = requester.request("PATCH", "/courses/foo/", data={"name": "Foo"})
+            self.assertEquals(data, {"name": "Foo"})
+            self.assertEquals(session.requests[-1]["headers"]["accept"], "application/msgpack")
+            self.assertEquals(session.requests[-1]["headers"]["content-type"], "application/json")
+            self.assertEquals(json.loads(session.requests[-1]["data"]), {"name": "Foo"})
+
+    def test_msgpack_server(self):
+        requester, session = self.get_requester(FakeResponse("application/msgpack", wire.msgpack_dumps({"name": "Foo"})))
+        
+        requester.request("PATCH", "/courses/foo/", data={"name": "Foo"})
+        self.assertEquals(session.requests[-1]["headers"]["content-type"], "application/json")
+        
+        headers, data = requester.request("PATCH", "/courses/foo/", data={"name": "Foo"})
+        self.assertEquals(data, {"name": "Foo"})
+        self.assertEquals(session.requests[-1]["headers"]["content-type"], "application/msgpack")
+        self.assertEquals(wire.msgpack_loads(session.requests[-1]["data"]), {"name": "Foo"})
@@ -0,0 +1,118 @@
+import unittest
+import datetime
+import pytz
+
+from chisubmit.client.types import parse_iso8601_datetime, AttributeTypeException,\
+    NoSuchAttributeException, UnexpectedRelationshipURLException
+from chisubmit.client.team import Team, Registration, Submission
+
+class FakeAPIClient(object):
+    
+    _deferred_save = False
+    _session = None
+    _identity_map = None
+
+
+class ISO8601Tests(unittest.TestCase):
+
+    def test_parse(self):
+        dt = parse_iso8601_datetime("2042-01-21T20:00:00Z")
+        self.assertEquals(dt, datetime.datetime(2042, 1, 21, 20, 0, 0, tzinfo=pytz.utc))
+        self.assertEquals(dt.tzinfo, pytz.utc)
+
+    def test_parse_fraction(self):
+        self.assertEquals(parse_iso8601_datetime("2042-01-21T20:00:00.123456Z").microsecond, 123456)
+        self.assertEquals(parse_iso8601_datetime("2042-01-21T20:00:00.5Z").microsecond, 500000)
+
+    def test_parse_matches_strptime(self):
+        for value, fmt in [("2015-03-08T02:30:59Z", "%Y-%m-%dT%H:%M:%SZ"),
+                           ("2015-03-08T02:30:59.000042Z", "%Y-%m-%dT%H:%M:%S.%fZ")]:
+            expected = pytz.utc.localize(datetime.datetime.strptime(value, fmt))
+            self.assertEquals(parse_iso8601_datetime(value), expected)
+
+    def test_parse_invalid(self):
+        for value in ["2042-01-21", "2042-01-21T20:00:00", "2042-01-21 20:00:00Z", 
+                      "2042-13-21T20:00:00Z", "2042-01-21T20:00:00.1234567Z"]:
+            self.assertRaises(ValueError, parse_iso8601_datetime, value)
+
+
+class DecoderTests(unittest.TestCase):
+    
+    def setUp(self):
+        self.api_client = FakeAPIClient()
+    
+    def test_decode_team(self):
+        data = {"url": "http://localhost/api/v1/courses/cmsc40100/teams/the-team",
+                "team_id": "the-team",
+                "extensions": 2,
+                "active": True,
+                "students_url": "http://localhost/api/v1/courses/cmsc40100/teams/the-team/students/",
+                "assignments_url": "http://localhost/api/v1/courses/cmsc40100/teams/the-team/assignments/",
+                "assignments": [{"url": "http://localhost/api/v1/courses/cmsc40100/teams/the-team/assignments/pa1",
+                                 "assignment_id": "pa1",
+                                 "grader_username": None,
+                                 "final_submission_id": 1,
+                                 "final_submission": {"id": 1,
+                                                      "extensions_used": 0,
+                                                      "commit_sha": "f" * 40,
+                                                      "submitted_at": "2042-01-21T20:00:00.5Z",
+                                                      "in_grace_period": False},
+                                 "grade_adjustments": {"Penalty": "-5.00"},
+                                 "submissions_url": "http://localhost/api/v1/courses/cmsc40100/teams/the-team/assignments/pa1/submissions/",
+                                 "grades_url": "http://localhost/api/v1/courses/cmsc40100/teams/the-team/assignments/pa1/grades/"}]}
+        
+        team = Team(self.api_client, {}, data)
+        
+        self.assertEquals(team.team_id, "the-team")
+        self.assertEquals(team.extensions, 2)
+        self.assertEquals(team.students_url, data["students_url"])
+        
+        registrations = team._rel_assignments
+        self.assertEquals(len(registrations), 1)
+        self.assertIsInstance(registrations[0], Registration)
+        self.assertIsNone(registrations[0].grader_username)
+        self.assertEquals(registrations[0].grade_adjustments, {"Penalty": -5.0})
+        
+        submission = registrations[0].final_submission
+        self.assertIsInstance(submission, Submission)
+        self.assertEquals(submission.submitted_at, datetime.datetime(2042, 1, 21, 20, 0, 0, 500000, tzinfo=pytz.utc))
+
+    def test_fields_are_per_class(self):
+        self.assertIn("students_url", Team._fields)
+        self.assertIn("students", Team._fields)
+        self.assertNotIn("students_url", Registration._fields)
+        self.assertIn("grades", Registration._fields)
+        
+    def test_lazy_conversion(self):
+        data = {"id": 1,
+                "extensions_used": 0,
+                "commit_sha": "f" * 40,
+                "submitted_at": "2042-01-21T20:00:00Z",
+                "in_grace_period": False}
+        submission = Submission(self.api_client, {}, data)
+        
+        # Nothing is converted until it is accessed
+        self.assertRaises(AttributeError, Submission._v_submitted_at.__get__, submission, Submission)
+        self.assertEquals(submission.submitted_at, datetime.datetime(2042, 1, 21, 20, 0, 0, tzinfo=pytz.utc))
+        self.assertIs(submission.submitted_at, submission.submitted_at)
+        
+        self.assertFalse(hasattr(submission, "__dict__"))
+        
+    def test_update_attributes(self):
+        team = Team(self.api_client, {}, {"team_id": "the-team", "extensions": 2})
+        self.assertEquals(team.extensions, 2)
+        
+        team._updateAttributes({"extensions": 3})
+        self.assertEquals(team.extensions, 3)
+        self.assertEquals(team.team_id, "the-team")
+        self.assertIsNone(team.active)
+
+    def test_decode_errors(self):
+        self.assertRaises(NoSuchAttributeException, Team, self.api_client, {}, {"foo": 42})
+        self.assertRaises(UnexpectedRelationshipURLException, Team, self.api_client, {}, {"foo_url": "http://localhost/"})
+        
+        # Type errors are only detected when the field is accessed
+        team = Team(self.api_client, {}, {"extensions": "two"})
+        self.assertRaises(AttributeTypeException, getattr, team, "extensions")
+        submission = Submission(self.api_client, {}, {"submitted_at": "yesterday"})
+        self.assertRaises(AttributeTypeException, getattr, submission, "submitted_at")
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+import unittest
+import datetime
+import pytz
+
+from chisubmit.common import wire
+
+@unittest.skipIf(not wire.msgpack_available(), "msgpack is not installed")
+class MessagePackCodecTests(unittest.TestCase):
+
+    def test_roundtrip(self):
+        value = {"team_id": u"teamá", "extensions": 2, "active": True, 
+                 "students": [{"username": "student1"}], "grade": None}
+        self.assertEquals(wire.msgpack_loads(wire.msgpack_dumps(value)), value)
+        
+    def test_datetime(self):
+        dt = datetime.datetime(2026, 1, 15, 23, 59, 30, 1234, tzinfo=pytz.utc)
+        td = datetime.timedelta(days=2, hours=3, microseconds=17)
+        value = wire.msgpack_loads(wire.msgpack_dumps({"deadline": dt, "grace_period": td}))
+        self.assertEquals(value["deadline"], dt)
+        self.assertEquals(value["grace_period"], td)
+        
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            wire.msgpack_loads(b"\xc1")
+            
+
+class MediaTypeTests(unittest.TestCase):
+    
+    def test_is_msgpack(self):
+        self.assertTrue(wire.is_msgpack("application/msgpack"))
+        self.assertTrue(wire.is_msgpack("application/msgpack; charset=utf-8"))
+        self.assertFalse(wire.is_msgpack("application/json"))
+        self.assertFalse(wire.is_msgpack(None))
@@ -0,0 +1,178 @@
+import unittest
+import tempfile
+import shutil
+import tarfile
+import zipfile
+import csv
+import os.path
+from datetime import datetime
+from StringIO import StringIO
+
+import git
+
+from chisubmit.common import ChisubmitException
+from chisubmit.repos.local import LocalGitRepo
+from chisubmit.repos.export import SubmissionExporter, EXPORT_EXPORTED,\
+    EXPORT_UNCHANGED, EXPORT_NOT_SUBMITTED, EXPORT_FAILED, EXPORT_FORMAT_TARGZ,\
+    EXPORT_FORMAT_ZIP, MANIFEST_FILE, MANIFEST_FIELDS, get_export_format
+
+
+class Fake(object):
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+class FakeConnection(object):
+    def __init__(self, server_dir):
+        self.server_dir = server_dir
+
+    def get_repository_git_url(self, course, team):
+        return "%s/%s.git" % (self.server_dir, team.team_id)
+
+
+class SubmissionExporterTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.server_dir = "%s/server" % self.tempdir
+
+        self.config = Fake(work_dir = "%s/work" % self.tempdir)
+        self.course = Fake(course_id = "cmsc40100")
+        self.assignment = Fake(assignment_id = "pa1")
+
+        self.teams_registrations = {}
+        self.commits = {}
+        for team_id in ["student1-student2", "student3-student4"]:
+            self.commits[team_id] = self.create_server_repo(team_id)
+            self.add_team(team_id, self.commits[team_id][0])
+        self.add_team("student5-student6", None)
+
+        self.conn = FakeConnection(self.server_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def create_server_repo(self, team_id):
+        server_path = "%s/%s.git" % (self.server_dir, team_id)
+        server = git.Repo.init(server_path, bare = True)
+        with server.config_writer() as config:
+            config.set_value("uploadpack", "allowAnySHA1InWant", "true")
+
+        path = "%s/students/%s" % (self.tempdir, team_id)
+        repo = git.Repo.clone_from(server_path, path)
+        commits = []
+        for i in range(2):
+            with open("%s/README" % path, "w") as f:
+                f.write("%s %i" % (team_id, i))
+            repo.index.add(["README"])
+            commits.append(repo.index.commit("Commit %i" % i).hexsha)
+        repo.remotes.origin.push("master")
+
+        return commits
+
+    def add_team(self, team_id, commit_sha):
+        team = Fake(team_id = team_id)
+        if commit_sha is None:
+            submission = None
+        else:
+            submission = Fake(commit_sha = commit_sha, extensions_used = 1,
+                              submitted_at = datetime(2016, 1, 1, 12, 0))
+        self.teams_registrations[team] = Fake(assignment = self.assignment, final_submission = submission)
+
+    def get_team(self, team_id):
+        return [t for t in self.teams_registrations if t.team_id == team_id][0]
+
+    def export(self, output, export_format, workers = 2):
+        exporter = SubmissionExporter(self.config, self.course, self.assignment, workers = workers)
+        statuses = dict([(team.team_id, (status, error)) for team, _, status, error
+                         in exporter.export_submissions(self.teams_registrations, self.conn)])
+        exporter.write_archive(self.teams_registrations, output, export_format)
+        return exporter, statuses
+
+    def read_tar(self, output):
+        with tarfile.open(output) as tar:
+            return dict([(m.name, tar.extractfile(m).read()) for m in tar if m.isfile()])
+
+    def read_zip(self, output):
+        with zipfile.ZipFile(output) as z:
+            return dict([(name, z.read(name)) for name in z.namelist() if not name.endswith("/")])
+
+    def assert_manifest(self, manifest, teams):
+        rows = list(csv.reader(StringIO(manifest)))
+        self.assertEquals(rows[0], MANIFEST_FIELDS)
+        self.assertEquals(rows[1:], [[team_id, commit_sha, "2016-01-01T12:00:00", "1"]
+                                     for team_id, commit_sha in teams])
+
+    def test_export_tar(self):
+        output = "%s/pa1.tar.gz" % self.tempdir
+        _, statuses = self.export(output, EXPORT_FORMAT_TARGZ)
+
+        self.assertEquals(statuses, {"student1-student2": (EXPORT_EXPORTED, None),
+                                     "student3-student4": (EXPORT_EXPORTED, None),
+                                     "student5-student6": (EXPORT_NOT_SUBMITTED, None)})
+
+        files = self.read_tar(output)
+        self.assertItemsEqual(files.keys(), [MANIFEST_FILE, "student1-student2/README", "student3-student4/README"])
+        self.assertEquals(files["student1-student2/README"], "student1-student2 0")
+        self.assertEquals(files["student3-student4/README"], "student3-student4 0")
+        self.assert_manifest(files[MANIFEST_FILE], [("student1-student2", self.commits["student1-student2"][0]),
+                                                    ("student3-student4", self.commits["student3-student4"][0])])
+
+    def test_export_zip(self):
+        output = "%s/pa1.zip" % self.tempdir
+        self.export(output, EXPORT_FORMAT_ZIP)
+
+        files = self.read_zip(output)
+        self.assertItemsEqual(files.keys(), [MANIFEST_FILE, "student1-student2/README", "student3-student4/README"])
+        self.assertEquals(files["student1-student2/README"], "student1-student2 0")
+        self.assertEquals(files["student3-student4/README"], "student3-student4 0")
+
+    def test_mirror_is_shallow(self):
+        exporter, _ = self.export("%s/pa1.zip" % self.tempdir, EXPORT_FORMAT_ZIP)
+
+        mirror = LocalGitRepo(exporter.get_mirror_path(self.get_team("student1-student2")))
+        self.assertTrue(mirror.is_shallow())
+        self.assertIsNone(mirror.get_commit(self.commits["student1-student2"][1]))
+
+    def test_export_unchanged(self):
+        output = "%s/pa1.tar.gz" % self.tempdir
+        exporter, _ = self.export(output, EXPORT_FORMAT_TARGZ)
+
+        # student1-student2 resubmits
+        team = self.get_team("student1-student2")
+        old_part_path = exporter.get_part_path(team, self.commits["student1-student2"][0])
+        self.teams_registrations[team].final_submission.commit_sha = self.commits["student1-student2"][1]
+
+        _, statuses = self.export(output, EXPORT_FORMAT_TARGZ)
+        self.assertEquals(statuses, {"student1-student2": (EXPORT_EXPORTED, None),
+                                     "student3-student4": (EXPORT_UNCHANGED, None),
+                                     "student5-student6": (EXPORT_NOT_SUBMITTED, None)})
+        self.assertFalse(os.path.exists(old_part_path))
+
+        files = self.read_tar(output)
+        self.assertEquals(files["student1-student2/README"], "student1-student2 1")
+        self.assertEquals(files["student3-student4/README"], "student3-student4 0")
+
+    def test_export_failed(self):
+        team = self.get_team("student3-student4")
+        self.teams_registrations[team].final_submission.commit_sha = "0" * 40
+
+        output = "%s/pa1.tar.gz" % self.tempdir
+        _, statuses = self.export(output, EXPORT_FORMAT_TARGZ, workers = 1)
+
+        self.assertEquals(statuses["student1-student2"], (EXPORT_EXPORTED, None))
+        self.assertEquals(statuses["student3-student4"][0], EXPORT_FAILED)
+
+        files = self.read_tar(output)
+        self.assertItemsEqual(files.keys(), [MANIFEST_FILE, "student1-student2/README"])
+        self.assert_manifest(files[MANIFEST_FILE], [("student1-student2", self.commits["student1-student2"][0])])
+
+    def test_export_no_workers(self):
+        for workers in [0, -1]:
+            with self.assertRaises(ChisubmitException):
+                SubmissionExporter(self.config, self.course, self.assignment, workers = workers)
+
+    def test_get_export_format(self):
+        self.assertEquals(get_export_format("pa1.zip"), EXPORT_FORMAT_ZIP)
+        self.assertEquals(get_export_format("pa1.tar.gz"), EXPORT_FORMAT_TARGZ)
+        self.assertEquals(get_export_format("pa1.tgz"), EXPORT_FORMAT_TARGZ)
+        self.assertIsNone(get_export_format("pa1.rar"))
@@ -0,0 +1,94 @@
+import unittest
+import time
+from collections import Counter
+
+from chisubmit.grading import GraderAssignment, GraderAssignmentException,\
+    compute_workloads, WORKLOAD_REMAINDER
+
+class GraderAssignmentTests(unittest.TestCase):
+
+    def test_workloads_remainder(self):
+        workloads = compute_workloads({"grader1": WORKLOAD_REMAINDER,
+                                       "grader2": WORKLOAD_REMAINDER,
+                                       "grader3": 2}, 10, seed="cmsc40100pa1")
+
+        self.assertEquals(workloads["grader3"], 2)
+        self.assertItemsEqual([workloads["grader1"], workloads["grader2"]], [4, 4])
+
+    def test_workloads_uneven(self):
+        workloads = compute_workloads({"grader1": WORKLOAD_REMAINDER,
+                                       "grader2": WORKLOAD_REMAINDER}, 5, seed="cmsc40100pa1")
+
+        self.assertItemsEqual(workloads.values(), [2, 3])
+        self.assertEquals(workloads, compute_workloads({"grader1": WORKLOAD_REMAINDER,
+                                                        "grader2": WORKLOAD_REMAINDER}, 5, seed="cmsc40100pa1"))
+
+    def test_workloads_invalid(self):
+        with self.assertRaises(GraderAssignmentException):
+            compute_workloads({"grader1": -1}, 5)
+
+    def test_balanced(self):
+        team_ids = ["team%i" % i for i in range(10)]
+        solution = GraderAssignment(team_ids, {"grader1": 5, "grader2": 5}).solve()
+
+        self.assertEquals(Counter(solution.values()), {"grader1": 5, "grader2": 5})
+
+    def test_conflicts(self):
+        team_members = {"team1": ["student1"], "team2": ["student2"]}
+        conflicts = {"grader1": ["student1"]}
+        solution = GraderAssignment(["team1", "team2"], {"grader1": 1, "grader2": 1},
+                                    team_members = team_members,
+                                    conflicts = conflicts).solve()
+
+        self.assertEquals(solution, {"team1": "grader2", "team2": "grader1"})
+
+    def test_conflicts_no_capacity(self):
+        team_members = {"team1": ["student1"], "team2": ["student2"]}
+        conflicts = {"grader1": ["student1"]}
+        solution = GraderAssignment(["team1", "team2"], {"grader1": 2},
+                                    team_members = team_members,
+                                    conflicts = conflicts).solve()
+
+        self.assertEquals(solution, {"team1": None, "team2": "grader1"})
+
+    def test_continuity(self):
+        team_ids = ["team%i" % i for i in range(4)]
+        continuity = {"team0": "grader2", "team1": "grader2", "team2": "grader1", "team3": "grader1"}
+        solution = GraderAssignment(team_ids, {"grader1": 2, "grader2": 2},
+                                    continuity = continuity).solve()
+
+        self.assertEquals(solution, continuity)
+
+    def test_continuity_reshuffle(self):
+        # team0 can only be graded by grader1, so team1 has to be moved
+        # away from it even though it is team1's previous grader
+        team_members = {"team0": ["student0"], "team1": ["student1"], "team2": ["student2"]}
+        conflicts = {"grader2": ["student0"]}
+        continuity = {"team1": "grader1", "team2": "grader2"}
+        solution = GraderAssignment(["team0", "team1", "team2"], {"grader1": 1, "grader2": 2},
+                                    team_members = team_members,
+                                    conflicts = conflicts,
+                                    continuity = continuity).solve()
+
+        self.assertEquals(solution, {"team0": "grader1", "team1": "grader2", "team2": "grader2"})
+
+    def test_avoid(self):
+        avoid = {"team0": "grader1", "team1": "grader2"}
+        solution = GraderAssignment(["team0", "team1"], {"grader1": 1, "grader2": 1},
+                                    avoid = avoid).solve()
+
+        self.assertEquals(solution, {"team0": "grader2", "team1": "grader1"})
+
+    def test_large(self):
+        team_ids = ["team%04i" % i for i in range(1000)]
+        graders = ["grader%02i" % i for i in range(40)]
+        workloads = compute_workloads(dict([(g, WORKLOAD_REMAINDER) for g in graders]), len(team_ids))
+        continuity = dict([(t, graders[(i * 7) % len(graders)]) for i, t in enumerate(team_ids)])
+
+        start = time.time()
+        solution = GraderAssignment(team_ids, workloads, continuity = continuity).solve()
+        elapsed = time.time() - start
+
+        self.assertEquals(Counter(solution.values()), Counter(workloads))
+        self.assertEquals(solution, continuity)
+        self.assertLess(elapsed, 1.0)
@@ -0,0 +1,162 @@
+import unittest
+import tempfile
+import shutil
+
+import git
+
+from chisubmit.common import ChisubmitException
+from chisubmit.repos.local import LocalGitRepo, CLONE_FULL, CLONE_PARTIAL, CLONE_SHALLOW
+from chisubmit.repos.grading import GradingGitRepo
+
+
+class FakeTeam(object):
+    team_id = "student1-student2"
+
+class FakeRegistration(object):
+    def get_grading_branch_name(self):
+        return "pa1-grading"
+
+
+class GradingRepoCloneTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.server_path = "%s/server.git" % self.tempdir
+
+        server = git.Repo.init(self.server_path, bare = True)
+        with server.config_writer() as config:
+            config.set_value("uploadpack", "allowFilter", "true")
+            config.set_value("uploadpack", "allowAnySHA1InWant", "true")
+
+        # The students submit their second commit, and then push one more
+        student_path = "%s/student" % self.tempdir
+        student = git.Repo.clone_from(self.server_path, student_path)
+        self.commits = []
+        for i in range(3):
+            with open("%s/data" % student_path, "w") as f:
+                f.write("Data %i\n" % i * 1000)
+            student.index.add(["data"])
+            self.commits.append(student.index.commit("Commit %i" % i).hexsha)
+        student.remotes.origin.push("master")
+        student.close()
+
+        self.submission_sha = self.commits[1]
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def create_repo(self, clone_mode, remotes = [], shallow_commits = []):
+        path = "%s/grading-%s" % (self.tempdir, clone_mode)
+        repo = LocalGitRepo.create_repo(path, clone_from_url = self.server_path, remotes = remotes, clone_mode = clone_mode,
+                                        shallow_commits = shallow_commits)
+        return repo, path
+
+    def create_grading_repo(self, clone_mode):
+        repo, path = self.create_repo(clone_mode, shallow_commits = [self.submission_sha])
+        return GradingGitRepo(FakeTeam(), FakeRegistration(), repo, path, self.submission_sha, staging_only = True)
+
+    def create_grading_repo_with_staging(self, clone_mode):
+        staging_path = "%s/staging.git" % self.tempdir
+        git.Repo.init(staging_path, bare = True).close()
+
+        repo, path = self.create_repo(clone_mode, remotes = [("staging", staging_path)], shallow_commits = [self.submission_sha])
+        return GradingGitRepo(FakeTeam(), FakeRegistration(), repo, path, self.submission_sha, staging_only = False), staging_path
+
+    def assert_push_to_staging(self, clone_mode):
+        grading_repo, staging_path = self.create_grading_repo_with_staging(clone_mode)
+        grading_repo.create_grading_branch()
+        grading_repo.push_grading_branch_to_staging()
+
+        staging = LocalGitRepo(staging_path)
+        self.assertEquals(staging.repo.commit("pa1-grading").hexsha, self.submission_sha)
+        self.assertEquals(staging.repo.commit("master").hexsha, self.commits[2])
+        self.assertIsNotNone(staging.get_commit(self.commits[0]))
+
+    def assert_grading_branch(self, grading_repo):
+        grading_repo.create_grading_branch()
+
+        self.assertTrue(grading_repo.has_grading_branch())
+        self.assertEquals(grading_repo.repo.repo.head.commit.hexsha, self.submission_sha)
+        with open("%s/data" % grading_repo.repo_path) as f:
+            self.assertEquals(f.read(), "Data 1\n" * 1000)
+
+    def test_full_clone(self):
+        repo, _ = self.create_repo(CLONE_FULL)
+
+        self.assertFalse(repo.is_shallow())
+        for sha in self.commits:
+            self.assertIsNotNone(repo.get_commit(sha))
+
+    def test_partial_clone(self):
+        repo, _ = self.create_repo(CLONE_PARTIAL)
+
+        self.assertFalse(repo.is_shallow())
+        for sha in self.commits:
+            self.assertIsNotNone(repo.get_commit(sha))
+
+        # Only the blobs of the checked out commit are downloaded
+        missing = [l for l in repo.repo.git.rev_list("--objects", "--all", "--missing=print").split("\n")
+                   if l.startswith("?")]
+        self.assertEquals(len(missing), 2)
+
+    def test_shallow_clone(self):
+        repo, _ = self.create_repo(CLONE_SHALLOW)
+
+        self.assertTrue(repo.is_shallow())
+        self.assertIsNotNone(repo.get_commit(self.commits[2]))
+        self.assertIsNone(repo.get_commit(self.submission_sha))
+
+        commit = repo.fetch_commit("origin", self.submission_sha)
+        self.assertEquals(commit.sha, self.submission_sha)
+        self.assertTrue(repo.is_shallow())
+        self.assertIsNone(repo.get_commit(self.commits[0]))
+
+    def test_shallow_clone_with_commit(self):
+        repo, path = self.create_repo(CLONE_SHALLOW, shallow_commits = [self.submission_sha])
+
+        self.assertTrue(repo.is_shallow())
+        self.assertIsNotNone(repo.get_commit(self.commits[2]))
+        self.assertIsNotNone(repo.get_commit(self.submission_sha))
+        self.assertIsNone(repo.get_commit(self.commits[0]))
+
+        # master is checked out, like in a regular clone
+        self.assertEquals(repo.repo.active_branch.name, "master")
+        self.assertEquals(repo.repo.head.commit.hexsha, self.commits[2])
+        with open("%s/data" % path) as f:
+            self.assertEquals(f.read(), "Data 2\n" * 1000)
+
+    def test_shallow_clone_with_nonexistent_commit(self):
+        # If the commit can't be fetched, we still get the latest commits
+        repo, _ = self.create_repo(CLONE_SHALLOW, shallow_commits = ["0" * 40])
+
+        self.assertTrue(repo.is_shallow())
+        self.assertIsNotNone(repo.get_commit(self.commits[2]))
+        self.assertIsNone(repo.get_commit(self.submission_sha))
+        self.assertEquals(repo.repo.active_branch.name, "master")
+
+    def test_shallow_clone_nonexistent_commit(self):
+        repo, _ = self.create_repo(CLONE_SHALLOW)
+
+        self.assertIsNone(repo.fetch_commit("origin", "0" * 40))
+
+    def test_invalid_clone_mode(self):
+        with self.assertRaises(ChisubmitException):
+            self.create_repo("sparse")
+
+    def test_grading_branch_full_clone(self):
+        self.assert_grading_branch(self.create_grading_repo(CLONE_FULL))
+
+    def test_grading_branch_partial_clone(self):
+        self.assert_grading_branch(self.create_grading_repo(CLONE_PARTIAL))
+
+    def test_grading_branch_shallow_clone(self):
+        self.assert_grading_branch(self.create_grading_repo(CLONE_SHALLOW))
+
+    def test_push_to_staging_full_clone(self):
+        self.assert_push_to_staging(CLONE_FULL)
+
+    def test_push_to_staging_partial_clone(self):
+        self.assert_push_to_staging(CLONE_PARTIAL)
+
+    def test_push_to_staging_shallow_clone(self):
+        self.assert_push_to_staging(CLONE_SHALLOW)
@@ -0,0 +1,144 @@
+import unittest
+import tempfile
+import shutil
+
+import git
+import git.cmd
+from gitdb.exc import BadName
+
+from chisubmit.repos.local import LocalGitRepo, GitReadBackend, ObjectReadBackend
+
+
+class LocalGitRepoReadTests(object):
+    """
+    Tests of the read operations of LocalGitRepo, run with each read
+    backend (on loose and on packed objects and refs)
+    """
+
+    read_backend = None
+    packed = False
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.path = "%s/repo" % self.tempdir
+
+        repo = git.Repo.init(self.path)
+        self.commits = []
+        for i in range(3):
+            with open("%s/foo" % self.path, "w") as f:
+                f.write("Commit %i" % i)
+            repo.index.add(["foo"])
+            self.commits.append(repo.index.commit("Commit %i" % i).hexsha)
+
+        repo.create_tag("lightweight", self.commits[0])
+        repo.create_tag("annotated", self.commits[1], "Annotated tag")
+        repo.create_head("other", self.commits[0])
+
+        # A fake remote branch (to avoid setting up a remote repository)
+        repo.git.update_ref("refs/remotes/origin/master", self.commits[2])
+
+        if self.packed:
+            repo.git.gc()
+
+        repo.close()
+
+        self.repo = LocalGitRepo(self.path, read_backend = self.read_backend)
+
+    def tearDown(self):
+        self.repo.close()
+        shutil.rmtree(self.tempdir)
+
+    def test_get_commit(self):
+        commit = self.repo.get_commit(self.commits[1])
+        self.assertEquals(commit.sha, self.commits[1])
+        self.assertEquals(commit.message, "Commit 1")
+
+        self.assertEquals(self.repo.get_commit(self.commits[1][:8]).sha, self.commits[1])
+        self.assertEquals(self.repo.get_commit("master").sha, self.commits[2])
+        self.assertEquals(self.repo.get_commit("HEAD").sha, self.commits[2])
+        self.assertEquals(self.repo.get_commit("other").sha, self.commits[0])
+
+    def test_get_commit_nonexistent(self):
+        self.assertIsNone(self.repo.get_commit("0" * 40))
+
+        with self.assertRaises(BadName):
+            self.repo.get_commit("nonexistent")
+
+    def test_get_tag(self):
+        tag = self.repo.get_tag("lightweight")
+        self.assertEquals(tag.name, "lightweight")
+        self.assertEquals(tag.commit.sha, self.commits[0])
+
+        tag = self.repo.get_tag("annotated")
+        self.assertEquals(tag.name, "annotated")
+        self.assertEquals(tag.commit.sha, self.commits[1])
+
+        self.assertIsNone(self.repo.get_tag("nonexistent"))
+        self.assertTrue(self.repo.has_tag("annotated"))
+        self.assertFalse(self.repo.has_tag("nonexistent"))
+
+    def test_has_branch(self):
+        self.assertTrue(self.repo.has_branch("master"))
+        self.assertTrue(self.repo.has_branch("other"))
+        self.assertFalse(self.repo.has_branch("nonexistent"))
+        self.assertFalse(self.repo.has_branch("lightweight"))
+
+    def test_has_remote_branch(self):
+        self.assertTrue(self.repo.has_remote_branch("origin", "master"))
+        self.assertFalse(self.repo.has_remote_branch("origin", "other"))
+        self.assertFalse(self.repo.has_remote_branch("staging", "master"))
+
+    def test_new_objects(self):
+        # Objects created after the repository was opened (possibly in a
+        # new pack) can be read
+        self.assertIsNotNone(self.repo.get_commit("master"))
+
+        other_repo = git.Repo(self.path)
+        with open("%s/foo" % self.path, "w") as f:
+            f.write("New commit")
+        other_repo.index.add(["foo"])
+        sha = other_repo.index.commit("New commit").hexsha
+        other_repo.create_tag("new", sha)
+        if self.packed:
+            other_repo.git.repack("-d")
+        other_repo.close()
+
+        self.assertEquals(self.repo.get_commit(sha).sha, sha)
+        self.assertEquals(self.repo.get_tag("new").commit.sha, sha)
+
+
+class GitReadBackendTests(LocalGitRepoReadTests, unittest.TestCase):
+    read_backend = GitReadBackend
+
+class GitReadBackendPackedTests(LocalGitRepoReadTests, unittest.TestCase):
+    read_backend = GitReadBackend
+    packed = True
+
+class ObjectReadBackendTests(LocalGitRepoReadTests, unittest.TestCase):
+    read_backend = ObjectReadBackend
+
+    def test_no_git_processes(self):
+        popen = git.cmd.Popen
+        def fail(*args, **kwargs):
+            self.fail("Ran git: %s" % (args,))
+        git.cmd.Popen = fail
+        try:
+            self.test_get_commit()
+            self.test_get_tag()
+            self.test_has_branch()
+            self.test_has_remote_branch()
+        finally:
+            git.cmd.Popen = popen
+
+class ObjectReadBackendPackedTests(ObjectReadBackendTests):
+    packed = True
+
+    def test_fallback(self):
+        # Make the backend unable to read objects
+        def fail(*args, **kwargs):
+            raise ValueError("Unsupported object")
+        self.repo.read_backend.repo.odb.info = fail
+        self.repo.read_backend.repo.odb.stream = fail
+
+        self.test_get_commit()
+        self.test_get_tag()
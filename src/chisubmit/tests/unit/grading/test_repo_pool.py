@@ -0,0 +1,101 @@
+import unittest
+import tempfile
+import shutil
+import threading
+
+import git
+
+from chisubmit.repos.local import LocalGitRepo, LocalGitRepoPool
+
+
+class LocalGitRepoPoolTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.paths = []
+        for i in range(3):
+            path = "%s/repo%i" % (self.tempdir, i)
+            repo = git.Repo.init(path)
+            open("%s/foo" % path, "w").close()
+            repo.index.add(["foo"])
+            repo.index.commit("First commit")
+            self.paths.append(path)
+
+        self.pool = LocalGitRepoPool(max_size = 2)
+
+    def tearDown(self):
+        self.pool.close_all()
+        shutil.rmtree(self.tempdir)
+
+    def read(self, repo):
+        # Reads an object with git cat-file, which keeps running until
+        # the repository is closed
+        repo.repo.commit("master").message
+
+    def is_open(self, repo):
+        return repo.repo.git.cat_file_all is not None
+
+    def test_get_same_repo(self):
+        repo = self.pool.get(self.paths[0])
+        self.read(repo)
+        self.assertTrue(self.is_open(repo))
+
+        self.assertIs(self.pool.get(self.paths[0]), repo)
+        self.assertIs(self.pool.get(self.paths[0] + "/"), repo)
+        self.assertEquals(len(self.pool), 1)
+
+    def test_evict_least_recently_used(self):
+        repo0 = self.pool.get(self.paths[0])
+        repo1 = self.pool.get(self.paths[1])
+        self.read(repo0)
+        self.read(repo1)
+
+        self.assertIs(self.pool.get(self.paths[0]), repo0)
+
+        repo2 = self.pool.get(self.paths[2])
+        self.assertEquals(len(self.pool), 2)
+        self.assertTrue(self.is_open(repo0))
+        self.assertFalse(self.is_open(repo1))
+
+        self.assertIs(self.pool.get(self.paths[0]), repo0)
+        self.assertIs(self.pool.get(self.paths[2]), repo2)
+        self.assertIsNot(self.pool.get(self.paths[1]), repo1)
+
+    def test_discard(self):
+        repo = self.pool.get(self.paths[0])
+        self.read(repo)
+
+        self.pool.discard(self.paths[0])
+        self.assertEquals(len(self.pool), 0)
+        self.assertFalse(self.is_open(repo))
+        self.assertIsNot(self.pool.get(self.paths[0]), repo)
+
+    def test_removed_repo(self):
+        repo = self.pool.get(self.paths[0])
+
+        shutil.rmtree(self.paths[0])
+
+        with self.assertRaises(git.NoSuchPathError):
+            self.pool.get(self.paths[0])
+        self.assertEquals(len(self.pool), 0)
+
+    def test_close_all(self):
+        repos = [self.pool.get(path) for path in self.paths[:2]]
+        for repo in repos:
+            self.read(repo)
+
+        self.pool.close_all()
+        self.assertEquals(len(self.pool), 0)
+        for repo in repos:
+            self.assertFalse(self.is_open(repo))
+
+    def test_threads(self):
+        repo = self.pool.get(self.paths[0])
+
+        other_repos = []
+        t = threading.Thread(target = lambda: other_repos.append(self.pool.get(self.paths[0])))
+        t.start()
+        t.join()
+
+        self.assertIsNot(other_repos[0], repo)
+        self.assertIs(self.pool.get(self.paths[0]), repo)